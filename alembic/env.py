@@ -21,9 +21,10 @@ if config.config_file_name is not None:
 # target_metadata = None
 from volta_api.core.database import Base  # or wherever your Base is defined
 from volta_api.users.models import User  # noqa
-from volta_api.vehicles.models import Vehicle, VehicleUser  # noqa
+from volta_api.auth.revocation_models import RevokedToken  # noqa
+from volta_api.vehicles.models import Vehicle, VehicleLocation, VehicleUser  # noqa
 from volta_api.nodes.models import Node  # noqa
-from volta_api.routes.models import Route, RouteNode  # noqa
+from volta_api.routes.models import Route, RouteNode, StopDwell  # noqa
 
 target_metadata = Base.metadata
 
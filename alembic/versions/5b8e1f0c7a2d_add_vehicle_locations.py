@@ -0,0 +1,55 @@
+"""add_vehicle_locations
+
+Revision ID: 5b8e1f0c7a2d
+Revises: a38008ab1342
+Create Date: 2026-10-18 09:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5b8e1f0c7a2d'
+down_revision: Union[str, Sequence[str], None] = 'a38008ab1342'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        'vehicle_locations',
+        sa.Column('id', sa.BigInteger(), autoincrement=True, nullable=False),
+        sa.Column('received_at', sa.DateTime(), nullable=False),
+        sa.Column('vehicle_id', sa.Integer(), nullable=False),
+        sa.Column('route_id', sa.BigInteger(), nullable=True),
+        sa.Column('lat', sa.Numeric(precision=10, scale=7), nullable=False),
+        sa.Column('lng', sa.Numeric(precision=10, scale=7), nullable=False),
+        sa.Column('heading', sa.Float(), nullable=True),
+        sa.Column('speed_mps', sa.Float(), nullable=True),
+        sa.Column('accuracy_m', sa.Float(), nullable=True),
+        sa.Column('recorded_at', sa.DateTime(), nullable=True),
+        sa.PrimaryKeyConstraint('id', 'received_at'),
+    )
+    op.create_index(
+        'idx_vehicle_locations_vehicle_time',
+        'vehicle_locations',
+        ['vehicle_id', 'received_at'],
+        unique=False,
+    )
+    op.create_index(
+        'idx_vehicle_locations_route_time',
+        'vehicle_locations',
+        ['route_id', 'received_at'],
+        unique=False,
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('idx_vehicle_locations_route_time', table_name='vehicle_locations')
+    op.drop_index('idx_vehicle_locations_vehicle_time', table_name='vehicle_locations')
+    op.drop_table('vehicle_locations')
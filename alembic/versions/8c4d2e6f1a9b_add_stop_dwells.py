@@ -0,0 +1,53 @@
+"""add_stop_dwells
+
+Revision ID: 8c4d2e6f1a9b
+Revises: 5b8e1f0c7a2d
+Create Date: 2026-10-18 13:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '8c4d2e6f1a9b'
+down_revision: Union[str, Sequence[str], None] = '5b8e1f0c7a2d'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        'stop_dwells',
+        sa.Column('id', sa.BigInteger(), autoincrement=True, nullable=False),
+        sa.Column('vehicle_id', sa.Integer(), nullable=False),
+        sa.Column('route_id', sa.BigInteger(), nullable=False),
+        sa.Column('route_node_id', sa.BigInteger(), nullable=False),
+        sa.Column('node_id', sa.BigInteger(), nullable=False),
+        sa.Column('arrived_at', sa.DateTime(), nullable=False),
+        sa.Column('departed_at', sa.DateTime(), nullable=False),
+        sa.Column('dwell_seconds', sa.Integer(), nullable=False),
+        sa.PrimaryKeyConstraint('id'),
+    )
+    op.create_index(
+        'idx_stop_dwells_route_node_time',
+        'stop_dwells',
+        ['route_node_id', 'arrived_at'],
+        unique=False,
+    )
+    op.create_index(
+        'idx_stop_dwells_vehicle_time',
+        'stop_dwells',
+        ['vehicle_id', 'arrived_at'],
+        unique=False,
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('idx_stop_dwells_vehicle_time', table_name='stop_dwells')
+    op.drop_index('idx_stop_dwells_route_node_time', table_name='stop_dwells')
+    op.drop_table('stop_dwells')
@@ -0,0 +1,71 @@
+# benchmarks/graph_path_bench.py
+"""
+Shortest-path queries/sec over data/graph.json: A* vs Dijkstra, cold and
+through the LRU cache.
+
+    PYTHONPATH=src python benchmarks/graph_path_bench.py --queries 5000
+"""
+from __future__ import annotations
+
+import argparse
+import random
+import time
+
+from volta_api.nodes import graph as graph_module
+from volta_api.nodes.graph import cached_shortest_path, get_graph
+
+
+def _rate(count: int, started: float) -> str:
+    return f"{count / (time.perf_counter() - started):,.0f} queries/sec"
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--queries", type=int, default=5000)
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    random.seed(args.seed)
+    started = time.perf_counter()
+    graph = get_graph()
+    print(f"load:        {(time.perf_counter() - started) * 1000:.1f} ms")
+    print(f"graph:       {graph.node_count} nodes, {graph.edge_count} edges")
+    print(f"h scale:     {graph.heuristic_scale:.4f}")
+
+    pairs = [
+        (random.choice(graph.codes), random.choice(graph.codes))
+        for _ in range(args.queries)
+    ]
+
+    started = time.perf_counter()
+    astar = [graph.shortest_path(a, b) for a, b in pairs]
+    print(f"a*:          {_rate(len(pairs), started)}")
+
+    scale = graph.heuristic_scale
+    graph.heuristic_scale = 0.0  # Zero heuristic: plain Dijkstra
+    started = time.perf_counter()
+    dijkstra = [graph.shortest_path(a, b) for a, b in pairs]
+    print(f"dijkstra:    {_rate(len(pairs), started)}")
+    graph.heuristic_scale = scale
+
+    mismatches = sum(
+        1
+        for x, y in zip(astar, dijkstra)
+        if (x is None) != (y is None) or (x and abs(x.distance_m - y.distance_m) > 0.01)
+    )
+    expanded_a = sum(r.expanded for r in astar if r)
+    expanded_d = sum(r.expanded for r in dijkstra if r)
+    print(f"expanded:    a* {expanded_a:,} vs dijkstra {expanded_d:,}")
+    print(f"mismatches:  {mismatches}")
+
+    cached_shortest_path.cache_clear()
+    hot = pairs[:256]
+    started = time.perf_counter()
+    for i in range(args.queries):
+        cached_shortest_path(*hot[i % len(hot)])
+    print(f"lru (256):   {_rate(args.queries, started)}")
+    print(f"cache:       {graph_module.path_cache_stats()}")
+
+
+if __name__ == "__main__":
+    main()
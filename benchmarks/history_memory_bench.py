@@ -0,0 +1,102 @@
+# benchmarks/history_memory_bench.py
+"""
+Bytes per vehicle history: JSON events vs packed records.
+
+    PYTHONPATH=src python benchmarks/history_memory_bench.py --entries 2000
+    PYTHONPATH=src python benchmarks/history_memory_bench.py --url redis://localhost:6379/15
+
+With --url the lists are also written to Redis and measured with MEMORY USAGE.
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import random
+import time
+
+import orjson
+
+from volta_api.ws.history import RECORD, decode_fix, encode_fix
+
+
+def _events(count: int) -> list[dict]:
+    started = int(time.time()) - count
+    lat, lng = -6.8153, 39.2796
+    events = []
+    for i in range(count):
+        lat += random.uniform(-1e-4, 1e-4)
+        lng += random.uniform(-1e-4, 1e-4)
+        events.append(
+            {
+                "type": "vehicle.location.update",
+                "data": {
+                    "vehicle_id": 42,
+                    "plate_number": "T-123-ABC",
+                    "route_id": 7,
+                    "lat": round(lat, 7),
+                    "lng": round(lng, 7),
+                    "heading": round(random.uniform(0, 359.99), 2),
+                    "speed_mps": round(random.uniform(0, 20), 2),
+                    "accuracy_m": round(random.uniform(3, 30), 1),
+                    "recorded_at": time.strftime(
+                        "%Y-%m-%dT%H:%M:%SZ", time.gmtime(started + i - 1)
+                    ),
+                    "received_at": time.strftime(
+                        "%Y-%m-%dT%H:%M:%SZ", time.gmtime(started + i)
+                    ),
+                },
+            }
+        )
+    return events
+
+
+async def _redis_usage(url: str, json_entries: list, packed_entries: list):
+    import redis.asyncio as redis
+
+    client = redis.Redis.from_url(url, decode_responses=False)
+    try:
+        await client.delete("bench:history:json", "bench:history:packed")
+        await client.rpush("bench:history:json", *json_entries)
+        await client.rpush("bench:history:packed", *packed_entries)
+        json_usage = await client.memory_usage("bench:history:json")
+        packed_usage = await client.memory_usage("bench:history:packed")
+        await client.delete("bench:history:json", "bench:history:packed")
+    finally:
+        await client.aclose()
+    return json_usage, packed_usage
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--entries", type=int, default=2000)
+    parser.add_argument("--url", default=None)
+    args = parser.parse_args()
+
+    events = _events(args.entries)
+    json_entries = [orjson.dumps(event) for event in events]
+    packed_entries = [encode_fix(event["data"]) for event in events]
+
+    json_bytes = sum(len(entry) for entry in json_entries)
+    packed_bytes = sum(len(entry) for entry in packed_entries)
+    print(f"entries:        {args.entries}")
+    print(f"json payload:   {json_bytes:,} bytes ({json_bytes / args.entries:.0f}/entry)")
+    print(f"packed payload: {packed_bytes:,} bytes ({RECORD.size}/entry)")
+    print(f"ratio:          {json_bytes / packed_bytes:.1f}x")
+
+    started = time.perf_counter()
+    for entry in packed_entries:
+        decode_fix(entry, 42, "T-123-ABC")
+    elapsed = time.perf_counter() - started
+    print(f"decode:         {args.entries / elapsed:,.0f} records/sec")
+
+    if args.url:
+        json_usage, packed_usage = asyncio.run(
+            _redis_usage(args.url, json_entries, packed_entries)
+        )
+        print(f"redis json:     {json_usage:,} bytes")
+        print(f"redis packed:   {packed_usage:,} bytes")
+        print(f"redis ratio:    {json_usage / packed_usage:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,142 @@
+# benchmarks/ws_store_bench.py
+"""
+Fixes/sec for the location write path: the shipped
+store.store_and_publish_location against the original one-command-per-await
+sequence it replaced (save_latest_and_history + two PUBLISHes +
+refresh_sharing).
+
+Run against a throwaway local Redis database (e.g. `docker run -p 6379:6379
+redis`); the real path also writes the live GEO/seen sets and the location
+streams, and everything the run created is deleted afterwards:
+
+    PYTHONPATH=src python benchmarks/ws_store_bench.py --url redis://localhost:6379/15 --fixes 5000
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import time
+
+import redis.asyncio as redis
+
+from volta_api.ws import store
+from volta_api.ws.constants import (
+    HISTORY_KEY,
+    HISTORY_MAX,
+    HISTORY_TTL_SECONDS,
+    LATEST_KEY,
+    LIVE_GEO_KEY,
+    LIVE_SEEN_KEY,
+    ROUTE_UPDATES_CH,
+    SHARING_KEY,
+    SHARING_TTL_SECONDS,
+    UPDATES_CH,
+)
+from volta_api.ws.streams import location_stream_for
+
+VEHICLE_ID_BASE = 900_000_000  # Keeps bench vehicles apart from real ones
+ROUTE_ID = 1
+
+
+def _event(vehicle_id: int, i: int) -> dict:
+    return {
+        "type": "vehicle.location.update",
+        "data": {
+            "vehicle_id": vehicle_id,
+            "plate_number": "T-123-ABC",
+            "route_id": ROUTE_ID,
+            "lat": -6.8 + i * 1e-5,
+            "lng": 39.28 + i * 1e-5,
+            "heading": 90,
+            "speed_mps": 8.5,
+            "accuracy_m": 5,
+            "recorded_at": "2026-01-01T06:00:00Z",
+            "received_at": "2026-01-01T06:00:01Z",
+        },
+    }
+
+
+async def baseline(client: redis.Redis, vehicle_id: int, event: dict):
+    """The write path before pipelining, one await per command."""
+    raw = json.dumps(event)
+    latest_key = LATEST_KEY.format(vehicle_id=vehicle_id)
+    history_key = HISTORY_KEY.format(vehicle_id=vehicle_id)
+    await client.set(latest_key, raw)
+    await client.rpush(history_key, raw)
+    await client.ltrim(history_key, -HISTORY_MAX, -1)
+    await client.expire(history_key, HISTORY_TTL_SECONDS)
+    await client.publish(UPDATES_CH.format(vehicle_id=vehicle_id), json.dumps(event))
+    await client.publish(ROUTE_UPDATES_CH.format(route_id=ROUTE_ID), json.dumps(event))
+    await client.expire(SHARING_KEY.format(vehicle_id=vehicle_id), SHARING_TTL_SECONDS)
+
+
+async def shipped(client: redis.Redis, vehicle_id: int, event: dict):
+    await store.store_and_publish_location(vehicle_id, ROUTE_ID, event)
+
+
+async def run(fn, client: redis.Redis, fixes: int, vehicles: int, concurrency: int):
+    sem = asyncio.Semaphore(concurrency)
+
+    async def one(i: int):
+        async with sem:
+            vehicle_id = VEHICLE_ID_BASE + i % vehicles
+            await fn(client, vehicle_id, _event(vehicle_id, i))
+
+    started = time.perf_counter()
+    await asyncio.gather(*(one(i) for i in range(fixes)))
+    return fixes / (time.perf_counter() - started)
+
+
+async def cleanup(client: redis.Redis, vehicles: int, started_ms: int):
+    vehicle_ids = [VEHICLE_ID_BASE + i for i in range(vehicles)]
+    keys = [
+        key.format(vehicle_id=vehicle_id)
+        for vehicle_id in vehicle_ids
+        for key in (LATEST_KEY, HISTORY_KEY, SHARING_KEY)
+    ]
+    async with client.pipeline(transaction=False) as pipe:
+        pipe.delete(*keys)
+        pipe.zrem(LIVE_GEO_KEY, *vehicle_ids)
+        pipe.zrem(LIVE_SEEN_KEY, *vehicle_ids)
+        await pipe.execute()
+    # Stream entries written during the run, identified by their id range.
+    for stream in {location_stream_for(vehicle_id) for vehicle_id in vehicle_ids}:
+        entries = await client.xrange(stream, min=f"{started_ms}-0")
+        ours = [
+            entry_id
+            for entry_id, fields in entries
+            if json.loads(fields["event"])["data"]["vehicle_id"] in vehicle_ids
+        ]
+        if ours:
+            await client.xdel(stream, *ours)
+        if not await client.xlen(stream):
+            await client.delete(stream)
+
+
+async def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--url", default="redis://localhost:6379/15")
+    parser.add_argument("--fixes", type=int, default=5000)
+    parser.add_argument("--vehicles", type=int, default=500)
+    parser.add_argument("--concurrency", type=int, default=50)
+    args = parser.parse_args()
+
+    client = redis.Redis.from_url(args.url, decode_responses=True)
+    bytes_client = redis.Redis.from_url(args.url, decode_responses=False)
+    # Point the shipped module at the bench database.
+    store.redis_client = client
+    store.redis_bytes_client = bytes_client
+    started_ms = int(time.time() * 1000)
+    try:
+        for name, fn in (("baseline", baseline), ("shipped", shipped)):
+            rate = await run(fn, client, args.fixes, args.vehicles, args.concurrency)
+            print(f"{name:>10}: {rate:,.0f} fixes/sec")
+    finally:
+        await cleanup(client, args.vehicles, started_ms)
+        await client.aclose()
+        await bytes_client.aclose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
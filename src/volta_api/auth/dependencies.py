@@ -3,7 +3,7 @@ from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
 
 from volta_api.core.security import verify_access_token
-from volta_api.users.service import get_user_by_public_id
+from volta_api.users.service import get_cached_user_by_public_id
 
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/auth/login")
@@ -25,8 +25,8 @@ async def get_current_user(token: Annotated[str, Depends(oauth2_scheme)]):
     if user_id is None:
         raise credentials_exception
 
-    # Get user from database
-    user = await get_user_by_public_id(user_id)
+    # Get user, from the short-TTL user cache when fresh
+    user = await get_cached_user_by_public_id(user_id)
     if user is None:
         raise credentials_exception
 
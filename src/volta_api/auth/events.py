@@ -0,0 +1,117 @@
+# volta_api/auth/events.py
+from __future__ import annotations
+
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+import orjson
+
+from volta_api.core.redis import redis_client
+from volta_api.ws.constants import (
+    LISTENER_BACKOFF_MAX_SECONDS,
+    LISTENER_BACKOFF_MIN_SECONDS,
+)
+
+AUTH_EVENTS_CH = "auth:events"
+
+Handler = Callable[[Dict[str, Any]], None]
+ResyncHook = Callable[[], Awaitable[None]]
+
+
+class AuthEvents:
+    """
+    Cross-worker auth notifications (revoked tokens, changed users) over a
+    single Redis pub/sub channel. Handlers only touch in-process state, so
+    they are plain functions. Pub/sub is lossy across reconnects; resync
+    hooks run every time the subscription is (re)established so each
+    consumer can reload whatever it may have missed.
+    """
+
+    def __init__(self, channel: str = AUTH_EVENTS_CH):
+        self.channel = channel
+        self._handlers: Dict[str, List[Handler]] = {}
+        self._resync_hooks: List[ResyncHook] = []
+        self._task: Optional[asyncio.Task] = None
+
+        self.published = 0
+        self.received = 0
+        self.reconnects = 0
+        self.failures = 0
+
+    def on(self, event_type: str, handler: Handler):
+        self._handlers.setdefault(event_type, []).append(handler)
+
+    def on_resync(self, hook: ResyncHook):
+        self._resync_hooks.append(hook)
+
+    async def publish(self, event_type: str, **data: Any):
+        await redis_client.publish(
+            self.channel, orjson.dumps({"type": event_type, **data})
+        )
+        self.published += 1
+
+    def start(self):
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._listen_loop())
+
+    async def stop(self):
+        task, self._task = self._task, None
+        if task is None:
+            return
+        task.cancel()
+        try:
+            await task
+        except asyncio.CancelledError:
+            pass
+
+    async def _listen_loop(self):
+        backoff = LISTENER_BACKOFF_MIN_SECONDS
+        while True:
+            pubsub = redis_client.pubsub(ignore_subscribe_messages=True)
+            try:
+                await pubsub.subscribe(self.channel)
+                # Subscribed first, then resync: nothing falls in between.
+                for hook in self._resync_hooks:
+                    await hook()
+                backoff = LISTENER_BACKOFF_MIN_SECONDS
+
+                async for msg in pubsub.listen():
+                    if msg.get("type") == "message":
+                        self._dispatch(msg.get("data"))
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                self.reconnects += 1
+                await asyncio.sleep(backoff)
+                backoff = min(backoff * 2, LISTENER_BACKOFF_MAX_SECONDS)
+            finally:
+                try:
+                    await pubsub.aclose()
+                except Exception:
+                    pass
+
+    def _dispatch(self, data: Any):
+        try:
+            payload = orjson.loads(data)
+        except Exception:
+            return
+        if not isinstance(payload, dict):
+            return
+        self.received += 1
+        for handler in self._handlers.get(payload.get("type"), ()):
+            try:
+                handler(payload)
+            except Exception:
+                self.failures += 1
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "listening": self._task is not None and not self._task.done(),
+            "published": self.published,
+            "received": self.received,
+            "reconnects": self.reconnects,
+            "failures": self.failures,
+        }
+
+
+auth_events = AuthEvents()
@@ -19,10 +19,3 @@ class Token(Base):
         DateTime(timezone=True), onupdate=func.now(), server_default=func.now()
     )
 
-
-class RevokedToken(Base):
-    __tablename__ = "revoked_tokens"
-
-    id = Column(Integer, primary_key=True, autoincrement=True)
-    token = Column(String(255), nullable=False, unique=True)
-    revoked_at = Column(DateTime(timezone=True), server_default=func.now())
@@ -0,0 +1,137 @@
+# volta_api/auth/revocation.py
+from __future__ import annotations
+
+import heapq
+import time
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Tuple
+
+from volta_api.core.redis import redis_client
+from .events import auth_events
+from .service import (
+    delete_expired_revoked_tokens,
+    get_active_revoked_tokens,
+    insert_revoked_token,
+)
+
+REVOKED_TOKEN_KEY = "auth:revoked:{token_hash}"  # value: exp, TTL: until exp
+REVOKED_TOKEN_SCAN_COUNT = 1000
+TOKEN_REVOKED_EVENT = "token.revoked"
+
+
+def _naive_utc(ts: float) -> datetime:
+    return datetime.fromtimestamp(ts, tz=timezone.utc).replace(tzinfo=None)
+
+
+def _unix(value: datetime) -> float:
+    return value.replace(tzinfo=timezone.utc).timestamp()
+
+
+class RevocationStore:
+    """
+    Revoked access tokens, keyed by token hash.
+
+    Lookups are a dict probe on the request path. Expiry is amortized through
+    a min-heap of (exp, hash): each check pops only the entries that have
+    already expired, so no request ever scans the whole set.
+
+    Sharing across workers: a revocation is written to MySQL (durable), to
+    a Redis key that expires with the token, and announced on auth:events.
+    Each worker applies announcements as they arrive. Whenever its
+    subscription is (re)established it also reloads the Redis keys, which
+    covers anything announced while it was disconnected.
+    """
+
+    def __init__(self):
+        self._revoked: Dict[str, float] = {}
+        self._expiry: List[Tuple[float, str]] = []
+
+        self.revocations = 0
+        self.expired = 0
+        self.resyncs = 0
+
+    def _add(self, token_hash: str, exp: float):
+        if exp <= time.time():
+            return
+        if self._revoked.get(token_hash, 0.0) >= exp:
+            return
+        self._revoked[token_hash] = exp
+        heapq.heappush(self._expiry, (exp, token_hash))
+
+    def _expire(self, now: float):
+        expiry = self._expiry
+        while expiry and expiry[0][0] <= now:
+            exp, token_hash = heapq.heappop(expiry)
+            if self._revoked.get(token_hash) == exp:
+                del self._revoked[token_hash]
+                self.expired += 1
+
+    def is_revoked(self, token_hash: str) -> bool:
+        self._expire(time.time())
+        return token_hash in self._revoked
+
+    async def revoke(self, token_hash: str, exp: float):
+        ttl = int(exp - time.time()) + 1
+        if ttl <= 0:
+            return
+        self._add(token_hash, exp)
+        self.revocations += 1
+        await insert_revoked_token(token_hash, _naive_utc(exp))
+        await redis_client.set(
+            REVOKED_TOKEN_KEY.format(token_hash=token_hash), int(exp), ex=ttl
+        )
+        await auth_events.publish(TOKEN_REVOKED_EVENT, token_hash=token_hash, exp=exp)
+
+    def _on_revoked(self, event: Dict[str, Any]):
+        self._add(event["token_hash"], float(event["exp"]))
+
+    async def load(self):
+        """
+        Startup: rebuild the Redis keys and the local set from MySQL, so
+        revocations survive a Redis flush as well as worker restarts.
+        """
+        now = datetime.now(timezone.utc).replace(tzinfo=None)
+        await delete_expired_revoked_tokens(now)
+        rows = await get_active_revoked_tokens(now)
+        if not rows:
+            return
+        pipe = redis_client.pipeline(transaction=False)
+        for row in rows:
+            exp = _unix(row["expires_at"])
+            ttl = int(exp - time.time()) + 1
+            if ttl <= 0:
+                continue
+            self._add(row["token_hash"], exp)
+            pipe.set(
+                REVOKED_TOKEN_KEY.format(token_hash=row["token_hash"]), int(exp), ex=ttl
+            )
+        await pipe.execute()
+
+    async def resync(self):
+        """Reload every live revocation key from Redis."""
+        prefix = REVOKED_TOKEN_KEY.format(token_hash="")
+        keys: List[str] = []
+        async for key in redis_client.scan_iter(
+            match=f"{prefix}*", count=REVOKED_TOKEN_SCAN_COUNT
+        ):
+            keys.append(key)
+        for start in range(0, len(keys), REVOKED_TOKEN_SCAN_COUNT):
+            chunk = keys[start : start + REVOKED_TOKEN_SCAN_COUNT]
+            for key, exp in zip(chunk, await redis_client.mget(chunk)):
+                if exp is not None:
+                    self._add(key[len(prefix) :], float(exp))
+        self.resyncs += 1
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "revoked": len(self._revoked),
+            "heap": len(self._expiry),
+            "revocations": self.revocations,
+            "expired": self.expired,
+            "resyncs": self.resyncs,
+        }
+
+
+revocation_store = RevocationStore()
+auth_events.on(TOKEN_REVOKED_EVENT, revocation_store._on_revoked)
+auth_events.on_resync(revocation_store.resync)
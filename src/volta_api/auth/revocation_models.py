@@ -0,0 +1,15 @@
+from sqlalchemy import Column, Integer, String, DateTime
+from sqlalchemy.sql import func
+from volta_api.core.database import Base
+
+
+# Kept apart from auth.models so alembic can register this table without the
+# unmigrated Token model.
+class RevokedToken(Base):
+    __tablename__ = "revoked_tokens"
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    # sha256 hex of the JWT; raw tokens are never stored.
+    token_hash = Column(String(64), nullable=False, unique=True)
+    expires_at = Column(DateTime, nullable=False, index=True)  # naive UTC, token exp
+    revoked_at = Column(DateTime(timezone=True), server_default=func.now())
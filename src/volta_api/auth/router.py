@@ -10,8 +10,8 @@ from volta_api.auth.dependencies import (
     oauth2_scheme,
 )
 from volta_api.core.api_response import ApiResponse, success_response
+from volta_api.core.password_hasher import password_hasher
 from volta_api.core.security import (
-    verify_password,
     create_access_token,
     create_refresh_token,
     create_password_reset_token,
@@ -27,6 +27,7 @@ from volta_api.users.service import (
     get_user_by_email,
     get_user_by_public_id,
     update_user_password,
+    update_user_password_hash,
     verify_user_email,
 )
 
@@ -129,7 +130,12 @@ async def login(payload: LoginRequest):
     """
     user = await get_user_by_email(payload.email)
 
-    if not user or not verify_password(payload.password, user.hashed_password):
+    password_ok, new_hash = False, None
+    if user:
+        password_ok, new_hash = await password_hasher.verify_and_update(
+            payload.password, user.hashed_password
+        )
+    if not password_ok:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Invalid email or password",
@@ -142,6 +148,10 @@ async def login(payload: LoginRequest):
             detail="Account is disabled",
         )
 
+    if new_hash:
+        # Stored hash predates the current bcrypt cost; upgrade it transparently.
+        await update_user_password_hash(user.public_id, new_hash)
+
     access_token = create_access_token(subject=user.public_id)
     refresh_token = create_refresh_token(subject=user.public_id)
 
@@ -193,10 +203,10 @@ async def logout(
 ):
     """
     Logout the current user.
-    Note: In a stateless JWT system, the client should discard the tokens.
-    For enhanced security, implement token blacklisting with Redis.
+    The access token is revoked on every worker until it expires; the
+    client should still discard its tokens.
     """
-    revoke_access_token(token)
+    await revoke_access_token(token)
     del current_user  # Explicitly mark as intentionally unused
     return success_response(message="Successfully logged out")
 
@@ -323,7 +333,11 @@ async def change_password(
     Change password for the authenticated user.
     Requires the current password for verification.
     """
-    if not verify_password(payload.current_password, current_user.hashed_password):
+    # The cached current_user carries no password hash; read it fresh.
+    user = await get_user_by_public_id(current_user.public_id)
+    if not user or not await password_hasher.verify(
+        payload.current_password, user.hashed_password
+    ):
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Current password is incorrect",
@@ -0,0 +1,28 @@
+from datetime import datetime
+
+from sqlalchemy import delete, select
+from volta_api.core.database import database
+from .revocation_models import RevokedToken
+
+
+async def insert_revoked_token(token_hash: str, expires_at: datetime):
+    """Record a revoked token; revoking the same token twice is a no-op."""
+    query = (
+        RevokedToken.__table__.insert()
+        .prefix_with("IGNORE")
+        .values(token_hash=token_hash, expires_at=expires_at)
+    )
+    await database.execute(query)
+
+
+async def get_active_revoked_tokens(now: datetime):
+    """Revoked tokens that have not expired yet."""
+    query = select(RevokedToken.token_hash, RevokedToken.expires_at).where(
+        RevokedToken.expires_at > now
+    )
+    return await database.fetch_all(query)
+
+
+async def delete_expired_revoked_tokens(now: datetime):
+    query = delete(RevokedToken.__table__).where(RevokedToken.expires_at <= now)
+    await database.execute(query)
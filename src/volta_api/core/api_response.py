@@ -22,6 +22,15 @@ class PaginationMeta(BaseModel):
     total_pages: int
 
 
+class CursorMeta(BaseModel):
+    page_size: int
+    has_more: bool
+    next_cursor: Optional[str] = None
+    # Only with include_total; served from a short-lived count cache.
+    total: Optional[int] = None
+    total_is_approximate: Optional[bool] = None
+
+
 def _unix_ms_timestamp() -> int:
     return int(datetime.now(timezone.utc).timestamp() * 1000)
 
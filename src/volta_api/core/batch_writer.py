@@ -0,0 +1,124 @@
+# volta_api/core/batch_writer.py
+from __future__ import annotations
+
+import asyncio
+import time
+from collections import deque
+from typing import Any, Awaitable, Callable, Deque, Dict, List, Optional
+
+
+class BatchWriter:
+    """
+    Buffers rows in memory and flushes them in batches from a background task.
+
+    submit() never waits: once max_pending rows are buffered, new rows are
+    rejected and counted, so callers on a hot path are never held up by the
+    sink. A batch is flushed when max_batch rows are waiting or every
+    flush_interval seconds, whichever comes first. Failed flushes are retried
+    with backoff.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        flush: Callable[[List[Dict[str, Any]]], Awaitable[Any]],
+        *,
+        max_batch: int,
+        flush_interval: float,
+        max_pending: int,
+        max_backoff: float = 30.0,
+    ):
+        self.name = name
+        self._flush = flush
+        self.max_batch = max_batch
+        self.flush_interval = flush_interval
+        self.max_pending = max_pending
+        self.max_backoff = max_backoff
+
+        self._buffer: Deque[Dict[str, Any]] = deque()
+        self._batch_ready = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+
+        self.accepted = 0
+        self.rejected = 0
+        self.written = 0
+        self.batches = 0
+        self.failures = 0
+        self.last_flush_ms: Optional[float] = None
+
+    @property
+    def pending(self) -> int:
+        return len(self._buffer)
+
+    def submit(self, row: Dict[str, Any]) -> bool:
+        if len(self._buffer) >= self.max_pending:
+            self.rejected += 1
+            return False
+        self._buffer.append(row)
+        self.accepted += 1
+        if len(self._buffer) >= self.max_batch:
+            self._batch_ready.set()
+        return True
+
+    def start(self):
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        task, self._task = self._task, None
+        if task:
+            task.cancel()
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+        # Best effort: write whatever is still buffered.
+        while self._buffer:
+            if not await self._flush_once():
+                break
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "pending": self.pending,
+            "max_pending": self.max_pending,
+            "accepted": self.accepted,
+            "rejected": self.rejected,
+            "written": self.written,
+            "batches": self.batches,
+            "failures": self.failures,
+            "last_flush_ms": self.last_flush_ms,
+        }
+
+    async def _run(self):
+        backoff = self.flush_interval
+        while True:
+            try:
+                await asyncio.wait_for(self._batch_ready.wait(), self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._batch_ready.clear()
+
+            while self._buffer:
+                if not await self._flush_once():
+                    await asyncio.sleep(backoff)
+                    backoff = min(backoff * 2, self.max_backoff)
+                    break
+                backoff = self.flush_interval
+                if len(self._buffer) < self.max_batch:
+                    break
+
+    async def _flush_once(self) -> bool:
+        count = min(len(self._buffer), self.max_batch)
+        batch = [self._buffer.popleft() for _ in range(count)]
+        started = time.perf_counter()
+        try:
+            await self._flush(batch)
+        except Exception:
+            self.failures += 1
+            # Put the batch back at the front so ordering is preserved on retry.
+            self._buffer.extendleft(reversed(batch))
+            return False
+        self.last_flush_ms = round((time.perf_counter() - started) * 1000, 2)
+        self.written += count
+        self.batches += 1
+        return True
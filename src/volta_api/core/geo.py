@@ -0,0 +1,39 @@
+# volta_api/core/geo.py
+from __future__ import annotations
+
+import math
+
+EARTH_RADIUS_M = 6_371_008.8
+
+
+def haversine_m(lat1: float, lng1: float, lat2: float, lng2: float) -> float:
+    """Great-circle distance between two WGS84 points, in meters."""
+    phi1 = math.radians(lat1)
+    phi2 = math.radians(lat2)
+    d_phi = phi2 - phi1
+    d_lambda = math.radians(lng2 - lng1)
+    a = (
+        math.sin(d_phi / 2) ** 2
+        + math.cos(phi1) * math.cos(phi2) * math.sin(d_lambda / 2) ** 2
+    )
+    return 2 * EARTH_RADIUS_M * math.asin(min(1.0, math.sqrt(a)))
+
+
+class LocalProjection:
+    """
+    Equirectangular projection to meters around a reference latitude. Cheap
+    and accurate enough for geometry spanning a city.
+    """
+
+    M_PER_DEG_LAT = 110_540.0
+    M_PER_DEG_LNG = 111_320.0
+
+    def __init__(self, ref_lat: float):
+        self.kx = self.M_PER_DEG_LNG * math.cos(math.radians(ref_lat))
+        self.ky = self.M_PER_DEG_LAT
+
+    def to_xy(self, lng: float, lat: float) -> tuple[float, float]:
+        return lng * self.kx, lat * self.ky
+
+    def to_lnglat(self, x: float, y: float) -> tuple[float, float]:
+        return x / self.kx, y / self.ky
@@ -0,0 +1,81 @@
+# volta_api/core/pagination.py
+from __future__ import annotations
+
+import base64
+import binascii
+import time
+from typing import Any, Awaitable, Callable, Dict, Hashable, List, Sequence, Tuple
+
+import orjson
+from fastapi import HTTPException
+
+from volta_api.core.api_response import CursorMeta
+
+COUNT_CACHE_TTL_SECONDS = 60  # Approximate totals are re-counted after this
+COUNT_CACHE_MAX_ENTRIES = 1024
+
+# key -> (count, counted at)
+_counts: Dict[Hashable, Tuple[int, float]] = {}
+
+
+def encode_cursor(last_id: int) -> str:
+    raw = orjson.dumps({"id": int(last_id)})
+    return base64.urlsafe_b64encode(raw).rstrip(b"=").decode("ascii")
+
+
+def decode_cursor(cursor: str) -> int:
+    """
+    Id after which the next page starts. An empty cursor starts keyset
+    paging from the beginning.
+    """
+    if not cursor:
+        return 0
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        last_id = orjson.loads(base64.urlsafe_b64decode(padded))["id"]
+    except (binascii.Error, ValueError, TypeError, KeyError):
+        raise HTTPException(status_code=400, detail="Invalid cursor") from None
+    if not isinstance(last_id, int) or isinstance(last_id, bool) or last_id < 0:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    return last_id
+
+
+def keyset_page(
+    rows: Sequence[Any],
+    page_size: int,
+    total: int | None = None,
+    *,
+    id_of: Callable[[Any], int] = lambda row: row["id"],
+) -> Tuple[List[Any], CursorMeta]:
+    """
+    Split a page fetched with limit=page_size + 1 into the rows to return
+    and its CursorMeta; the extra row only signals that more exist.
+    """
+    has_more = len(rows) > page_size
+    items = list(rows[:page_size])
+    return items, CursorMeta(
+        page_size=page_size,
+        has_more=has_more,
+        next_cursor=encode_cursor(id_of(items[-1])) if has_more else None,
+        total=total,
+        total_is_approximate=True if total is not None else None,
+    )
+
+
+async def approximate_count(
+    key: Hashable, count: Callable[[], Awaitable[int]]
+) -> int:
+    """
+    Per-worker cached COUNT(*) for a listing and its filters, at most
+    COUNT_CACHE_TTL_SECONDS old.
+    """
+    now = time.monotonic()
+    cached = _counts.get(key)
+    if cached is not None and now - cached[1] < COUNT_CACHE_TTL_SECONDS:
+        return cached[0]
+
+    total = await count()
+    if len(_counts) >= COUNT_CACHE_MAX_ENTRIES:
+        _counts.clear()
+    _counts[key] = (total, now)
+    return total
@@ -0,0 +1,116 @@
+from __future__ import annotations
+
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional, Tuple, TypeVar
+
+from volta_api.core.security import pwd_context
+from volta_api.core.settings import settings
+
+T = TypeVar("T")
+
+
+class PasswordHasherBusy(Exception):
+    """Raised when more password operations are waiting than max_queue allows."""
+
+
+class PasswordHasher:
+    """
+    Runs bcrypt on a dedicated thread pool so hashing never blocks the event
+    loop. At most `workers` operations run at once; callers beyond that wait
+    their turn, and once `max_queue` are already waiting new calls fail fast
+    with PasswordHasherBusy instead of piling up behind a login burst.
+    """
+
+    def __init__(self, *, workers: int, max_queue: int):
+        self.workers = workers
+        self.max_queue = max_queue
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._slots: Optional[asyncio.Semaphore] = None
+        self._waiting = 0
+
+        self.completed = 0
+        self.rejected = 0
+        self.rehashed = 0
+        self.queue_ms_total = 0.0
+        self.queue_ms_max = 0.0
+        self.run_ms_total = 0.0
+
+    def _ensure_started(self):
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(
+                max_workers=self.workers, thread_name_prefix="password-hasher"
+            )
+        if self._slots is None:
+            self._slots = asyncio.Semaphore(self.workers)
+
+    def shutdown(self):
+        # The semaphore stays: calls still in flight release it when they end.
+        executor, self._executor = self._executor, None
+        if executor:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    async def _run(self, fn: Callable[..., T], *args: Any) -> T:
+        self._ensure_started()
+        if self._waiting >= self.max_queue:
+            self.rejected += 1
+            raise PasswordHasherBusy()
+
+        queued = time.perf_counter()
+        self._waiting += 1
+        try:
+            await self._slots.acquire()
+        finally:
+            self._waiting -= 1
+        try:
+            started = time.perf_counter()
+            loop = asyncio.get_running_loop()
+            result = await loop.run_in_executor(self._executor, fn, *args)
+        finally:
+            self._slots.release()
+
+        queue_ms = (started - queued) * 1000
+        self.completed += 1
+        self.queue_ms_total += queue_ms
+        self.queue_ms_max = max(self.queue_ms_max, queue_ms)
+        self.run_ms_total += (time.perf_counter() - started) * 1000
+        return result
+
+    async def hash(self, password: str) -> str:
+        return await self._run(pwd_context.hash, password)
+
+    async def verify(self, password: str, hashed: str) -> bool:
+        return await self._run(pwd_context.verify, password, hashed)
+
+    async def verify_and_update(
+        self, password: str, hashed: str
+    ) -> Tuple[bool, Optional[str]]:
+        """
+        Verify a password; when it matches but the stored hash uses outdated
+        parameters (scheme or bcrypt rounds), also return a fresh hash.
+        """
+        ok, new_hash = await self._run(pwd_context.verify_and_update, password, hashed)
+        if new_hash:
+            self.rehashed += 1
+        return ok, new_hash
+
+    def stats(self) -> Dict[str, Any]:
+        completed = self.completed or 1
+        return {
+            "workers": self.workers,
+            "max_queue": self.max_queue,
+            "waiting": self._waiting,
+            "completed": self.completed,
+            "rejected": self.rejected,
+            "rehashed": self.rehashed,
+            "queue_ms_avg": round(self.queue_ms_total / completed, 2),
+            "queue_ms_max": round(self.queue_ms_max, 2),
+            "run_ms_avg": round(self.run_ms_total / completed, 2),
+        }
+
+
+password_hasher = PasswordHasher(
+    workers=settings.PASSWORD_HASH_WORKERS,
+    max_queue=settings.PASSWORD_HASH_MAX_QUEUE,
+)
@@ -4,3 +4,6 @@ import redis.asyncio as redis
 REDIS_URL = "redis://localhost:6379/0"
 
 redis_client = redis.Redis.from_url(REDIS_URL, decode_responses=True)
+
+# For binary values (e.g. packed location history) that must not be utf-8 decoded.
+redis_bytes_client = redis.Redis.from_url(REDIS_URL, decode_responses=False)
@@ -1,11 +1,15 @@
+import hashlib
 import secrets
-from datetime import datetime, timedelta, timezone
-from typing import Optional
+import time
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from typing import Any, Dict, Optional, Tuple
 from enum import Enum
 
 from jose import jwt, JWTError
 from passlib.context import CryptContext
 
+from volta_api.auth.revocation import revocation_store
 from volta_api.core.settings import settings
 
 SECRET_KEY = settings.SECRET_KEY
@@ -14,6 +18,7 @@ ACCESS_TOKEN_EXPIRE_MINUTES = settings.ACCESS_TOKEN_EXPIRE_MINUTES
 REFRESH_TOKEN_EXPIRE_DAYS = settings.REFRESH_TOKEN_EXPIRE_DAYS
 PASSWORD_RESET_TOKEN_EXPIRE_MINUTES = settings.PASSWORD_RESET_TOKEN_EXPIRE_MINUTES
 EMAIL_VERIFICATION_TOKEN_EXPIRE_HOURS = settings.EMAIL_VERIFICATION_TOKEN_EXPIRE_HOURS
+ACCESS_TOKEN_CACHE_SIZE = settings.ACCESS_TOKEN_CACHE_SIZE
 
 
 class TokenType(str, Enum):
@@ -23,19 +28,21 @@ class TokenType(str, Enum):
     EMAIL_VERIFICATION = "email_verification"
 
 
+# Hashes with fewer rounds than configured are reported by needs_update(), so
+# raising BCRYPT_ROUNDS upgrades stored hashes as users log in.
 pwd_context = CryptContext(
     schemes=["bcrypt"],
     deprecated="auto",
+    bcrypt__rounds=settings.BCRYPT_ROUNDS,
+    bcrypt__min_rounds=settings.BCRYPT_ROUNDS,
 )
 
-_revoked_access_tokens: dict[str, float] = {}
-
 
 # ===== Password Hashing =====
 
 
 def hash_password(password: str) -> str:
-    """Hash a password using bcrypt."""
+    """Hash a password using bcrypt. Blocking; async code uses password_hasher."""
     return pwd_context.hash(password)
 
 
@@ -91,6 +98,75 @@ def create_email_verification_token(subject: str) -> str:
     return jwt.encode(payload, SECRET_KEY, algorithm=ALGORITHM)
 
 
+# ===== Verified Token Cache =====
+
+
+def token_hash(token: str) -> str:
+    """sha256 hex of a token; the only form in which tokens are cached or stored."""
+    return hashlib.sha256(token.encode()).hexdigest()
+
+
+class TokenClaimsCache:
+    """
+    Bounded LRU of decoded, signature-checked token claims keyed by the
+    token's sha256. Entries expire at the token's own `exp`, so a hit is
+    exactly as valid as re-running jwt.decode would be.
+    """
+
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, Tuple[Dict[str, Any], float]]" = (
+            OrderedDict()
+        )
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, digest: str) -> Optional[Dict[str, Any]]:
+        entry = self._entries.get(digest)
+        if entry is None:
+            self.misses += 1
+            return None
+        claims, exp = entry
+        if exp <= time.time():
+            del self._entries[digest]
+            self.misses += 1
+            return None
+        self._entries.move_to_end(digest)
+        self.hits += 1
+        return claims
+
+    def put(self, digest: str, claims: Dict[str, Any]):
+        exp = claims.get("exp")
+        if not isinstance(exp, (int, float)) or self.max_entries <= 0:
+            return
+        self._entries[digest] = (claims, float(exp))
+        self._entries.move_to_end(digest)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def discard(self, digest: str):
+        self._entries.pop(digest, None)
+
+    def clear(self):
+        self._entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._entries),
+            "max_entries": self.max_entries,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+        }
+
+
+access_token_cache = TokenClaimsCache(ACCESS_TOKEN_CACHE_SIZE)
+
+
 # ===== Token Verification =====
 
 
@@ -121,10 +197,23 @@ def verify_token(token: str, expected_type: TokenType) -> Optional[str]:
 
 
 def verify_access_token(token: str) -> Optional[str]:
-    """Verify an access token. Returns user_id if valid."""
-    if is_access_token_revoked(token):
+    """
+    Verify an access token. Returns user_id if valid.
+    Hot tokens are served from access_token_cache without re-checking the
+    signature; revocation is still checked on every call.
+    """
+    digest = token_hash(token)
+    if revocation_store.is_revoked(digest):
+        access_token_cache.discard(digest)
         return None
-    return verify_token(token, TokenType.ACCESS)
+
+    payload = access_token_cache.get(digest)
+    if payload is None:
+        payload = decode_token(token)
+        if not payload or payload.get("type") != TokenType.ACCESS.value:
+            return None
+        access_token_cache.put(digest, payload)
+    return payload.get("sub")
 
 
 def verify_refresh_token(token: str) -> Optional[str]:
@@ -150,7 +239,8 @@ def generate_random_token(length: int = 32) -> str:
     return secrets.token_urlsafe(length)
 
 
-def revoke_access_token(token: str) -> bool:
+async def revoke_access_token(token: str) -> bool:
+    """Revoke an access token on every worker until it expires."""
     payload = decode_token(token)
     if not payload or payload.get("type") != TokenType.ACCESS.value:
         return False
@@ -159,17 +249,11 @@ def revoke_access_token(token: str) -> bool:
     if exp is None:
         return False
 
-    _revoked_access_tokens[token] = float(exp)
+    digest = token_hash(token)
+    access_token_cache.discard(digest)
+    await revocation_store.revoke(digest, float(exp))
     return True
 
 
 def is_access_token_revoked(token: str) -> bool:
-    _cleanup_revoked_tokens()
-    return token in _revoked_access_tokens
-
-
-def _cleanup_revoked_tokens() -> None:
-    now_ts = datetime.now(timezone.utc).timestamp()
-    expired = [tok for tok, exp in _revoked_access_tokens.items() if exp <= now_ts]
-    for tok in expired:
-        _revoked_access_tokens.pop(tok, None)
+    return revocation_store.is_revoked(token_hash(token))
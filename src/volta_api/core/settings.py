@@ -12,11 +12,22 @@ class Settings(BaseSettings):
     REFRESH_TOKEN_EXPIRE_DAYS: int = 7
     PASSWORD_RESET_TOKEN_EXPIRE_MINUTES: int = 30
     EMAIL_VERIFICATION_TOKEN_EXPIRE_HOURS: int = 24
+    ACCESS_TOKEN_CACHE_SIZE: int = 10_000
+    USER_CACHE_TTL_SECONDS: float = 30.0
+    USER_CACHE_MAX_ENTRIES: int = 10_000
+    USER_CACHE_REDIS: bool = False
     MAIL_USERNAME: str
     MAIL_PASSWORD: str
     MAIL_FROM: str
     MAIL_SERVER: str
     MAIL_PORT: int = 587
+    BCRYPT_ROUNDS: int = 12
+    PASSWORD_HASH_WORKERS: int = 2
+    PASSWORD_HASH_MAX_QUEUE: int = 64
+    WS_FIX_MIN_INTERVAL_SECONDS: float = 1.0
+    WS_FIX_MIN_DISTANCE_M: float = 5.0
+    WS_FIX_MAX_SILENCE_SECONDS: float = 30.0
+    GRAPH_DATA_DIR: Path = BASE_DIR / "data"  # graph.json and nodes.csv
 
     class Config:
         env_file = str(BASE_DIR / ".env")
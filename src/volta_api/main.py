@@ -6,13 +6,21 @@ from starlette.exceptions import HTTPException as StarletteHTTPException
 
 from volta_api.core.api_response import error_response
 from volta_api.core.database import database
+from volta_api.core.settings import settings
+from volta_api.core.password_hasher import PasswordHasherBusy, password_hasher
 from volta_api.users.router import router as users_router
 from volta_api.auth.router import legacy_router as auth_legacy_router
 from volta_api.auth.router import router as auth_router
+from volta_api.auth.events import auth_events
+from volta_api.auth.revocation import revocation_store
 from volta_api.vehicles.router import router as vehicles_router
 from ws.ws import router as vehicles_ws_router
 from volta_api.nodes.router import router as nodes_router
 from volta_api.routes.router import router as routes_router
+from volta_api.vehicles.route_index import route_index_keeper
+from volta_api.nodes.graph import init_graph
+from volta_api.routes.stops import dwell_writer
+from volta_api.ws.sink import location_sink
 
 
 app = FastAPI()
@@ -91,6 +99,15 @@ async def validation_exception_handler(request, exc):  # noqa: ARG001
     )
 
 
+@app.exception_handler(PasswordHasherBusy)
+async def password_hasher_busy_handler(request, exc):  # noqa: ARG001
+    return JSONResponse(
+        status_code=503,
+        headers={"Retry-After": "1"},
+        content=error_response("Server is busy, please retry"),
+    )
+
+
 @app.exception_handler(Exception)
 async def unhandled_exception_handler(request, exc):  # noqa: ARG001
     return JSONResponse(
@@ -102,8 +119,19 @@ async def unhandled_exception_handler(request, exc):  # noqa: ARG001
 @app.on_event("startup")
 async def startup():
     await database.connect()
+    await revocation_store.load()
+    auth_events.start()
+    route_index_keeper.start()
+    init_graph(settings.GRAPH_DATA_DIR)
+    location_sink.start()
+    dwell_writer.start()
 
 
 @app.on_event("shutdown")
 async def shutdown():
+    await auth_events.stop()
+    await route_index_keeper.stop()
+    await location_sink.stop()
+    await dwell_writer.stop()
+    password_hasher.shutdown()
     await database.disconnect()
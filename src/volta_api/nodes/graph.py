@@ -0,0 +1,201 @@
+from __future__ import annotations
+
+import csv
+import heapq
+import json
+import math
+from array import array
+from dataclasses import dataclass
+from functools import lru_cache
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from volta_api.core.geo import LocalProjection
+
+# Checkout default; the app passes settings.GRAPH_DATA_DIR to init_graph.
+DATA_DIR = Path(__file__).resolve().parents[3] / "data"  # -> ~/volta_api/data
+GRAPH_FILE = "graph.json"
+NODES_FILE = "nodes.csv"
+PATH_CACHE_SIZE = 4096
+
+
+@dataclass(frozen=True)
+class PathResult:
+    distance_m: float
+    codes: Tuple[str, ...]
+    expanded: int
+
+
+class CSRGraph:
+    """
+    Directed weighted graph in compressed sparse row form: the out-edges of
+    node i are targets[offsets[i]:offsets[i + 1]] with matching weights.
+    Node codes are mapped to dense indexes once at load time.
+    """
+
+    def __init__(
+        self,
+        adjacency: Dict[str, Dict[str, float]],
+        coordinates: Dict[str, Tuple[float, float]],
+    ):
+        codes = sorted(
+            set(adjacency) | {target for edges in adjacency.values() for target in edges}
+        )
+        self.codes: List[str] = codes
+        self.index: Dict[str, int] = {code: i for i, code in enumerate(codes)}
+
+        self.offsets = array("I", [0])
+        self.targets = array("I")
+        self.weights = array("d")
+        for code in codes:
+            for target, weight in sorted(adjacency.get(code, {}).items()):
+                self.targets.append(self.index[target])
+                self.weights.append(float(weight))
+            self.offsets.append(len(self.targets))
+
+        nan = float("nan")
+        self.lats = array("d", (coordinates.get(code, (nan, nan))[0] for code in codes))
+        self.lngs = array("d", (coordinates.get(code, (nan, nan))[1] for code in codes))
+
+        # Planar coordinates for the heuristic: a hypot per estimate instead
+        # of a haversine.
+        known = [lat for lat in self.lats if not math.isnan(lat)]
+        projection = LocalProjection(sum(known) / len(known) if known else 0.0)
+        self.xs = array("d")
+        self.ys = array("d")
+        for lat, lng in zip(self.lats, self.lngs):
+            x, y = projection.to_xy(lng, lat)
+            self.xs.append(x)
+            self.ys.append(y)
+        self.heuristic_scale = self._heuristic_scale()
+
+    @property
+    def node_count(self) -> int:
+        return len(self.codes)
+
+    @property
+    def edge_count(self) -> int:
+        return len(self.targets)
+
+    def has_coordinates(self, node: int) -> bool:
+        return not math.isnan(self.lats[node])
+
+    def _straight_line(self, a: int, b: int) -> float:
+        return math.hypot(self.xs[a] - self.xs[b], self.ys[a] - self.ys[b])
+
+    def _heuristic_scale(self) -> float:
+        # Edge weights are rounded great-circle distances and the heuristic
+        # uses a planar approximation, so some edges come out slightly shorter
+        # than the straight line. Scaling by the worst ratio keeps it admissible.
+        scale = 1.0
+        for node in range(self.node_count):
+            if not self.has_coordinates(node):
+                continue
+            for edge in range(self.offsets[node], self.offsets[node + 1]):
+                target = self.targets[edge]
+                if not self.has_coordinates(target):
+                    continue
+                straight = self._straight_line(node, target)
+                if straight > 0:
+                    scale = min(scale, self.weights[edge] / straight)
+        return scale
+
+    def shortest_path(self, source: str, target: str) -> Optional[PathResult]:
+        """
+        A* with a straight-line heuristic; nodes without coordinates get a
+        zero estimate, which degrades to Dijkstra for them. Nodes may be
+        re-expanded, so the result stays optimal even where the heuristic
+        is not consistent.
+        """
+        start = self.index[source]
+        goal = self.index[target]
+        scale = self.heuristic_scale
+        if not self.has_coordinates(goal):
+            scale = 0.0
+        xs, ys = self.xs, self.ys
+        goal_x, goal_y = xs[goal], ys[goal]
+        hypot = math.hypot
+
+        def estimate(node: int) -> float:
+            if not scale:
+                return 0.0
+            h = hypot(xs[node] - goal_x, ys[node] - goal_y)
+            # NaN (no coordinates) compares false: fall back to zero.
+            return h * scale if h == h else 0.0
+
+        offsets, targets, weights = self.offsets, self.targets, self.weights
+        best = {start: 0.0}
+        parent: Dict[int, int] = {}
+        heap = [(estimate(start), 0.0, start)]
+        expanded = 0
+
+        while heap:
+            _, cost, node = heapq.heappop(heap)
+            if cost > best.get(node, math.inf):
+                continue
+            if node == goal:
+                path = [goal]
+                while path[-1] != start:
+                    path.append(parent[path[-1]])
+                return PathResult(
+                    distance_m=round(cost, 2),
+                    codes=tuple(self.codes[i] for i in reversed(path)),
+                    expanded=expanded,
+                )
+            expanded += 1
+            for edge in range(offsets[node], offsets[node + 1]):
+                neighbor = targets[edge]
+                candidate = cost + weights[edge]
+                if candidate < best.get(neighbor, math.inf):
+                    best[neighbor] = candidate
+                    parent[neighbor] = node
+                    heapq.heappush(
+                        heap, (candidate + estimate(neighbor), candidate, neighbor)
+                    )
+        return None
+
+
+def load_graph(data_dir: Path = DATA_DIR) -> CSRGraph:
+    with open(data_dir / GRAPH_FILE, encoding="utf-8") as fh:
+        adjacency = json.load(fh)
+
+    coordinates: Dict[str, Tuple[float, float]] = {}
+    nodes_path = data_dir / NODES_FILE
+    if nodes_path.exists():
+        with open(nodes_path, encoding="utf-8", newline="") as fh:
+            for row in csv.DictReader(fh):
+                try:
+                    coordinates[row["code"]] = (float(row["lat"]), float(row["lng"]))
+                except (KeyError, TypeError, ValueError):
+                    continue
+    return CSRGraph(adjacency, coordinates)
+
+
+_graph: Optional[CSRGraph] = None
+
+
+def init_graph(data_dir: Path = DATA_DIR):
+    global _graph
+    _graph = load_graph(data_dir)
+    cached_shortest_path.cache_clear()
+
+
+def get_graph() -> CSRGraph:
+    if _graph is None:
+        init_graph()
+    return _graph
+
+
+@lru_cache(maxsize=PATH_CACHE_SIZE)
+def cached_shortest_path(source: str, target: str) -> Optional[PathResult]:
+    return get_graph().shortest_path(source, target)
+
+
+def path_cache_stats() -> Dict[str, int]:
+    info = cached_shortest_path.cache_info()
+    return {
+        "hits": info.hits,
+        "misses": info.misses,
+        "size": info.currsize,
+        "max_size": info.maxsize,
+    }
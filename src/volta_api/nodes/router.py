@@ -1,10 +1,13 @@
 import math
+from functools import partial
 from typing import Optional
 
 from fastapi import APIRouter, Depends, HTTPException, Query
 
 from volta_api.auth.dependencies import get_current_active_user
 from volta_api.core.api_response import ApiResponse, PaginationMeta, success_response
+from volta_api.core.pagination import approximate_count, decode_cursor, keyset_page
+from .graph import cached_shortest_path, get_graph, path_cache_stats
 from .schemas import (
     NodeCreate,
     NodeBulkDeleteRequest,
@@ -42,11 +45,33 @@ async def list_nodes(
     page_size: int = Query(20, ge=1, le=100, description="Items per page"),
     status: Optional[NodeStatus] = Query(None, description="Filter by status"),
     node_type: Optional[NodeType] = Query(None, description="Filter by node type"),
+    cursor: Optional[str] = Query(
+        None, description="Keyset cursor from meta.next_cursor; send empty to start"
+    ),
+    include_total: bool = Query(
+        False, description="With cursor: include an approximate total"
+    ),
 ):
     skip = (page - 1) * page_size
     status_value = status.value if status else None
     node_type_value = node_type.value if node_type else None
 
+    if cursor is not None:
+        rows = await get_nodes(
+            limit=page_size + 1,
+            status=status_value,
+            node_type=node_type_value,
+            after_id=decode_cursor(cursor),
+        )
+        total = None
+        if include_total:
+            total = await approximate_count(
+                ("nodes", status_value, node_type_value),
+                partial(get_nodes_count, status=status_value, node_type=node_type_value),
+            )
+        nodes, meta = keyset_page(rows, page_size, total)
+        return success_response(data=nodes, meta=meta)
+
     nodes = await get_nodes(
         skip=skip,
         limit=page_size,
@@ -89,6 +114,46 @@ async def search_nodes_endpoint(
     return success_response(data=nodes, meta=meta)
 
 
+@router.get("/path", response_model=ApiResponse, response_model_exclude_none=True)
+async def shortest_path_endpoint(
+    source: str = Query(..., alias="from", min_length=1, description="Start node code"),
+    target: str = Query(..., alias="to", min_length=1, description="End node code"),
+):
+    graph = get_graph()
+    missing = [code for code in (source, target) if code not in graph.index]
+    if missing:
+        raise HTTPException(
+            status_code=404,
+            detail={"message": "Nodes not found in graph", "missing": missing},
+        )
+
+    result = cached_shortest_path(source, target)
+    if result is None:
+        raise HTTPException(status_code=404, detail="No path between nodes")
+
+    nodes = []
+    for code in result.codes:
+        index = graph.index[code]
+        has_coordinates = graph.has_coordinates(index)
+        nodes.append(
+            {
+                "code": code,
+                "lat": graph.lats[index] if has_coordinates else None,
+                "lng": graph.lngs[index] if has_coordinates else None,
+            }
+        )
+    return success_response(
+        data={
+            "from": source,
+            "to": target,
+            "distance_m": result.distance_m,
+            "hops": len(result.codes) - 1,
+            "nodes": nodes,
+        },
+        meta={"expanded": result.expanded, "cache": path_cache_stats()},
+    )
+
+
 @router.get("/{node_id}", response_model=ApiResponse, response_model_exclude_none=True)
 async def read_node(node_id: int):
     node = await get_node_by_id(node_id)
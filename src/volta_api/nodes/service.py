@@ -17,6 +17,7 @@ async def get_nodes(
     limit: int = 100,
     status: Optional[str] = None,
     node_type: Optional[str] = None,
+    after_id: Optional[int] = None,
 ):
     query = Node.__table__.select()
 
@@ -25,11 +26,16 @@ async def get_nodes(
         filters.append(Node.status == status)
     if node_type:
         filters.append(Node.type == node_type)
+    if after_id is not None:
+        # Keyset paging: skip is ignored.
+        filters.append(Node.id > after_id)
 
     if filters:
         query = query.where(and_(*filters))
 
-    query = query.offset(skip).limit(limit)
+    query = query.order_by(Node.id).limit(limit)
+    if after_id is None:
+        query = query.offset(skip)
     return await database.fetch_all(query)
 
 
@@ -0,0 +1,315 @@
+from __future__ import annotations
+
+import bisect
+import time
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Tuple
+
+from volta_api.ws.history import parse_timestamp
+from volta_api.ws.store import clear_vehicle_etas, get_route_etas, save_vehicle_etas
+from .matching import RouteMatcher, get_route_matcher
+from .service import get_route_stops
+
+ETA_DEFAULT_SPEED_MPS = 5.5  # ~20 km/h, used until a segment has observations
+ETA_MIN_SPEED_MPS = 1.0  # Floor so a stalled bus does not push ETAs to infinity
+ETA_MAX_SPEED_MPS = 25.0
+ETA_SPEED_ALPHA = 0.2  # EWMA weight of a new speed sample
+ETA_SAMPLE_MAX_GAP_SECONDS = 120  # Consecutive fixes further apart are not sampled
+ETA_STOP_SNAP_M = 200  # Stops further than this from the geometry are ignored
+ETA_TABLE_REFRESH_SECONDS = 300  # Stop tables are reloaded from MySQL this often
+
+
+@dataclass(frozen=True)
+class RouteStop:
+    route_node_id: int
+    node_id: int
+    seq_no: int
+    name: str
+    lat: float
+    lng: float
+    distance_along_m: float
+    distance_km_from_start: Optional[float]
+    travel_minutes_from_start: Optional[int]
+
+
+def _clamp_speed(speed: float) -> float:
+    return max(ETA_MIN_SPEED_MPS, min(speed, ETA_MAX_SPEED_MPS))
+
+
+def _prior_speed(a: RouteStop, b: RouteStop) -> float:
+    """Speed implied by the planned distance/minutes columns, if both are set."""
+    if (
+        a.distance_km_from_start is None
+        or b.distance_km_from_start is None
+        or a.travel_minutes_from_start is None
+        or b.travel_minutes_from_start is None
+    ):
+        return ETA_DEFAULT_SPEED_MPS
+    minutes = b.travel_minutes_from_start - a.travel_minutes_from_start
+    meters = (b.distance_km_from_start - a.distance_km_from_start) * 1000
+    if minutes <= 0 or meters <= 0:
+        return ETA_DEFAULT_SPEED_MPS
+    return _clamp_speed(meters / (minutes * 60))
+
+
+class RouteEtaTable:
+    """
+    Stops of one route ordered by distance along its geometry, with one
+    EWMA speed per stop-to-stop segment and the cumulative travel time to
+    every stop. A fix updates the speed of the segment it was sampled on and
+    the cumulative times from there on; ETAs for a vehicle are then a
+    bisect plus one subtraction per downstream stop.
+    """
+
+    def __init__(
+        self,
+        route_id: int,
+        matcher: RouteMatcher,
+        stops: List[RouteStop],
+        speeds: Optional[List[float]] = None,
+    ):
+        self.route_id = route_id
+        self.matcher = matcher
+        self.stops = stops
+        self.positions = [stop.distance_along_m for stop in stops]
+        self.speeds = speeds or [
+            _prior_speed(a, b) for a, b in zip(stops, stops[1:])
+        ]
+        self.samples = 0
+        # vehicle_id -> (distance along route, fix timestamp)
+        self.vehicles: Dict[int, Tuple[float, int]] = {}
+
+        self._cumulative = [0.0] * len(stops)
+        self._recompute(0)
+
+    def _recompute(self, segment: int):
+        for i in range(segment, len(self.speeds)):
+            length = self.positions[i + 1] - self.positions[i]
+            self._cumulative[i + 1] = self._cumulative[i] + length / self.speeds[i]
+
+    def segment_at(self, progress_m: float) -> int:
+        index = bisect.bisect_right(self.positions, progress_m) - 1
+        return max(0, min(index, len(self.speeds) - 1))
+
+    def learn(self, vehicle_id: int, progress_m: float, ts: int):
+        previous = self.vehicles.get(vehicle_id)
+        self.vehicles[vehicle_id] = (progress_m, ts)
+        if previous is None or not self.speeds:
+            return
+
+        last_progress, last_ts = previous
+        elapsed = ts - last_ts
+        moved = progress_m - last_progress
+        # Standing still, jitter backwards or a new trip: nothing to learn.
+        if moved <= 0 or not 0 < elapsed <= ETA_SAMPLE_MAX_GAP_SECONDS:
+            return
+
+        segment = self.segment_at((progress_m + last_progress) / 2)
+        sample = _clamp_speed(moved / elapsed)
+        self.speeds[segment] += ETA_SPEED_ALPHA * (sample - self.speeds[segment])
+        self.samples += 1
+        self._recompute(segment)
+
+    def etas_from(self, progress_m: float) -> List[Tuple[RouteStop, float]]:
+        """Seconds from progress_m to every stop still ahead of it."""
+        if not self.speeds:
+            return []
+        first = bisect.bisect_right(self.positions, progress_m)
+        if first >= len(self.stops):
+            return []
+
+        segment = self.segment_at(progress_m)
+        if progress_m < self.positions[0]:
+            to_next = (self.positions[0] - progress_m) / self.speeds[0]
+        else:
+            to_next = (self.positions[first] - progress_m) / self.speeds[segment]
+        base = to_next - self._cumulative[first]
+        return [
+            (self.stops[i], base + self._cumulative[i])
+            for i in range(first, len(self.stops))
+        ]
+
+
+def _build_stops(rows: List[Any], matcher: RouteMatcher) -> List[RouteStop]:
+    stops = []
+    for row in rows:
+        lat, lng = float(row["latitude"]), float(row["longitude"])
+        match = matcher.match(lat, lng, ETA_STOP_SNAP_M)
+        if match is None:
+            continue
+        km = row["distance_km_from_start"]
+        stops.append(
+            RouteStop(
+                route_node_id=row["route_node_id"],
+                node_id=row["node_id"],
+                seq_no=row["seq_no"],
+                name=row["name"],
+                lat=lat,
+                lng=lng,
+                distance_along_m=match.distance_along_m,
+                distance_km_from_start=float(km) if km is not None else None,
+                travel_minutes_from_start=row["travel_minutes_from_start"],
+            )
+        )
+    stops.sort(key=lambda stop: (stop.distance_along_m, stop.seq_no))
+    return stops
+
+
+class EtaEngine:
+    """Per-worker ETA tables, fed by every published fix."""
+
+    def __init__(self):
+        self._tables: Dict[int, Optional[RouteEtaTable]] = {}
+        self._checked: Dict[int, float] = {}
+
+        self.observed = 0
+        self.published = 0
+        self.failures = 0
+
+    async def get_table(self, route_id: int) -> Optional[RouteEtaTable]:
+        table = self._tables.get(route_id)
+        matcher = await get_route_matcher(route_id)
+        if matcher is None:
+            self._tables.pop(route_id, None)
+            return None
+        fresh = (
+            time.monotonic() - self._checked.get(route_id, 0)
+            < ETA_TABLE_REFRESH_SECONDS
+        )
+        if route_id in self._tables and fresh and (
+            table is None or table.matcher is matcher
+        ):
+            return table
+
+        stops = _build_stops(await get_route_stops(route_id), matcher)
+        self._checked[route_id] = time.monotonic()
+        if table is not None and table.matcher is matcher and table.stops == stops:
+            # Nothing changed; keeping the same object keeps callers' state valid.
+            return table
+
+        rebuilt = None
+        if len(stops) >= 2:
+            speeds = None
+            if table is not None and [s.route_node_id for s in table.stops] == [
+                s.route_node_id for s in stops
+            ]:
+                # Same stops in the same order: keep what has been learned.
+                speeds = table.speeds
+            rebuilt = RouteEtaTable(route_id, matcher, stops, speeds)
+            if table is not None:
+                rebuilt.vehicles = table.vehicles
+        self._tables[route_id] = rebuilt
+        return rebuilt
+
+    async def observe(self, event: Dict[str, Any], *, publish: bool = True):
+        """
+        Learn from a fix and, when publish is set, push the vehicle's ETAs to
+        every downstream stop as route.eta.update. Failures are counted and
+        never propagate into the ingest path.
+        """
+        data = event["data"]
+        route_id = data.get("route_id")
+        progress = data.get("distance_along_route_m")
+        if route_id is None or progress is None:
+            return
+        try:
+            await self._observe(int(route_id), data, progress, publish)
+        except Exception:
+            self.failures += 1
+
+    async def _observe(
+        self, route_id: int, data: Dict[str, Any], progress: float, publish: bool
+    ):
+        table = await self.get_table(route_id)
+        if table is None:
+            return
+
+        vehicle_id = int(data["vehicle_id"])
+        ts = parse_timestamp(data.get("recorded_at")) or parse_timestamp(
+            data.get("received_at")
+        )
+        table.learn(vehicle_id, progress, ts or int(time.time()))
+        self.observed += 1
+        if not publish:
+            return
+
+        etas = table.etas_from(progress)
+        if not etas:
+            table.vehicles.pop(vehicle_id, None)
+            await clear_vehicle_etas(route_id, vehicle_id)
+            return
+
+        now = int(time.time())
+        await save_vehicle_etas(
+            route_id,
+            vehicle_id,
+            {
+                "type": "route.eta.update",
+                "data": {
+                    "vehicle_id": vehicle_id,
+                    "route_id": route_id,
+                    "progress_m": progress,
+                    "updated_at": now,
+                    "etas": [
+                        {
+                            "route_node_id": stop.route_node_id,
+                            "node_id": stop.node_id,
+                            "seq_no": stop.seq_no,
+                            "eta_s": round(seconds),
+                            "eta_at": now + round(seconds),
+                        }
+                        for stop, seconds in etas
+                    ],
+                },
+            },
+        )
+        self.published += 1
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "routes": sum(1 for table in self._tables.values() if table),
+            "observed": self.observed,
+            "published": self.published,
+            "failures": self.failures,
+        }
+
+
+eta_engine = EtaEngine()
+
+
+async def get_route_eta_board(route_id: int) -> Dict[str, Any]:
+    """Upcoming arrivals per stop, merged from every worker's ETA rows."""
+    table = await eta_engine.get_table(route_id)
+    rows = await get_route_etas(route_id)
+    now = time.time()
+
+    arrivals: Dict[int, List[Dict[str, Any]]] = {}
+    for row in rows:
+        for eta in row.get("etas", []):
+            if eta["eta_at"] < now:
+                continue
+            arrivals.setdefault(eta["route_node_id"], []).append(
+                {
+                    "vehicle_id": row["vehicle_id"],
+                    "eta_s": round(eta["eta_at"] - now),
+                    "eta_at": eta["eta_at"],
+                    "updated_at": row["updated_at"],
+                }
+            )
+
+    stops = []
+    for stop in table.stops if table else []:
+        upcoming = sorted(
+            arrivals.get(stop.route_node_id, []), key=lambda item: item["eta_at"]
+        )
+        stops.append(
+            {
+                "route_node_id": stop.route_node_id,
+                "node_id": stop.node_id,
+                "seq_no": stop.seq_no,
+                "name": stop.name,
+                "distance_along_m": stop.distance_along_m,
+                "arrivals": upcoming,
+            }
+        )
+    return {"route_id": route_id, "vehicles": len(rows), "stops": stops}
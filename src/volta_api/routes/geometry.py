@@ -0,0 +1,245 @@
+from __future__ import annotations
+
+import math
+import re
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from sqlalchemy import select
+
+from volta_api.core.database import database
+from volta_api.core.geo import LocalProjection
+from .models import Route
+
+GEOMETRY_FORMATS = ("geojson", "polyline", "wkt")
+SIMPLIFY_ZOOMS = range(8, 19)  # Zoom levels simplified (lazily) and memoized per route
+SIMPLIFY_PIXEL_TOLERANCE = 0.5  # Deviation allowed at a zoom, in screen pixels
+_SIMPLIFIED_MAX = 16  # Ad-hoc tolerances memoized per route
+
+Coordinate = Tuple[float, float]  # (lng, lat), WKT/GeoJSON axis order
+Line = Tuple[Coordinate, ...]
+
+_LINE_RE = re.compile(r"\(([^()]*)\)")
+
+
+def parse_multilinestring(wkt: str) -> Tuple[Line, ...]:
+    """Parse a WKT MULTILINESTRING (as accepted by routes.schemas) into lines."""
+    lines = []
+    for body in _LINE_RE.findall(wkt):
+        line = []
+        for pair in body.split(","):
+            lng, lat = pair.split()
+            line.append((float(lng), float(lat)))
+        if line:
+            lines.append(tuple(line))
+    return tuple(lines)
+
+
+def encode_polyline(line: Sequence[Coordinate], precision: int = 5) -> str:
+    """Encode one line with the Google encoded polyline algorithm (lat, lng)."""
+    factor = 10**precision
+    chunks: List[str] = []
+    prev_lat = prev_lng = 0
+    for lng, lat in line:
+        lat_i = int(round(lat * factor))
+        lng_i = int(round(lng * factor))
+        for delta in (lat_i - prev_lat, lng_i - prev_lng):
+            value = ~(delta << 1) if delta < 0 else delta << 1
+            while value >= 0x20:
+                chunks.append(chr((0x20 | (value & 0x1F)) + 63))
+                value >>= 5
+            chunks.append(chr(value + 63))
+        prev_lat, prev_lng = lat_i, lng_i
+    return "".join(chunks)
+
+
+def format_multilinestring(lines: Sequence[Line]) -> str:
+    return "MULTILINESTRING(%s)" % ", ".join(
+        "(%s)" % ", ".join(f"{lng} {lat}" for lng, lat in line) for line in lines
+    )
+
+
+def zoom_tolerance_m(zoom: int, lat: float) -> float:
+    """Ground distance covered by SIMPLIFY_PIXEL_TOLERANCE web-mercator pixels."""
+    meters_per_pixel = 156_543.03392 * math.cos(math.radians(lat)) / 2**zoom
+    return meters_per_pixel * SIMPLIFY_PIXEL_TOLERANCE
+
+
+def simplify_line(line: Line, tolerance_m: float) -> Line:
+    """
+    Douglas-Peucker on a local equirectangular projection, which is accurate
+    enough at city scale. Endpoints are always kept.
+    """
+    if tolerance_m <= 0 or len(line) < 3:
+        return line
+
+    projection = LocalProjection(line[0][1])
+    points = [projection.to_xy(lng, lat) for lng, lat in line]
+    keep = [False] * len(points)
+    keep[0] = keep[-1] = True
+    tolerance_sq = tolerance_m * tolerance_m
+
+    stack = [(0, len(points) - 1)]
+    while stack:
+        first, last = stack.pop()
+        ax, ay = points[first]
+        bx, by = points[last]
+        dx, dy = bx - ax, by - ay
+        seg_sq = dx * dx + dy * dy
+
+        max_sq, index = 0.0, -1
+        for i in range(first + 1, last):
+            px, py = points[i]
+            if seg_sq == 0:
+                dist_sq = (px - ax) ** 2 + (py - ay) ** 2
+            else:
+                t = max(0.0, min(1.0, ((px - ax) * dx + (py - ay) * dy) / seg_sq))
+                dist_sq = (px - ax - t * dx) ** 2 + (py - ay - t * dy) ** 2
+            if dist_sq > max_sq:
+                max_sq, index = dist_sq, i
+
+        if index != -1 and max_sq > tolerance_sq:
+            keep[index] = True
+            stack.append((first, index))
+            stack.append((index, last))
+
+    return tuple(point for point, kept in zip(line, keep) if kept)
+
+
+def simplify_lines(lines: Sequence[Line], tolerance_m: float) -> Tuple[Line, ...]:
+    return tuple(simplify_line(line, tolerance_m) for line in lines)
+
+
+def render_lines(lines: Sequence[Line], fmt: str = "geojson") -> Any:
+    if fmt == "wkt":
+        return format_multilinestring(lines)
+    if fmt == "polyline":
+        return [encode_polyline(line) for line in lines]
+    return {
+        "type": "MultiLineString",
+        "coordinates": [[list(point) for point in line] for line in lines],
+    }
+
+
+@dataclass
+class RouteGeometry:
+    """
+    Parsed geometry of one route. The lines are fixed once loaded; the
+    per-zoom and ad-hoc simplifications are memoized on the instance as they
+    are requested, so it is mutable and lives in the module cache.
+    """
+
+    route_id: int
+    updated_at: Optional[datetime]
+    wkt: str
+    lines: Tuple[Line, ...]
+    levels: Dict[int, Tuple[Line, ...]] = field(default_factory=dict, compare=False)
+    _simplified: Dict[float, Tuple[Line, ...]] = field(
+        default_factory=dict, compare=False, repr=False
+    )
+
+    @property
+    def vertex_count(self) -> int:
+        return sum(len(line) for line in self.lines)
+
+    @property
+    def reference_lat(self) -> float:
+        return self.lines[0][0][1] if self.lines else 0.0
+
+    def render(self, fmt: str = "geojson") -> Any:
+        if fmt == "wkt":
+            return self.wkt
+        return render_lines(self.lines, fmt)
+
+    def at_zoom(self, zoom: int) -> Tuple[Line, ...]:
+        if zoom > SIMPLIFY_ZOOMS[-1]:
+            return self.lines
+        zoom = max(zoom, SIMPLIFY_ZOOMS[0])
+        lines = self.levels.get(zoom)
+        if lines is None:
+            tolerance_m = zoom_tolerance_m(zoom, self.reference_lat)
+            lines = self.levels[zoom] = simplify_lines(self.lines, tolerance_m)
+        return lines
+
+    def simplified(self, tolerance_m: float) -> Tuple[Line, ...]:
+        if tolerance_m <= 0:
+            return self.lines
+        key = round(tolerance_m, 1)
+        lines = self._simplified.get(key)
+        if lines is None:
+            if len(self._simplified) >= _SIMPLIFIED_MAX:
+                self._simplified.clear()
+            lines = self._simplified[key] = simplify_lines(self.lines, key)
+        return lines
+
+
+_cache: Dict[int, RouteGeometry] = {}
+
+
+def _cached(route_id: int, updated_at: Optional[datetime]) -> Optional[RouteGeometry]:
+    geometry = _cache.get(route_id)
+    if geometry is not None and geometry.updated_at == updated_at:
+        return geometry
+    return None
+
+
+def _remember(
+    route_id: int, updated_at: Optional[datetime], wkt: Optional[str]
+) -> RouteGeometry:
+    # Routes without geometry are cached too, so they are not re-queried.
+    lines = parse_multilinestring(wkt or "")
+    geometry = RouteGeometry(route_id, updated_at, wkt or "", lines)
+    _cache[route_id] = geometry
+    return geometry
+
+
+def invalidate_route_geometry(route_id: int):
+    _cache.pop(route_id, None)
+
+
+async def get_route_geometries(
+    routes: Sequence[Any],
+) -> Dict[int, Optional[RouteGeometry]]:
+    """
+    Geometry for route rows carrying id and updated_at. Cached entries whose
+    updated_at still matches are reused; the rest are loaded in one query and
+    parsed once.
+    """
+    found: Dict[int, RouteGeometry] = {}
+    stale: List[int] = []
+    for route in routes:
+        geometry = _cached(route["id"], route["updated_at"])
+        if geometry is None:
+            stale.append(route["id"])
+        else:
+            found[route["id"]] = geometry
+
+    if stale:
+        query = select(Route.id, Route.geometry, Route.updated_at).where(
+            Route.id.in_(stale)
+        )
+        for row in await database.fetch_all(query):
+            found[row["id"]] = _remember(row["id"], row["updated_at"], row["geometry"])
+
+    result: Dict[int, Optional[RouteGeometry]] = {}
+    for route in routes:
+        geometry = found.get(route["id"])
+        result[route["id"]] = geometry if geometry and geometry.lines else None
+    return result
+
+
+async def get_route_geometry(route: Any) -> Optional[RouteGeometry]:
+    return (await get_route_geometries([route]))[route["id"]]
+
+
+async def with_geometry(routes: Sequence[Any], fmt: str) -> List[Dict[str, Any]]:
+    """Route rows as dicts with geometry rendered in the requested format."""
+    geometries = await get_route_geometries(routes)
+    items = []
+    for route in routes:
+        geometry = geometries.get(route["id"])
+        items.append(
+            {**dict(route), "geometry": geometry.render(fmt) if geometry else None}
+        )
+    return items
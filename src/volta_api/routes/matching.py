@@ -0,0 +1,165 @@
+from __future__ import annotations
+
+import math
+import time
+from collections import defaultdict
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Tuple
+
+from volta_api.core.geo import LocalProjection
+from .geometry import RouteGeometry, get_route_geometry
+from .service import get_route_by_id
+
+MATCH_CELL_M = 100.0  # Grid cell edge of the per-route segment index
+MATCH_MAX_DISTANCE_M = 60.0  # Fixes further than this from the route stay unsnapped
+MATCHER_REVALIDATE_SECONDS = 60  # How often a cached matcher re-checks updated_at
+
+
+@dataclass(frozen=True)
+class RouteMatch:
+    lat: float
+    lng: float
+    distance_along_m: float
+    offset_m: float
+    segment: int
+
+
+class RouteMatcher:
+    """
+    Snaps points to the nearest segment of a route.
+
+    Segments are bucketed into a uniform grid once, so a lookup only
+    inspects the few segments whose cells lie within max_distance_m of the
+    point instead of scanning every vertex.
+    """
+
+    def __init__(
+        self,
+        geometry: RouteGeometry,
+        *,
+        cell_m: float = MATCH_CELL_M,
+        max_distance_m: float = MATCH_MAX_DISTANCE_M,
+    ):
+        self.geometry = geometry
+        self.cell_m = cell_m
+        self.max_distance_m = max_distance_m
+        self.projection = LocalProjection(geometry.reference_lat)
+
+        # Per segment: ax, ay, dx, dy, squared length, distance along route at a.
+        self._segments: List[Tuple[float, float, float, float, float, float]] = []
+        self._grid: Dict[Tuple[int, int], List[int]] = defaultdict(list)
+
+        along = 0.0
+        for line in geometry.lines:
+            points = [self.projection.to_xy(lng, lat) for lng, lat in line]
+            for (ax, ay), (bx, by) in zip(points, points[1:]):
+                dx, dy = bx - ax, by - ay
+                length_sq = dx * dx + dy * dy
+                index = len(self._segments)
+                self._segments.append((ax, ay, dx, dy, length_sq, along))
+                along += math.sqrt(length_sq)
+                for cell in self._cells(
+                    min(ax, bx), min(ay, by), max(ax, bx), max(ay, by)
+                ):
+                    self._grid[cell].append(index)
+        self.length_m = along
+
+    @property
+    def segment_count(self) -> int:
+        return len(self._segments)
+
+    def _cells(self, min_x: float, min_y: float, max_x: float, max_y: float):
+        size = self.cell_m
+        for cx in range(math.floor(min_x / size), math.floor(max_x / size) + 1):
+            for cy in range(math.floor(min_y / size), math.floor(max_y / size) + 1):
+                yield cx, cy
+
+    def match(
+        self, lat: float, lng: float, max_distance_m: Optional[float] = None
+    ) -> Optional[RouteMatch]:
+        px, py = self.projection.to_xy(lng, lat)
+        reach = max_distance_m or self.max_distance_m
+
+        candidates = set()
+        for cell in self._cells(px - reach, py - reach, px + reach, py + reach):
+            candidates.update(self._grid.get(cell, ()))
+
+        best: Optional[Tuple[float, int, float]] = None
+        for index in candidates:
+            ax, ay, dx, dy, length_sq, _ = self._segments[index]
+            t = 0.0
+            if length_sq > 0:
+                t = max(0.0, min(1.0, ((px - ax) * dx + (py - ay) * dy) / length_sq))
+            dist_sq = (px - ax - t * dx) ** 2 + (py - ay - t * dy) ** 2
+            if best is None or dist_sq < best[0]:
+                best = (dist_sq, index, t)
+
+        if best is None or best[0] > reach * reach:
+            return None
+
+        dist_sq, index, t = best
+        ax, ay, dx, dy, length_sq, along = self._segments[index]
+        snapped_lng, snapped_lat = self.projection.to_lnglat(ax + t * dx, ay + t * dy)
+        return RouteMatch(
+            lat=round(snapped_lat, 7),
+            lng=round(snapped_lng, 7),
+            distance_along_m=round(along + t * math.sqrt(length_sq), 1),
+            offset_m=round(math.sqrt(dist_sq), 1),
+            segment=index,
+        )
+
+
+# route_id -> (matcher or None when the route has no geometry, last checked)
+_matchers: Dict[int, Tuple[Optional[RouteMatcher], float]] = {}
+
+
+def invalidate_route_matcher(route_id: int):
+    _matchers.pop(route_id, None)
+
+
+async def get_route_matcher(route_id: int) -> Optional[RouteMatcher]:
+    """
+    Matcher for a route, rebuilt only when its cached geometry changed.
+    Geometry freshness is re-checked against MySQL at most every
+    MATCHER_REVALIDATE_SECONDS.
+    """
+    now = time.monotonic()
+    cached = _matchers.get(route_id)
+    if cached is not None and now - cached[1] < MATCHER_REVALIDATE_SECONDS:
+        return cached[0]
+
+    route = await get_route_by_id(route_id)
+    geometry = await get_route_geometry(route) if route else None
+    matcher = None
+    if geometry is not None:
+        previous = cached[0] if cached else None
+        if previous is not None and previous.geometry is geometry:
+            matcher = previous
+        else:
+            matcher = RouteMatcher(geometry)
+    _matchers[route_id] = (matcher, now)
+    return matcher
+
+
+async def match_location_event(event: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Add snapped_lat, snapped_lng and distance_along_route_m to a
+    vehicle.location.update event. They stay None when the vehicle has no
+    route, the route has no geometry or the fix is too far from it.
+    """
+    data = event["data"]
+    data["snapped_lat"] = data["snapped_lng"] = data["distance_along_route_m"] = None
+
+    route_id = data.get("route_id")
+    if route_id is None:
+        return event
+    matcher = await get_route_matcher(int(route_id))
+    if matcher is None:
+        return event
+
+    match = matcher.match(data["lat"], data["lng"])
+    if match is not None:
+        data["snapped_lat"] = match.lat
+        data["snapped_lng"] = match.lng
+        data["distance_along_route_m"] = match.distance_along_m
+    return event
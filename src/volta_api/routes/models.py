@@ -55,3 +55,22 @@ class RouteNode(Base):
     distance_km_from_start = Column(Numeric(10, 3), nullable=True)
     travel_minutes_from_start = Column(Integer, nullable=True)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
+
+
+class StopDwell(Base):
+    # Written in batches from the live stop detector; like vehicle_locations
+    # it carries no foreign keys so inserts stay cheap.
+    __tablename__ = "stop_dwells"
+    __table_args__ = (
+        Index("idx_stop_dwells_route_node_time", "route_node_id", "arrived_at"),
+        Index("idx_stop_dwells_vehicle_time", "vehicle_id", "arrived_at"),
+    )
+
+    id = Column(BigInteger, primary_key=True, autoincrement=True)
+    vehicle_id = Column(Integer, nullable=False)
+    route_id = Column(BigInteger, nullable=False)
+    route_node_id = Column(BigInteger, nullable=False)
+    node_id = Column(BigInteger, nullable=False)
+    arrived_at = Column(DateTime, nullable=False)
+    departed_at = Column(DateTime, nullable=False)
+    dwell_seconds = Column(Integer, nullable=False)
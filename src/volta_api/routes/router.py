@@ -1,4 +1,5 @@
 import math
+from functools import partial
 
 from fastapi import APIRouter, Depends, HTTPException, Query
 from pymysql.err import IntegrityError as PyMySQLIntegrityError
@@ -6,6 +7,16 @@ from sqlalchemy.exc import IntegrityError as SQLAlchemyIntegrityError
 
 from volta_api.auth.dependencies import get_current_active_user
 from volta_api.core.api_response import ApiResponse, PaginationMeta, success_response
+from volta_api.core.pagination import approximate_count, decode_cursor, keyset_page
+from .eta import get_route_eta_board
+from .geometry import (
+    GEOMETRY_FORMATS,
+    SIMPLIFY_ZOOMS,
+    get_route_geometry,
+    render_lines,
+    with_geometry,
+    zoom_tolerance_m,
+)
 from .schemas import (
     RouteCreate,
     RouteNodeCreate,
@@ -44,9 +55,38 @@ async def list_routes(
     page_size: int = Query(20, ge=1, le=100, description="Items per page"),
     is_active: bool | None = Query(None, description="Filter by active status"),
     q: str | None = Query(None, min_length=1, description="Search by code or name"),
+    include_geometry: bool = Query(False, description="Include route geometry"),
+    geometry_format: str = Query(
+        "geojson",
+        pattern=f"^({'|'.join(GEOMETRY_FORMATS)})$",
+        description="Geometry format when include_geometry is set",
+    ),
+    cursor: str | None = Query(
+        None, description="Keyset cursor from meta.next_cursor; send empty to start"
+    ),
+    include_total: bool = Query(
+        False, description="With cursor: include an approximate total"
+    ),
 ):
     skip = (page - 1) * page_size
+    if cursor is not None:
+        rows = await get_routes(
+            limit=page_size + 1, is_active=is_active, q=q, after_id=decode_cursor(cursor)
+        )
+        total = None
+        if include_total:
+            total = await approximate_count(
+                ("routes", is_active, q),
+                partial(get_routes_count, is_active=is_active, q=q),
+            )
+        routes, meta = keyset_page(rows, page_size, total)
+        if include_geometry:
+            routes = await with_geometry(routes, geometry_format)
+        return success_response(data=routes, meta=meta)
+
     routes = await get_routes(skip=skip, limit=page_size, is_active=is_active, q=q)
+    if include_geometry:
+        routes = await with_geometry(routes, geometry_format)
     total = await get_routes_count(is_active=is_active, q=q)
     total_pages = math.ceil(total / page_size) if total > 0 else 1
 
@@ -72,6 +112,7 @@ async def register_route(
         if "uq_routes_code" in str(exc):
             raise HTTPException(status_code=400, detail="Route code already exists") from exc
         raise
+    [route] = await with_geometry([route], "wkt")
     return success_response(message="Route created", data=route)
 
 
@@ -88,6 +129,7 @@ async def edit_route(route_id: int, payload: RouteUpdate):
 
     update_data = payload.model_dump(exclude_unset=True)
     updated = await update_route(route_id, update_data)
+    [updated] = await with_geometry([updated], "wkt")
     return success_response(message="Route updated", data=updated)
 
 
@@ -97,13 +139,89 @@ async def edit_route(route_id: int, payload: RouteUpdate):
     response_model_exclude_none=True,
     dependencies=[Depends(get_current_active_user)],
 )
-async def read_route(route_id: int):
+async def read_route(
+    route_id: int,
+    geometry_format: str = Query(
+        "wkt", pattern=f"^({'|'.join(GEOMETRY_FORMATS)})$"
+    ),
+):
     route = await get_route_by_id(route_id)
     if not route:
         raise HTTPException(status_code=404, detail="Route not found")
+    [route] = await with_geometry([route], geometry_format)
     return success_response(data=route)
 
 
+@router.get(
+    "/{route_id}/geometry",
+    response_model=ApiResponse,
+    response_model_exclude_none=True,
+    dependencies=[Depends(get_current_active_user)],
+)
+async def read_route_geometry(
+    route_id: int,
+    fmt: str = Query(
+        "polyline",
+        alias="format",
+        pattern=f"^({'|'.join(GEOMETRY_FORMATS)})$",
+        description="Output format",
+    ),
+    tolerance: float | None = Query(
+        None, ge=0, le=1000, description="Douglas-Peucker tolerance in meters"
+    ),
+    zoom: int | None = Query(
+        None, ge=0, le=22, description="Map zoom level to simplify for"
+    ),
+):
+    route = await get_route_by_id(route_id)
+    if not route:
+        raise HTTPException(status_code=404, detail="Route not found")
+
+    geometry = await get_route_geometry(route)
+    if not geometry:
+        raise HTTPException(status_code=404, detail="Route has no geometry")
+
+    if tolerance is not None:
+        lines = geometry.simplified(tolerance)
+    elif zoom is not None:
+        lines = geometry.at_zoom(zoom)
+        level = max(zoom, SIMPLIFY_ZOOMS[0])
+        tolerance = (
+            0.0
+            if lines is geometry.lines
+            else round(zoom_tolerance_m(level, geometry.reference_lat), 2)
+        )
+    else:
+        lines = geometry.lines
+
+    return success_response(
+        data={
+            "route_id": route_id,
+            "format": fmt,
+            "tolerance_m": tolerance,
+            "vertex_count": sum(len(line) for line in lines),
+            "geometry": (
+                geometry.render(fmt)
+                if lines is geometry.lines
+                else render_lines(lines, fmt)
+            ),
+        }
+    )
+
+
+@router.get(
+    "/{route_id}/etas",
+    response_model=ApiResponse,
+    response_model_exclude_none=True,
+    dependencies=[Depends(get_current_active_user)],
+)
+async def read_route_etas(route_id: int):
+    route = await get_route_by_id(route_id)
+    if not route:
+        raise HTTPException(status_code=404, detail="Route not found")
+    return success_response(data=await get_route_eta_board(route_id))
+
+
 @router.delete(
     "/{route_id}",
     response_model=ApiResponse,
@@ -3,14 +3,20 @@ from typing import Optional
 from sqlalchemy import delete, func, or_, select, update
 
 from volta_api.core.database import database
-from .models import Route, RouteNode
+from .geometry import get_route_geometry, invalidate_route_geometry
+from .models import Route, RouteNode, StopDwell
 from volta_api.nodes.models import Node
+from volta_api.ws.store import publish_grant_invalidation, unindex_route
 
 
 async def create_route(data: dict):
     query = Route.__table__.insert().values(**data)
     route_id = await database.execute(query)
-    return await get_route_by_id(route_id)
+    route = await get_route_by_id(route_id)
+    if data.get("geometry"):
+        # Parse and cache now; zoom levels are simplified on first request.
+        await get_route_geometry(route)
+    return route
 
 
 async def get_route_by_id(route_id: int):
@@ -21,8 +27,8 @@ async def get_route_by_id(route_id: int):
             Route.id,
             Route.code,
             Route.name,
-            Route.geometry,
             Route.is_active,
+            Route.updated_at,
         )
         .where(Route.id == route_id)
     )
@@ -34,6 +40,7 @@ async def get_routes(
     limit: int = 100,
     is_active: Optional[bool] = None,
     q: Optional[str] = None,
+    after_id: Optional[int] = None,
 ):
     query = (
         Route.__table__
@@ -42,8 +49,8 @@ async def get_routes(
             Route.id,
             Route.code,
             Route.name,
-            Route.geometry,
             Route.is_active,
+            Route.updated_at,
         )
     )
 
@@ -52,8 +59,13 @@ async def get_routes(
     if q:
         pattern = f"%{q.strip()}%"
         query = query.where(or_(Route.code.ilike(pattern), Route.name.ilike(pattern)))
+    if after_id is not None:
+        # Keyset paging: skip is ignored.
+        query = query.where(Route.id > after_id)
 
-    query = query.offset(skip).limit(limit)
+    query = query.order_by(Route.id).limit(limit)
+    if after_id is None:
+        query = query.offset(skip)
     return await database.fetch_all(query)
 
 
@@ -83,13 +95,37 @@ async def get_route_nodes(route_id: int):
     return await database.fetch_all(query)
 
 
+async def get_route_stops(route_id: int):
+    """Ordered route_nodes joined with their node's name and coordinates."""
+    query = (
+        select(
+            RouteNode.id.label("route_node_id"),
+            RouteNode.node_id,
+            RouteNode.seq_no,
+            RouteNode.distance_km_from_start,
+            RouteNode.travel_minutes_from_start,
+            Node.name,
+            Node.latitude,
+            Node.longitude,
+        )
+        .join(Node, Node.id == RouteNode.node_id)
+        .where(RouteNode.route_id == route_id)
+        .order_by(RouteNode.seq_no)
+    )
+    return await database.fetch_all(query)
+
+
 async def update_route(route_id: int, data: dict):
     if not data:
         return await get_route_by_id(route_id)
 
     query = update(Route.__table__).where(Route.id == route_id).values(**data)
     await database.execute(query)
-    return await get_route_by_id(route_id)
+    route = await get_route_by_id(route_id)
+    if "geometry" in data:
+        invalidate_route_geometry(route_id)
+        await get_route_geometry(route)
+    return route
 
 
 async def delete_route(route_id: int):
@@ -102,6 +138,10 @@ async def delete_route(route_id: int):
         delete_route_query = delete(Route.__table__).where(Route.id == route_id)
         await database.execute(delete_route_query)
 
+    invalidate_route_geometry(route_id)
+    # vehicles.route_id is SET NULL by the foreign key; mirror that in Redis.
+    for vehicle_id in await unindex_route(route_id):
+        await publish_grant_invalidation(vehicle_id=vehicle_id)
     return {"deleted": route_id}
 
 
@@ -175,3 +215,10 @@ async def get_existing_node_ids(node_ids: list[int]) -> set[int]:
     query = select(Node.id).where(Node.id.in_(node_ids))
     rows = await database.fetch_all(query)
     return {row["id"] for row in rows}
+
+
+async def insert_stop_dwells(rows: list[dict]):
+    """Bulk insert dwell rows produced by the stop detector."""
+    if not rows:
+        return
+    await database.execute_many(StopDwell.__table__.insert(), rows)
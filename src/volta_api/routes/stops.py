@@ -0,0 +1,220 @@
+from __future__ import annotations
+
+import bisect
+import time
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import Any, Dict, Optional
+
+from volta_api.core.batch_writer import BatchWriter
+from volta_api.ws.history import parse_timestamp
+from volta_api.ws.store import publish_route_event
+from .eta import RouteEtaTable, eta_engine
+from .service import insert_stop_dwells
+
+STOP_GEOFENCE_M = 30.0  # Along-route distance from a stop that counts as at it
+STOP_TRIP_RESET_M = 300.0  # Moving back further than this starts a new trip
+STOP_STATE_IDLE_SECONDS = 60 * 30  # Vehicles silent this long lose their state
+DWELL_WRITER_BATCH = 200
+DWELL_WRITER_INTERVAL_SECONDS = 5
+DWELL_WRITER_MAX_PENDING = 10_000
+
+_TS_FORMAT = "%Y-%m-%dT%H:%M:%SZ"
+
+
+@dataclass
+class _VehicleStopState:
+    table: RouteEtaTable
+    pointer: int  # Next stop the vehicle has not reached yet
+    at_stop: Optional[int] = None
+    arrived_at: int = 0
+    last_progress: float = 0.0
+    last_ts: int = 0  # Timestamp of the last fix, for closing an open dwell
+    last_seen: float = 0.0
+
+
+def _iso(ts: int) -> str:
+    return time.strftime(_TS_FORMAT, time.gmtime(ts))
+
+
+def _naive_utc(ts: int) -> datetime:
+    return datetime.fromtimestamp(ts, tz=timezone.utc).replace(tzinfo=None)
+
+
+class StopDetector:
+    """
+    Arrival/departure detection against each route's stop table.
+
+    A vehicle is at a stop while its distance along the route is within
+    STOP_GEOFENCE_M of the stop's. Per vehicle only a pointer to the next
+    stop is kept and it only moves forward, so each fix costs O(1)
+    amortized. Stops skipped between two fixes produce no events.
+
+    When a vehicle's state is dropped while it is at a stop (new trip, stop
+    table changed, gone idle), the open dwell is closed at its last fix so
+    turnarounds at a terminal still get their dwell written.
+    """
+
+    def __init__(self, writer: BatchWriter, *, geofence_m: float = STOP_GEOFENCE_M):
+        self.writer = writer
+        self.geofence_m = geofence_m
+        self._states: Dict[int, _VehicleStopState] = {}
+        self._last_sweep = time.monotonic()
+
+        self.arrivals = 0
+        self.departures = 0
+        self.failures = 0
+
+    async def observe(self, event: Dict[str, Any]):
+        data = event["data"]
+        route_id = data.get("route_id")
+        progress = data.get("distance_along_route_m")
+        if route_id is None or progress is None:
+            return
+        try:
+            await self._observe(int(route_id), data, progress)
+        except Exception:
+            self.failures += 1
+
+    async def _observe(self, route_id: int, data: Dict[str, Any], progress: float):
+        table = await eta_engine.get_table(route_id)
+        vehicle_id = int(data["vehicle_id"])
+        now = time.monotonic()
+        await self._maybe_sweep(now)
+        if table is None:
+            await self._discard(vehicle_id)
+            return
+
+        ts = (
+            parse_timestamp(data.get("recorded_at"))
+            or parse_timestamp(data.get("received_at"))
+            or int(time.time())
+        )
+        positions = table.positions
+        fence = self.geofence_m
+
+        state = self._states.get(vehicle_id)
+        if (
+            state is None
+            or state.table is not table
+            or progress < state.last_progress - STOP_TRIP_RESET_M
+        ):
+            await self._discard(vehicle_id)
+            state = _VehicleStopState(
+                table=table, pointer=bisect.bisect_left(positions, progress - fence)
+            )
+            self._states[vehicle_id] = state
+        state.last_progress = progress
+        state.last_ts = ts
+        state.last_seen = now
+
+        if state.at_stop is not None:
+            if abs(progress - positions[state.at_stop]) <= fence:
+                return
+            await self._departed(vehicle_id, route_id, state, ts)
+
+        count = len(positions)
+        while state.pointer < count and progress > positions[state.pointer] + fence:
+            state.pointer += 1
+        if state.pointer < count and abs(progress - positions[state.pointer]) <= fence:
+            await self._arrived(vehicle_id, route_id, state, ts)
+
+    async def _arrived(
+        self, vehicle_id: int, route_id: int, state: _VehicleStopState, ts: int
+    ):
+        stop = state.table.stops[state.pointer]
+        state.at_stop = state.pointer
+        state.arrived_at = ts
+        self.arrivals += 1
+        await publish_route_event(
+            route_id,
+            {
+                "type": "vehicle.stop.arrived",
+                "data": {
+                    "vehicle_id": vehicle_id,
+                    "route_id": route_id,
+                    "route_node_id": stop.route_node_id,
+                    "node_id": stop.node_id,
+                    "seq_no": stop.seq_no,
+                    "name": stop.name,
+                    "arrived_at": _iso(ts),
+                },
+            },
+        )
+
+    async def _departed(
+        self, vehicle_id: int, route_id: int, state: _VehicleStopState, ts: int
+    ):
+        stop = state.table.stops[state.at_stop]
+        dwell = max(0, ts - state.arrived_at)
+        arrived_at = state.arrived_at
+        state.pointer = state.at_stop + 1
+        state.at_stop = None
+        self.departures += 1
+
+        self.writer.submit(
+            {
+                "vehicle_id": vehicle_id,
+                "route_id": route_id,
+                "route_node_id": stop.route_node_id,
+                "node_id": stop.node_id,
+                "arrived_at": _naive_utc(arrived_at),
+                "departed_at": _naive_utc(ts),
+                "dwell_seconds": dwell,
+            }
+        )
+        await publish_route_event(
+            route_id,
+            {
+                "type": "vehicle.stop.departed",
+                "data": {
+                    "vehicle_id": vehicle_id,
+                    "route_id": route_id,
+                    "route_node_id": stop.route_node_id,
+                    "node_id": stop.node_id,
+                    "seq_no": stop.seq_no,
+                    "name": stop.name,
+                    "arrived_at": _iso(arrived_at),
+                    "departed_at": _iso(ts),
+                    "dwell_s": dwell,
+                },
+            },
+        )
+
+    async def _discard(self, vehicle_id: int):
+        state = self._states.pop(vehicle_id, None)
+        if state is not None and state.at_stop is not None:
+            await self._departed(
+                vehicle_id, state.table.route_id, state, state.last_ts
+            )
+
+    async def _maybe_sweep(self, now: float):
+        if now - self._last_sweep < STOP_STATE_IDLE_SECONDS:
+            return
+        self._last_sweep = now
+        idle = [
+            vehicle_id
+            for vehicle_id, state in self._states.items()
+            if now - state.last_seen > STOP_STATE_IDLE_SECONDS
+        ]
+        for vehicle_id in idle:
+            await self._discard(vehicle_id)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "vehicles": len(self._states),
+            "arrivals": self.arrivals,
+            "departures": self.departures,
+            "failures": self.failures,
+            "dwell_writer": self.writer.stats(),
+        }
+
+
+dwell_writer = BatchWriter(
+    "stop_dwells",
+    insert_stop_dwells,
+    max_batch=DWELL_WRITER_BATCH,
+    flush_interval=DWELL_WRITER_INTERVAL_SECONDS,
+    max_pending=DWELL_WRITER_MAX_PENDING,
+)
+stop_detector = StopDetector(dwell_writer)
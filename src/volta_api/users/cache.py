@@ -0,0 +1,157 @@
+# volta_api/users/cache.py
+from __future__ import annotations
+
+import time
+from collections import OrderedDict
+from datetime import datetime
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+
+import orjson
+
+from volta_api.auth.events import auth_events
+from volta_api.core.redis import redis_client
+from volta_api.core.settings import settings
+
+USER_CACHE_KEY = "user:{public_id}:cached"
+USER_CHANGED_EVENT = "user.changed"
+# Never cached: the password hash stays in MySQL only.
+_UNCACHED_COLUMNS = {"hashed_password"}
+_DATETIME_COLUMNS = ("created_at", "updated_at")
+
+UserLoader = Callable[[str], Awaitable[Any]]
+
+
+class CachedUser(dict):
+    """User row without secrets; supports row["col"] and row.col like a Record."""
+
+    def __getattr__(self, name: str) -> Any:
+        try:
+            return self[name]
+        except KeyError:
+            raise AttributeError(name) from None
+
+
+def _from_row(row: Any) -> CachedUser:
+    return CachedUser(
+        (key, value) for key, value in dict(row).items() if key not in _UNCACHED_COLUMNS
+    )
+
+
+def _from_json(raw: str) -> CachedUser:
+    user = CachedUser(orjson.loads(raw))
+    for column in _DATETIME_COLUMNS:
+        if isinstance(user.get(column), str):
+            user[column] = datetime.fromisoformat(user[column])
+    return user
+
+
+class UserCache:
+    """
+    Short-TTL cache of user rows keyed by public_id, for the auth path.
+
+    Tier one is a bounded in-process LRU. Tier two, when enabled, is a
+    Redis key per user shared by all workers. Writes through users.service
+    call invalidate(), which drops both tiers and announces user.changed on
+    auth:events so every worker drops its local copy too. The TTL bounds
+    staleness if an announcement is lost.
+    """
+
+    def __init__(self, *, ttl_seconds: float, max_entries: int, use_redis: bool):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.use_redis = use_redis
+        self._local: "OrderedDict[str, Tuple[CachedUser, float]]" = OrderedDict()
+        # Bumped on every invalidation; a load that raced with one is not stored.
+        self._generation = 0
+
+        self.hits = 0
+        self.redis_hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    def _get_local(self, public_id: str) -> Optional[CachedUser]:
+        entry = self._local.get(public_id)
+        if entry is None:
+            return None
+        user, expires_at = entry
+        if expires_at <= time.monotonic():
+            del self._local[public_id]
+            return None
+        self._local.move_to_end(public_id)
+        return user
+
+    def _put_local(self, public_id: str, user: CachedUser):
+        self._local[public_id] = (user, time.monotonic() + self.ttl_seconds)
+        self._local.move_to_end(public_id)
+        while len(self._local) > self.max_entries:
+            self._local.popitem(last=False)
+
+    async def get(self, public_id: str, loader: UserLoader) -> Optional[CachedUser]:
+        user = self._get_local(public_id)
+        if user is not None:
+            self.hits += 1
+            return user
+
+        generation = self._generation
+        key = USER_CACHE_KEY.format(public_id=public_id)
+        if self.use_redis:
+            raw = await redis_client.get(key)
+            if raw is not None:
+                user = _from_json(raw)
+                self.redis_hits += 1
+                if generation == self._generation:
+                    self._put_local(public_id, user)
+                return user
+
+        self.misses += 1
+        row = await loader(public_id)
+        if row is None:
+            return None
+        user = _from_row(row)
+        if generation == self._generation:
+            self._put_local(public_id, user)
+            if self.use_redis:
+                await redis_client.set(
+                    key, orjson.dumps(user), ex=max(1, int(self.ttl_seconds))
+                )
+        return user
+
+    def _drop_local(self, public_id: str):
+        self._generation += 1
+        self._local.pop(public_id, None)
+
+    def _on_changed(self, event: Dict[str, Any]):
+        self._drop_local(event["public_id"])
+
+    async def invalidate(self, public_id: str):
+        self._drop_local(public_id)
+        self.invalidations += 1
+        if self.use_redis:
+            await redis_client.delete(USER_CACHE_KEY.format(public_id=public_id))
+        await auth_events.publish(USER_CHANGED_EVENT, public_id=public_id)
+
+    async def resync(self):
+        # Announcements may have been missed while disconnected.
+        self._generation += 1
+        self._local.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "size": len(self._local),
+            "max_entries": self.max_entries,
+            "ttl_seconds": self.ttl_seconds,
+            "redis": self.use_redis,
+            "hits": self.hits,
+            "redis_hits": self.redis_hits,
+            "misses": self.misses,
+            "invalidations": self.invalidations,
+        }
+
+
+user_cache = UserCache(
+    ttl_seconds=settings.USER_CACHE_TTL_SECONDS,
+    max_entries=settings.USER_CACHE_MAX_ENTRIES,
+    use_redis=settings.USER_CACHE_REDIS,
+)
+auth_events.on(USER_CHANGED_EVENT, user_cache._on_changed)
+auth_events.on_resync(user_cache.resync)
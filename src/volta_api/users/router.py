@@ -1,9 +1,11 @@
 import math
+from functools import partial
 
 from fastapi import APIRouter, Depends, HTTPException, Query
 
 from volta_api.auth.dependencies import get_current_admin_user
 from volta_api.core.api_response import ApiResponse, PaginationMeta, success_response
+from volta_api.core.pagination import approximate_count, decode_cursor, keyset_page
 from .schemas import (
     UserCreate,
     UserDeleteConfirm,
@@ -50,11 +52,40 @@ async def list_users(
     page_size: int = Query(20, ge=1, le=100, description="Items per page"),
     role: UserRole | None = Query(None, description="Filter by role"),
     is_active: bool | None = Query(None, description="Filter by active status"),
+    cursor: str | None = Query(
+        None, description="Keyset cursor from meta.next_cursor; send empty to start"
+    ),
+    include_total: bool = Query(
+        False, description="With cursor: include an approximate total"
+    ),
     current_user=Depends(get_current_admin_user),
 ):
     skip = (page - 1) * page_size
     role_value = role.value if role else None
 
+    if cursor is not None:
+        rows = await get_users(
+            limit=page_size + 1,
+            role=role_value,
+            is_active=is_active,
+            exclude_public_id=current_user.public_id,
+            after_id=decode_cursor(cursor),
+        )
+        total = None
+        if include_total:
+            total = await approximate_count(
+                ("users", role_value, is_active, current_user.public_id),
+                partial(
+                    get_users_count,
+                    role=role_value,
+                    is_active=is_active,
+                    exclude_public_id=current_user.public_id,
+                ),
+            )
+        users, meta = keyset_page(rows, page_size, total)
+        users_out = [UserOut.model_validate(user).model_dump() for user in users]
+        return success_response(data=users_out, meta=meta)
+
     users = await get_users(
         skip=skip,
         limit=page_size,
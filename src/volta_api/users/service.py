@@ -1,10 +1,12 @@
 from sqlalchemy import delete, select, update, func
 from volta_api.core.database import database
+from .cache import user_cache
 from .models import User
 from volta_api.routes.models import Route
 from volta_api.vehicles.models import VehicleUser
-from volta_api.core.security import hash_password
+from volta_api.core.password_hasher import password_hasher
 from volta_api.utils import generate_base64_id
+from volta_api.ws.store import publish_grant_invalidation
 
 
 # ===== Create Operations =====
@@ -19,9 +21,10 @@ async def create_user(
     """Create a new user and return the user data."""
     public_id = generate_base64_id()
 
+    hashed_password = await password_hasher.hash(password)
     query = User.__table__.insert().values(
         email=email,
-        hashed_password=hash_password(password),
+        hashed_password=hashed_password,
         full_name=full_name,
         role=role,
         is_active=True,
@@ -48,6 +51,11 @@ async def get_user_by_public_id(public_id: str):
     return await database.fetch_one(query)
 
 
+async def get_cached_user_by_public_id(public_id: str):
+    """Get a user for the auth path, served from user_cache when fresh."""
+    return await user_cache.get(public_id, get_user_by_public_id)
+
+
 async def get_user_by_id(user_id: int):
     """Get a user by internal ID."""
     query = User.__table__.select().where(User.id == user_id)
@@ -60,6 +68,7 @@ async def get_users(
     role: str | None = None,
     is_active: bool | None = None,
     exclude_public_id: str | None = None,
+    after_id: int | None = None,
 ):
     query = User.__table__.select()
 
@@ -69,8 +78,13 @@ async def get_users(
         query = query.where(User.is_active == is_active)
     if exclude_public_id is not None:
         query = query.where(User.public_id != exclude_public_id)
+    if after_id is not None:
+        # Keyset paging: skip is ignored.
+        query = query.where(User.id > after_id)
 
-    query = query.offset(skip).limit(limit)
+    query = query.order_by(User.id).limit(limit)
+    if after_id is None:
+        query = query.offset(skip)
     return await database.fetch_all(query)
 
 
@@ -97,13 +111,20 @@ async def get_users_count(
 
 async def update_user_password(public_id: str, new_password: str):
     """Update a user's password."""
+    hashed_password = await password_hasher.hash(new_password)
+    await update_user_password_hash(public_id, hashed_password)
+    await user_cache.invalidate(public_id)
+    return await get_user_by_public_id(public_id)
+
+
+async def update_user_password_hash(public_id: str, hashed_password: str):
+    """Store an already computed hash, e.g. one upgraded on login."""
     query = (
         update(User.__table__)
         .where(User.public_id == public_id)
-        .values(hashed_password=hash_password(new_password))
+        .values(hashed_password=hashed_password)
     )
     await database.execute(query)
-    return await get_user_by_public_id(public_id)
 
 
 async def verify_user_email(public_id: str):
@@ -114,6 +135,7 @@ async def verify_user_email(public_id: str):
         .values(is_email_verified=True)
     )
     await database.execute(query)
+    await user_cache.invalidate(public_id)
     return await get_user_by_public_id(public_id)
 
 
@@ -125,6 +147,8 @@ async def update_user_active_status(public_id: str, is_active: bool):
         .values(is_active=is_active)
     )
     await database.execute(query)
+    await user_cache.invalidate(public_id)
+    await publish_grant_invalidation(user_id=public_id)
     return await get_user_by_public_id(public_id)
 
 
@@ -136,6 +160,7 @@ async def update_user_email(public_id: str, new_email: str):
         .values(email=new_email, is_email_verified=False)
     )
     await database.execute(query)
+    await user_cache.invalidate(public_id)
     return await get_user_by_public_id(public_id)
 
 
@@ -146,6 +171,9 @@ async def update_user(public_id: str, data: dict):
 
     query = update(User.__table__).where(User.public_id == public_id).values(**data)
     await database.execute(query)
+    await user_cache.invalidate(public_id)
+    if "role" in data or "is_active" in data:
+        await publish_grant_invalidation(user_id=public_id)
     return await get_user_by_public_id(public_id)
 
 
@@ -171,4 +199,6 @@ async def delete_user(public_id: str):
         delete_user_query = delete(User.__table__).where(User.public_id == public_id)
         await database.execute(delete_user_query)
 
+    await user_cache.invalidate(public_id)
+    await publish_grant_invalidation(user_id=public_id)
     return {"deleted": public_id}
@@ -1,4 +1,14 @@
-from sqlalchemy import BigInteger, Column, DateTime, ForeignKey, Integer, String
+from sqlalchemy import (
+    BigInteger,
+    Column,
+    DateTime,
+    Float,
+    ForeignKey,
+    Index,
+    Integer,
+    Numeric,
+    String,
+)
 from sqlalchemy.sql import func
 from volta_api.core.database import Base
 
@@ -28,3 +38,24 @@ class VehicleUser(Base):
     updated_at = Column(
         DateTime(timezone=True), onupdate=func.now(), server_default=func.now()
     )
+
+
+class VehicleLocation(Base):
+    # received_at is part of the primary key and there are no foreign keys,
+    # so the table can be RANGE-partitioned by time.
+    __tablename__ = "vehicle_locations"
+    __table_args__ = (
+        Index("idx_vehicle_locations_vehicle_time", "vehicle_id", "received_at"),
+        Index("idx_vehicle_locations_route_time", "route_id", "received_at"),
+    )
+
+    id = Column(BigInteger, primary_key=True, autoincrement=True)
+    received_at = Column(DateTime, primary_key=True)
+    vehicle_id = Column(Integer, nullable=False)
+    route_id = Column(BigInteger, nullable=True)
+    lat = Column(Numeric(10, 7), nullable=False)
+    lng = Column(Numeric(10, 7), nullable=False)
+    heading = Column(Float, nullable=True)
+    speed_mps = Column(Float, nullable=True)
+    accuracy_m = Column(Float, nullable=True)
+    recorded_at = Column(DateTime, nullable=True)
@@ -0,0 +1,60 @@
+# volta_api/vehicles/route_index.py
+from __future__ import annotations
+
+import asyncio
+from typing import Any, Dict, Optional
+
+from volta_api.ws.constants import ROUTE_INDEX_CHECK_SECONDS
+from .service import ensure_route_index
+
+
+class RouteIndexKeeper:
+    """
+    Keeps the Redis route membership index built. Rebuilds run here, off the
+    request path: readers (route.subscribe, broadcast) only ever read the
+    index, and the SET NX lock in ensure_route_index means one worker scans
+    MySQL when the ready marker expires. Redis being down at startup is
+    retried on the next check instead of failing the app.
+    """
+
+    def __init__(self, interval: float = ROUTE_INDEX_CHECK_SECONDS):
+        self.interval = interval
+        self._task: Optional[asyncio.Task] = None
+
+        self.rebuilds = 0
+        self.failures = 0
+
+    def start(self):
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        task, self._task = self._task, None
+        if task is None:
+            return
+        task.cancel()
+        try:
+            await task
+        except asyncio.CancelledError:
+            pass
+
+    async def _run(self):
+        while True:
+            try:
+                if await ensure_route_index():
+                    self.rebuilds += 1
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                self.failures += 1
+            await asyncio.sleep(self.interval)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "running": self._task is not None and not self._task.done(),
+            "rebuilds": self.rebuilds,
+            "failures": self.failures,
+        }
+
+
+route_index_keeper = RouteIndexKeeper()
@@ -1,10 +1,18 @@
 import math
+from functools import partial
 from typing import Optional
 from fastapi import APIRouter, Depends, HTTPException, Query
 
 from volta_api.auth.dependencies import get_current_active_user, get_current_admin_user
 from volta_api.core.api_response import ApiResponse, PaginationMeta, success_response
+from volta_api.core.pagination import approximate_count, decode_cursor, keyset_page
 from volta_api.routes.service import get_route_by_id
+from volta_api.ws.constants import (
+    HISTORY_MAX,
+    NEARBY_MAX_AGE_SECONDS,
+    NEARBY_MAX_RADIUS_M,
+)
+from volta_api.ws.store import find_nearby_vehicles, get_history
 from .schemas import (
     VehicleCreate,
     VehicleRouteAssign,
@@ -47,6 +55,15 @@ def _strip_vehicle_fields(vehicle: dict) -> dict:
     vehicle_payload.pop("updated_at", None)
     return vehicle_payload
 
+
+def _with_owners(vehicles_with_owners: list[dict]) -> list[dict]:
+    data = []
+    for item in vehicles_with_owners:
+        vehicle_payload = _strip_vehicle_fields(item["vehicle"])
+        vehicle_payload["owners"] = item["owners"]
+        data.append(vehicle_payload)
+    return data
+
     
 # ===== Vehicle Endpoints =====
 
@@ -87,12 +104,42 @@ async def list_vehicles(
     page_size: int = Query(20, ge=1, le=100, description="Items per page"),
     status: Optional[VehicleStatus] = Query(None, description="Filter by status"),
     vehicle_type: Optional[str] = Query(None, description="Filter by vehicle type"),
+    cursor: Optional[str] = Query(
+        None, description="Keyset cursor from meta.next_cursor; send empty to start"
+    ),
+    include_total: bool = Query(
+        False, description="With cursor: include an approximate total"
+    ),
     current_user=Depends(get_current_active_user),
 ):
     """List all vehicles with pagination and filtering."""
     skip = (page - 1) * page_size
     status_value = status.value if status else None
 
+    if cursor is not None:
+        rows = await get_vehicles_for_user(
+            user_id=current_user.public_id,
+            limit=page_size + 1,
+            status=status_value,
+            vehicle_type=vehicle_type,
+            after_id=decode_cursor(cursor),
+        )
+        total = None
+        if include_total:
+            total = await approximate_count(
+                ("user_vehicles", current_user.public_id, status_value, vehicle_type),
+                partial(
+                    get_vehicles_count_for_user,
+                    user_id=current_user.public_id,
+                    status=status_value,
+                    vehicle_type=vehicle_type,
+                ),
+            )
+        vehicles, meta = keyset_page(rows, page_size, total)
+        return success_response(
+            data=[_strip_vehicle_fields(vehicle) for vehicle in vehicles], meta=meta
+        )
+
     vehicles = await get_vehicles_for_user(
         user_id=current_user.public_id,
         skip=skip,
@@ -130,12 +177,36 @@ async def list_vehicles_with_owners(
     page_size: int = Query(20, ge=1, le=100, description="Items per page"),
     status: Optional[VehicleStatus] = Query(None, description="Filter by status"),
     vehicle_type: Optional[str] = Query(None, description="Filter by vehicle type"),
+    cursor: Optional[str] = Query(
+        None, description="Keyset cursor from meta.next_cursor; send empty to start"
+    ),
+    include_total: bool = Query(
+        False, description="With cursor: include an approximate total"
+    ),
     current_user=Depends(get_current_admin_user),
 ):
     """List all vehicles with owners (admin only)."""
     skip = (page - 1) * page_size
     status_value = status.value if status else None
 
+    if cursor is not None:
+        rows = await get_vehicles_with_owners(
+            limit=page_size + 1,
+            status=status_value,
+            vehicle_type=vehicle_type,
+            after_id=decode_cursor(cursor),
+        )
+        total = None
+        if include_total:
+            total = await approximate_count(
+                ("vehicles", status_value, vehicle_type),
+                partial(get_vehicles_count, status=status_value, vehicle_type=vehicle_type),
+            )
+        vehicles_with_owners, meta = keyset_page(
+            rows, page_size, total, id_of=lambda item: item["vehicle"]["id"]
+        )
+        return success_response(data=_with_owners(vehicles_with_owners), meta=meta)
+
     vehicles_with_owners = await get_vehicles_with_owners(
         skip=skip,
         limit=page_size,
@@ -150,11 +221,7 @@ async def list_vehicles_with_owners(
 
     total_pages = math.ceil(total / page_size) if total > 0 else 1
 
-    data = []
-    for item in vehicles_with_owners:
-        vehicle_payload = _strip_vehicle_fields(item["vehicle"])
-        vehicle_payload["owners"] = item["owners"]
-        data.append(vehicle_payload)
+    data = _with_owners(vehicles_with_owners)
 
     meta = PaginationMeta(
         total=total,
@@ -193,6 +260,39 @@ async def search_vehicles_endpoint(
     )
 
 
+@router.get("/nearby", response_model=ApiResponse, response_model_exclude_none=True)
+async def list_nearby_vehicles(
+    lat: float = Query(..., ge=-90, le=90, description="Latitude"),
+    lng: float = Query(..., ge=-180, le=180, description="Longitude"),
+    radius_m: float = Query(
+        1000, gt=0, le=NEARBY_MAX_RADIUS_M, description="Search radius in meters"
+    ),
+    max_age_s: int = Query(
+        NEARBY_MAX_AGE_SECONDS, ge=1, description="Ignore fixes older than this"
+    ),
+    page: int = Query(1, ge=1, description="Page number"),
+    page_size: int = Query(20, ge=1, le=100, description="Items per page"),
+):
+    """List live vehicles near a point, nearest first."""
+    skip = (page - 1) * page_size
+    vehicles, total = await find_nearby_vehicles(
+        lat,
+        lng,
+        radius_m,
+        offset=skip,
+        limit=page_size,
+        max_age_seconds=max_age_s,
+    )
+    total_pages = math.ceil(total / page_size) if total > 0 else 1
+    meta = PaginationMeta(
+        total=total,
+        page=page,
+        page_size=page_size,
+        total_pages=total_pages,
+    )
+    return success_response(data=vehicles, meta=meta)
+
+
 @router.get("/plate/{plate_number}", response_model=ApiResponse, response_model_exclude_none=True)
 async def read_vehicle_by_plate(
     plate_number: str,
@@ -219,6 +319,26 @@ async def read_vehicle(
     return success_response(data=_strip_vehicle_fields(vehicle))
 
 
+@router.get(
+    "/{vehicle_id}/history",
+    response_model=ApiResponse,
+    response_model_exclude_none=True,
+)
+async def read_vehicle_history(
+    vehicle_id: int,
+    limit: int = Query(
+        100, ge=1, le=HISTORY_MAX, description="Most recent fixes to return"
+    ),
+    current_user=Depends(get_current_active_user),
+):
+    """Recent location fixes of a vehicle from the live history, oldest first."""
+    vehicle = await get_vehicle_by_id_for_user(vehicle_id, current_user.public_id)
+    if not vehicle:
+        raise HTTPException(status_code=404, detail="Vehicle not found")
+    events = await get_history(vehicle_id, -limit, -1)
+    return success_response(data=[event["data"] for event in events])
+
+
 @router.put("/{vehicle_id}", response_model=ApiResponse, response_model_exclude_none=True)
 async def edit_vehicle(vehicle_id: int, payload: VehicleUpdate):
     """Update a vehicle."""
@@ -2,7 +2,14 @@ from sqlalchemy import select, update, delete, func, and_, or_
 from typing import Optional
 from volta_api.core.database import database
 from volta_api.users.models import User
-from .models import Vehicle, VehicleUser
+from volta_api.ws.store import (
+    claim_route_index_rebuild,
+    index_vehicle_route,
+    is_route_index_ready,
+    load_route_index,
+    publish_grant_invalidation,
+)
+from .models import Vehicle, VehicleLocation, VehicleUser
 
 
 # ===== Vehicle CRUD Operations =====
@@ -12,6 +19,8 @@ async def create_vehicle(data: dict):
     """Create a new vehicle and return the created vehicle."""
     query = Vehicle.__table__.insert().values(**data)
     vehicle_id = await database.execute(query)
+    if data.get("route_id") is not None:
+        await index_vehicle_route(vehicle_id, None, data["route_id"])
     return await get_vehicle_by_id(vehicle_id)
 
 
@@ -20,6 +29,7 @@ async def get_vehicles(
     limit: int = 100,
     status: Optional[str] = None,
     vehicle_type: Optional[str] = None,
+    after_id: Optional[int] = None,
 ):
     """Get all vehicles with optional filtering and pagination."""
     query = Vehicle.__table__.select()
@@ -30,10 +40,15 @@ async def get_vehicles(
         filters.append(Vehicle.status == status)
     if vehicle_type:
         filters.append(Vehicle.type == vehicle_type)
+    if after_id is not None:
+        # Keyset paging: skip is ignored.
+        filters.append(Vehicle.id > after_id)
     if filters:
         query = query.where(and_(*filters))
 
-    query = query.offset(skip).limit(limit)
+    query = query.order_by(Vehicle.id).limit(limit)
+    if after_id is None:
+        query = query.offset(skip)
     return await database.fetch_all(query)
 
 
@@ -43,6 +58,7 @@ async def get_vehicles_for_user(
     limit: int = 100,
     status: Optional[str] = None,
     vehicle_type: Optional[str] = None,
+    after_id: Optional[int] = None,
 ):
     """Get vehicles associated with a specific user."""
     vehicles_table = Vehicle.__table__
@@ -63,10 +79,15 @@ async def get_vehicles_for_user(
         filters.append(vehicles_table.c.status == status)
     if vehicle_type:
         filters.append(vehicles_table.c.type == vehicle_type)
+    if after_id is not None:
+        # Keyset paging: skip is ignored.
+        filters.append(vehicles_table.c.id > after_id)
     if filters:
         query = query.where(and_(*filters))
 
-    query = query.offset(skip).limit(limit)
+    query = query.order_by(vehicles_table.c.id).limit(limit)
+    if after_id is None:
+        query = query.offset(skip)
     return await database.fetch_all(query)
 
 
@@ -126,6 +147,27 @@ async def get_vehicle_by_id(vehicle_id: int):
     return await database.fetch_one(query)
 
 
+async def get_vehicle_route_pairs() -> list[tuple[int, int]]:
+    """Get (vehicle_id, route_id) for every vehicle assigned to a route."""
+    query = select(Vehicle.id, Vehicle.route_id).where(Vehicle.route_id.is_not(None))
+    rows = await database.fetch_all(query)
+    return [(row["id"], row["route_id"]) for row in rows]
+
+
+async def ensure_route_index() -> bool:
+    """
+    Build the Redis route membership index from MySQL if it does not exist
+    yet or its ready marker has expired. Only the worker holding the rebuild
+    lock scans the table; returns whether this call rebuilt the index.
+    """
+    if await is_route_index_ready():
+        return False
+    if not await claim_route_index_rebuild():
+        return False
+    await load_route_index(await get_vehicle_route_pairs())
+    return True
+
+
 async def get_vehicle_by_id_for_user(vehicle_id: int, user_id: str):
     """Get a single vehicle by ID if associated with a user."""
     vehicles_table = Vehicle.__table__
@@ -228,6 +270,7 @@ async def get_vehicles_with_owners(
     limit: int = 100,
     status: Optional[str] = None,
     vehicle_type: Optional[str] = None,
+    after_id: Optional[int] = None,
 ):
     """Get vehicles with their owner user info (admin view)."""
     vehicles_table = Vehicle.__table__
@@ -241,10 +284,15 @@ async def get_vehicles_with_owners(
         filters.append(vehicles_table.c.status == status)
     if vehicle_type:
         filters.append(vehicles_table.c.type == vehicle_type)
+    if after_id is not None:
+        # Keyset paging: skip is ignored.
+        filters.append(vehicles_table.c.id > after_id)
     if filters:
         vehicles_query = vehicles_query.where(and_(*filters))
 
-    vehicles_query = vehicles_query.offset(skip).limit(limit)
+    vehicles_query = vehicles_query.order_by(vehicles_table.c.id).limit(limit)
+    if after_id is None:
+        vehicles_query = vehicles_query.offset(skip)
     vehicles_subq = vehicles_query.subquery()
 
     join_clause = (
@@ -265,7 +313,7 @@ async def get_vehicles_with_owners(
         users_table.c.public_id.label("owner_public_id"),
         users_table.c.full_name.label("owner_full_name"),
         users_table.c.email.label("owner_email"),
-    ).select_from(join_clause)
+    ).select_from(join_clause).order_by(vehicles_subq.c.id)
 
     rows = await database.fetch_all(query)
     vehicles_by_id: dict[int, dict] = {}
@@ -299,18 +347,29 @@ async def update_vehicle(vehicle_id: int, data: dict):
     if not data:
         return await get_vehicle_by_id(vehicle_id)
 
+    previous = await get_vehicle_by_id(vehicle_id) if "route_id" in data else None
+
     query = update(Vehicle.__table__).where(Vehicle.id == vehicle_id).values(**data)
     await database.execute(query)
+    if previous and previous.route_id != data["route_id"]:
+        await index_vehicle_route(vehicle_id, previous.route_id, data["route_id"])
+    if "route_id" in data or "plate_number" in data:
+        await publish_grant_invalidation(vehicle_id=vehicle_id)
     return await get_vehicle_by_id(vehicle_id)
 
 
 async def delete_vehicle(vehicle_id: int):
     """Delete a vehicle by ID."""
+    vehicle = await get_vehicle_by_id(vehicle_id)
+
     # First delete related VehicleUser entries
     await delete_vehicle_users_by_vehicle(vehicle_id)
 
     query = delete(Vehicle.__table__).where(Vehicle.id == vehicle_id)
     await database.execute(query)
+    if vehicle and vehicle.route_id is not None:
+        await index_vehicle_route(vehicle_id, vehicle.route_id, None)
+    await publish_grant_invalidation(vehicle_id=vehicle_id)
     return {"deleted": vehicle_id}
 
 
@@ -362,6 +421,7 @@ async def update_vehicle_user_role(vehicle_id: int, user_id: str, role: str):
         .values(role=role)
     )
     await database.execute(query)
+    await publish_grant_invalidation(vehicle_id=vehicle_id)
     return await get_vehicle_user(vehicle_id, user_id)
 
 
@@ -374,6 +434,7 @@ async def remove_user_from_vehicle(vehicle_id: int, user_id: str):
         )
     )
     await database.execute(query)
+    await publish_grant_invalidation(vehicle_id=vehicle_id)
     return {"removed": {"vehicle_id": vehicle_id, "user_id": user_id}}
 
 
@@ -381,3 +442,13 @@ async def delete_vehicle_users_by_vehicle(vehicle_id: int):
     """Delete all user assignments for a vehicle."""
     query = delete(VehicleUser.__table__).where(VehicleUser.vehicle_id == vehicle_id)
     await database.execute(query)
+
+
+# ===== Vehicle Location History =====
+
+
+async def insert_vehicle_locations(rows: list[dict]):
+    """Bulk insert location history rows."""
+    if not rows:
+        return
+    await database.execute_many(VehicleLocation.__table__.insert(), rows)
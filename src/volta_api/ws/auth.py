@@ -1,21 +1,34 @@
 # volta_api/ws/auth.py
 from __future__ import annotations
 
-from dataclasses import dataclass
-from typing import Optional
+import time
+from dataclasses import dataclass, field
+from typing import Any, Dict, Optional
 
 from volta_api.core.security import verify_access_token
-from volta_api.users.service import get_user_by_public_id
+from volta_api.users.service import get_cached_user_by_public_id
 from volta_api.vehicles.service import get_vehicle_by_id, get_vehicle_user
+from volta_api.ws.constants import GRANT_TTL_SECONDS
 from volta_api.ws.store import is_sharing_active
 
 PUBLISH_ROLES = {"driver", "owner", "conductor"}
 
 
+@dataclass(frozen=True)
+class VehicleGrant:
+    vehicle_id: int
+    plate_number: str
+    expires_at: float
+
+
 @dataclass(frozen=True)
 class AuthContext:
     user_id: str
     role: str
+    # Per-socket cache of vehicles this connection may publish for.
+    grants: Dict[int, VehicleGrant] = field(
+        default_factory=dict, compare=False, repr=False
+    )
 
 
 async def verify_token(token: str) -> Optional[AuthContext]:
@@ -26,7 +39,7 @@ async def verify_token(token: str) -> Optional[AuthContext]:
     if not user_id:
         return None
 
-    user = await get_user_by_public_id(user_id)
+    user = await get_cached_user_by_public_id(user_id)
     if not user or not user.is_active:
         return None
 
@@ -70,3 +83,48 @@ async def can_publish(ctx: AuthContext, vehicle_id: int) -> bool:
         return False
 
     return vehicle_user.role in PUBLISH_ROLES
+
+
+def get_grant(ctx: AuthContext, vehicle_id: int) -> Optional[VehicleGrant]:
+    grant = ctx.grants.get(vehicle_id)
+    if grant is None:
+        return None
+    if grant.expires_at <= time.monotonic():
+        ctx.grants.pop(vehicle_id, None)
+        return None
+    return grant
+
+
+def remember_grant(ctx: AuthContext, vehicle: Any) -> VehicleGrant:
+    grant = VehicleGrant(
+        vehicle_id=vehicle.id,
+        plate_number=vehicle.plate_number,
+        expires_at=time.monotonic() + GRANT_TTL_SECONDS,
+    )
+    ctx.grants[grant.vehicle_id] = grant
+    return grant
+
+
+def forget_grant(ctx: AuthContext, vehicle_id: int):
+    ctx.grants.pop(vehicle_id, None)
+
+
+async def authorize_publish(
+    ctx: AuthContext, vehicle_id: int
+) -> tuple[Optional[VehicleGrant], Optional[str]]:
+    """
+    Resolve a publish grant, hitting MySQL only on a cache miss.
+    Returns (grant, None) on success or (None, error_code) otherwise.
+    """
+    grant = get_grant(ctx, vehicle_id)
+    if grant:
+        return grant, None
+
+    if not await can_publish(ctx, vehicle_id):
+        return None, "FORBIDDEN"
+
+    vehicle = await get_vehicle_by_id(vehicle_id)
+    if not vehicle:
+        return None, "NOT_FOUND"
+
+    return remember_grant(ctx, vehicle), None
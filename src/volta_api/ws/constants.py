@@ -5,10 +5,46 @@ HISTORY_KEY = "vehicle:{vehicle_id}:history"
 UPDATES_CH = "vehicle:{vehicle_id}:updates"
 ROUTE_UPDATES_CH = "route:{route_id}:updates"
 SHARING_KEY = "vehicle:{vehicle_id}:sharing"
+GRANTS_INVALIDATE_CH = "ws:grants:invalidate"
+ROUTE_VEHICLES_KEY = "route:{route_id}:vehicles"
+VEHICLE_ROUTES_KEY = "vehicles:route"  # hash: vehicle_id -> route_id
+ROUTE_INDEX_READY_KEY = "vehicles:route:ready"
+ROUTE_INDEX_LOCK_KEY = "vehicles:route:lock"
+LIVE_GEO_KEY = "vehicles:live:geo"
+LIVE_SEEN_KEY = "vehicles:live:seen"  # zset: vehicle_id -> last fix unix ts
+LOCATION_STREAM_KEY = "locations:stream:{shard}"
+LOCATION_DEAD_LETTER_KEY = "locations:dead"  # Entries the sink gave up on
+ROUTE_ETAS_KEY = "route:{route_id}:etas"  # hash: vehicle_id -> route.eta.update
 
 HISTORY_TTL_SECONDS = 60 * 60  # 1 hour
 HISTORY_MAX = 2000
+ROUTE_INDEX_TTL_SECONDS = 60 * 60 * 6  # Route membership sets are rebuilt from MySQL this often
+ROUTE_INDEX_CHECK_SECONDS = 60  # How often workers check whether a rebuild is due
+ROUTE_INDEX_LOCK_SECONDS = 60  # A crashed rebuild releases the lock after this
 SHARING_TTL_SECONDS = 60 * 2 # Sharing expires after 2 minutes of inactivity, but can be refreshed with each new location update
+OUTBOUND_QUEUE_MAX = 64  # Frames buffered per socket before the oldest is dropped
+CHANNEL_RELEASE_GRACE_SECONDS = 5  # Idle channels linger briefly before UNSUBSCRIBE
+CLOSE_DRAIN_SECONDS = 1  # Queued replies get this long to go out before a close
+LISTENER_BACKOFF_MIN_SECONDS = 0.5
+LISTENER_BACKOFF_MAX_SECONDS = 30
+GEO_MAX_LAT = 85.05112878  # Redis GEOADD rejects latitudes beyond this
+NEARBY_MAX_RADIUS_M = 5000
+NEARBY_SCAN_MAX = 500  # Candidates read per GEOSEARCH before staleness filtering
+NEARBY_MAX_AGE_SECONDS = 120
+SNAPSHOT_MAX_AGE_SECONDS = 60 * 5  # Older positions are left out of route snapshots
+LIVE_POSITION_PRUNE_SECONDS = 60 * 10  # Stale GEO members are removed lazily after this
+LOCATION_STREAM_SHARDS = 4  # vehicle_id % shards picks the stream
+LOCATION_STREAM_MAXLEN = 200_000  # Approximate per-shard retention for catch-up
+STREAM_CLAIM_IDLE_MS = 60_000  # Take over entries a dead consumer left pending
+STREAM_MAX_DELIVERIES = 10  # Deliveries before a failing entry is dead-lettered
+STREAM_DEAD_LETTER_MAXLEN = 10_000
+LOCATION_SINK_GROUP = "persistence"
+LOCATION_SINK_BATCH = 500
+LOCATION_SINK_BLOCK_MS = 2000
+LOCATION_BATCH_MAX = 500  # Fixes accepted in one vehicle.location.batch frame
+GOVERNOR_SWEEP_SECONDS = 60  # How often idle per-vehicle ingest state is discarded
+ETA_MAX_AGE_SECONDS = 60 * 5  # ETA rows of vehicles silent this long are dropped
+GRANT_TTL_SECONDS = 60  # Per-socket publish authorization is re-checked against MySQL at most once a minute
 
 SUPPORTED_TYPES = [
     "auth",
@@ -17,4 +53,6 @@ SUPPORTED_TYPES = [
     "route.unsubscribe",
     "vehicle.location.share",
     "vehicle.location.broadcast",
+    "vehicle.location.batch",
+    "vehicle.nearby",
 ]
@@ -0,0 +1,178 @@
+# volta_api/ws/governor.py
+from __future__ import annotations
+
+import asyncio
+import time
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+from volta_api.core.geo import haversine_m
+from volta_api.core.settings import settings
+
+from .constants import GOVERNOR_SWEEP_SECONDS
+from .ingest import publish_fix
+
+ACCEPTED = "accepted"
+CONFLATED = "conflated"
+DROPPED = "dropped"
+
+Publish = Callable[[int, Optional[int], Dict[str, Any]], Awaitable[Any]]
+
+
+@dataclass
+class _VehicleState:
+    last_at: float
+    lat: float
+    lng: float
+    pending: Optional[tuple[Optional[int], Dict[str, Any]]] = None
+    flush_task: Optional[asyncio.Task] = None
+
+
+class IngestGovernor:
+    """
+    Per-vehicle admission control for incoming GPS fixes.
+
+    A fix is accepted when at least min_interval seconds have passed since
+    the last accepted one and the vehicle moved at least min_distance_m.
+    Fixes inside the interval are conflated: only the newest is kept and it
+    is published once the interval elapses. Fixes that barely moved are
+    dropped, except that one is let through every max_silence seconds so a
+    parked vehicle still refreshes its position and sharing TTL.
+    """
+
+    def __init__(
+        self,
+        publish: Publish,
+        *,
+        min_interval: float,
+        min_distance_m: float,
+        max_silence: float,
+    ):
+        self._publish = publish
+        self.min_interval = min_interval
+        self.min_distance_m = min_distance_m
+        self.max_silence = max_silence
+
+        self._states: Dict[int, _VehicleState] = {}
+        self._last_sweep = time.monotonic()
+
+        self.accepted = 0
+        self.conflated = 0
+        self.superseded = 0
+        self.dropped = 0
+        self.flushed = 0
+        self.flush_failures = 0
+
+    def offer(
+        self, vehicle_id: int, route_id: Optional[int], event: Dict[str, Any]
+    ) -> str:
+        """
+        Decide what happens to a fix. ACCEPTED means the caller should store
+        and publish it now; CONFLATED and DROPPED fixes need nothing further.
+        """
+        now = time.monotonic()
+        self._maybe_sweep(now)
+
+        data = event["data"]
+        lat, lng = data["lat"], data["lng"]
+        state = self._states.get(vehicle_id)
+        if state is None:
+            self._states[vehicle_id] = _VehicleState(now, lat, lng)
+            self.accepted += 1
+            return ACCEPTED
+
+        elapsed = now - state.last_at
+        if elapsed >= self.max_silence:
+            return self._accept(state, now, lat, lng)
+
+        if haversine_m(state.lat, state.lng, lat, lng) < self.min_distance_m:
+            self.dropped += 1
+            return DROPPED
+
+        if elapsed < self.min_interval:
+            if state.pending is not None:
+                self.superseded += 1
+            state.pending = (route_id, event)
+            self.conflated += 1
+            if state.flush_task is None:
+                state.flush_task = asyncio.create_task(
+                    self._flush_later(vehicle_id, state, self.min_interval - elapsed)
+                )
+            return CONFLATED
+
+        return self._accept(state, now, lat, lng)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "vehicles": len(self._states),
+            "accepted": self.accepted,
+            "conflated": self.conflated,
+            "superseded": self.superseded,
+            "dropped": self.dropped,
+            "flushed": self.flushed,
+            "flush_failures": self.flush_failures,
+            "min_interval_s": self.min_interval,
+            "min_distance_m": self.min_distance_m,
+        }
+
+    def note_published(self, vehicle_id: int, event: Dict[str, Any]):
+        """Record a fix the caller published without going through offer()."""
+        now = time.monotonic()
+        data = event["data"]
+        state = self._states.get(vehicle_id)
+        if state is None:
+            self._states[vehicle_id] = _VehicleState(now, data["lat"], data["lng"])
+            return
+        self._reset(state, now, data["lat"], data["lng"])
+
+    def _accept(self, state: _VehicleState, now: float, lat: float, lng: float) -> str:
+        self._reset(state, now, lat, lng)
+        self.accepted += 1
+        return ACCEPTED
+
+    def _reset(self, state: _VehicleState, now: float, lat: float, lng: float):
+        if state.pending is not None:
+            # The fix being published is newer than the one waiting to flush.
+            state.pending = None
+            self.superseded += 1
+        if state.flush_task is not None:
+            state.flush_task.cancel()
+            state.flush_task = None
+        state.last_at, state.lat, state.lng = now, lat, lng
+
+    async def _flush_later(self, vehicle_id: int, state: _VehicleState, delay: float):
+        await asyncio.sleep(delay)
+        state.flush_task = None
+        pending, state.pending = state.pending, None
+        if pending is None:
+            return
+
+        route_id, event = pending
+        state.last_at = time.monotonic()
+        state.lat, state.lng = event["data"]["lat"], event["data"]["lng"]
+        try:
+            await self._publish(vehicle_id, route_id, event)
+        except Exception:
+            self.flush_failures += 1
+            return
+        self.flushed += 1
+
+    def _maybe_sweep(self, now: float):
+        if now - self._last_sweep < GOVERNOR_SWEEP_SECONDS:
+            return
+        self._last_sweep = now
+        idle = [
+            vehicle_id
+            for vehicle_id, state in self._states.items()
+            if state.flush_task is None and now - state.last_at > self.max_silence
+        ]
+        for vehicle_id in idle:
+            del self._states[vehicle_id]
+
+
+ingest_governor = IngestGovernor(
+    publish_fix,
+    min_interval=settings.WS_FIX_MIN_INTERVAL_SECONDS,
+    min_distance_m=settings.WS_FIX_MIN_DISTANCE_M,
+    max_silence=settings.WS_FIX_MAX_SILENCE_SECONDS,
+)
@@ -0,0 +1,139 @@
+# volta_api/ws/history.py
+from __future__ import annotations
+
+import math
+import struct
+import time
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional
+
+import orjson
+
+# One fix per history entry, 24 bytes, little-endian:
+#   received_at   uint32  unix seconds
+#   lat, lng      int32   degrees * 1e7
+#   route_id      uint32  0 when unassigned; larger ids cannot be packed
+#   speed_mps     uint16  cm/s
+#   heading       uint16  hundredths of a degree
+#   accuracy_m    uint16  decimeters
+#   recorded_at   int16   seconds relative to received_at
+RECORD = struct.Struct("<IiiIHHHh")
+
+_U16_NONE = 0xFFFF
+_U32_MAX = 0xFFFFFFFF
+_I16_NONE = -0x8000
+_TS_FORMAT = "%Y-%m-%dT%H:%M:%SZ"
+
+
+def _to_float(value: Any) -> Optional[float]:
+    if value is None:
+        return None
+    try:
+        number = float(value)
+    except (TypeError, ValueError):
+        return None
+    return number if math.isfinite(number) else None
+
+
+def _pack_u16(value: Any, scale: float) -> int:
+    number = _to_float(value)
+    if number is None or number < 0:
+        return _U16_NONE
+    return min(int(round(number * scale)), _U16_NONE - 1)
+
+
+def _pack_degrees(value: Any, limit: float) -> int:
+    # Callers validate positions; clamping only keeps struct.pack from raising.
+    number = _to_float(value) or 0.0
+    return int(round(max(-limit, min(number, limit)) * 1e7))
+
+
+def _unpack_u16(value: int, scale: float) -> Optional[float]:
+    if value == _U16_NONE:
+        return None
+    return value / scale
+
+
+def parse_timestamp(value: Any) -> Optional[int]:
+    if value is None:
+        return None
+    if isinstance(value, (int, float)):
+        # Accept epoch milliseconds as well as seconds.
+        return int(value / 1000) if value > 1e12 else int(value)
+    if isinstance(value, str):
+        try:
+            parsed = datetime.fromisoformat(value.replace("Z", "+00:00"))
+        except ValueError:
+            return None
+        if parsed.tzinfo is None:
+            parsed = parsed.replace(tzinfo=timezone.utc)
+        return int(parsed.timestamp())
+    return None
+
+
+def _format_timestamp(ts: int) -> str:
+    return time.strftime(_TS_FORMAT, time.gmtime(ts))
+
+
+def encode_fix(data: Dict[str, Any]) -> bytes:
+    """
+    Pack the data of a vehicle.location.update event into one record.
+    Raises ValueError when route_id is outside the record's uint32 field.
+    """
+    received = parse_timestamp(data.get("received_at")) or int(time.time())
+    recorded = parse_timestamp(data.get("recorded_at"))
+    offset = _I16_NONE
+    if recorded is not None and -0x7FFF <= recorded - received <= 0x7FFF:
+        offset = recorded - received
+
+    route_id = data.get("route_id") or 0
+    if not 0 <= route_id <= _U32_MAX:
+        raise ValueError(f"route_id {route_id} does not fit a packed history record")
+
+    heading = _to_float(data.get("heading"))
+    return RECORD.pack(
+        received,
+        _pack_degrees(data["lat"], 90),
+        _pack_degrees(data["lng"], 180),
+        route_id,
+        _pack_u16(data.get("speed_mps"), 100),
+        _pack_u16(heading % 360 if heading is not None else None, 100),
+        _pack_u16(data.get("accuracy_m"), 10),
+        offset,
+    )
+
+
+def decode_fix(
+    record: bytes, vehicle_id: int, plate_number: Optional[str]
+) -> Dict[str, Any]:
+    """Rebuild the vehicle.location.update event a record was packed from."""
+    if len(record) != RECORD.size:
+        # JSON entries written before the packed format was introduced.
+        return orjson.loads(record)
+
+    received, lat, lng, route_id, speed, heading, accuracy, offset = RECORD.unpack(
+        record
+    )
+    return {
+        "type": "vehicle.location.update",
+        "data": {
+            "vehicle_id": vehicle_id,
+            "plate_number": plate_number,
+            "route_id": route_id or None,
+            "lat": lat / 1e7,
+            "lng": lng / 1e7,
+            "heading": _unpack_u16(heading, 100),
+            "speed_mps": _unpack_u16(speed, 100),
+            "accuracy_m": _unpack_u16(accuracy, 10),
+            "recorded_at": (
+                _format_timestamp(received + offset) if offset != _I16_NONE else None
+            ),
+            "received_at": _format_timestamp(received),
+        },
+    }
+
+
+def decode_fixes(
+    records: List[bytes], vehicle_id: int, plate_number: Optional[str]
+) -> List[Dict[str, Any]]:
+    return [decode_fix(record, vehicle_id, plate_number) for record in records]
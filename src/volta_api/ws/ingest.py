@@ -0,0 +1,49 @@
+# volta_api/ws/ingest.py
+from __future__ import annotations
+
+from typing import Any, Dict, List, Optional
+
+from volta_api.routes.eta import eta_engine
+from volta_api.routes.matching import match_location_event
+from volta_api.routes.stops import stop_detector
+
+from .store import store_and_publish_location, store_and_publish_locations
+
+
+async def publish_fix(
+    vehicle_id: int, route_id: Optional[int], event: Dict[str, Any]
+):
+    """
+    Map-match, store and fan out one accepted fix, then run the per-fix
+    consumers. Matching happens here rather than on receipt so fixes the
+    governor drops or supersedes never pay for it.
+    """
+    await match_location_event(event)
+    await store_and_publish_location(vehicle_id, route_id, event)
+    await eta_engine.observe(event)
+    await stop_detector.observe(event)
+
+
+async def publish_fixes(
+    vehicle_id: int,
+    route_id: Optional[int],
+    events: List[Dict[str, Any]],
+    *,
+    live: bool = True,
+):
+    """
+    Store a run of fixes (oldest first). Every fix feeds the consumers'
+    state and stop events, but only the newest one pushes ETAs. A run older
+    than the live position (live=False) is only kept as history: replaying
+    it would rewind the ETA and stop detector state of the vehicle.
+    """
+    for event in events:
+        await match_location_event(event)
+    await store_and_publish_locations(vehicle_id, route_id, events, live=live)
+    if not live:
+        return
+    for event in events[:-1]:
+        await eta_engine.observe(event, publish=False)
+        await stop_detector.observe(event)
+    await eta_engine.observe(events[-1])
+    await stop_detector.observe(events[-1])
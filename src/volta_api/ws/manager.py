@@ -2,13 +2,25 @@
 from __future__ import annotations
 
 import asyncio
-import json
+import re
 from collections import defaultdict
 from typing import Any, Dict, Optional, Set, DefaultDict
 
+import orjson
 from fastapi import WebSocket
+from redis.asyncio.client import PubSub
 from volta_api.core.redis import redis_client
 
+from .constants import (
+    CHANNEL_RELEASE_GRACE_SECONDS,
+    CLOSE_DRAIN_SECONDS,
+    GRANTS_INVALIDATE_CH,
+    LISTENER_BACKOFF_MAX_SECONDS,
+    LISTENER_BACKOFF_MIN_SECONDS,
+    OUTBOUND_QUEUE_MAX,
+)
+from .outbound import SocketSender
+from .protocol import dumps
 from .topics import channel_to_topic, topic_to_channel
 
 
@@ -18,16 +30,29 @@ class ConnectionManager:
         self.topic_subs: DefaultDict[str, Set[WebSocket]] = defaultdict(set)
         self.socket_topics: DefaultDict[WebSocket, Set[str]] = defaultdict(set)
         self.auth: Dict[WebSocket, Any] = {}
+        self.senders: Dict[WebSocket, SocketSender] = {}
 
         self._listener_task: Optional[asyncio.Task] = None
         self._listener_lock = asyncio.Lock()
 
-        self._redis_channels: Set[str] = set()
+        # Channels this worker wants; the control channel keeps listen() alive.
+        self._redis_channels: Set[str] = {GRANTS_INVALIDATE_CH}
         self._channels_lock = asyncio.Lock()
+        self._pubsub: Optional[PubSub] = None
+        # Local subscriber count per channel, and pending grace-period releases.
+        self._channel_refs: Dict[str, int] = {}
+        self._pending_releases: Dict[str, asyncio.Task] = {}
+        self.redis_subscribes = 0
+        self.redis_unsubscribes = 0
 
     async def connect(self, ws: WebSocket):
         await ws.accept()
         self.active.add(ws)
+        sender = SocketSender(
+            ws, max_queue=OUTBOUND_QUEUE_MAX, on_error=self._on_send_error
+        )
+        self.senders[ws] = sender
+        sender.start()
         await self._ensure_redis_listener()
 
     async def disconnect(self, ws: WebSocket):
@@ -36,33 +61,122 @@ class ConnectionManager:
             self.topic_subs[t].discard(ws)
             if not self.topic_subs[t]:
                 self.topic_subs.pop(t, None)
+            await self._release_channel(t)
+
+        sender = self.senders.pop(ws, None)
+        if sender:
+            sender.close()
 
         self.auth.pop(ws, None)
         self.active.discard(ws)
 
+    async def close(self, ws: WebSocket, code: int):
+        """Flush what is queued for the socket (briefly), then close it."""
+        sender = self.senders.get(ws)
+        if sender:
+            await sender.drain(CLOSE_DRAIN_SECONDS)
+        await self.disconnect(ws)
+        try:
+            await ws.close(code=code)
+        except Exception:
+            pass
+
+    async def _on_send_error(self, ws: WebSocket):
+        # Closing makes the handler's receive fail, so its loop exits instead
+        # of serving a socket that no longer has a sender or subscriptions.
+        await self.disconnect(ws)
+        try:
+            await ws.close(code=1011)
+        except Exception:
+            pass
+
     def get_auth(self, ws: WebSocket) -> Optional[Any]:
         return self.auth.get(ws)
 
     async def set_auth(self, ws: WebSocket, ctx: Any):
         self.auth[ws] = ctx
 
+    def invalidate_grants(
+        self, *, vehicle_id: Optional[int] = None, user_id: Optional[str] = None
+    ):
+        for ctx in self.auth.values():
+            grants = getattr(ctx, "grants", None)
+            if grants is None:
+                continue
+            if user_id is not None and ctx.user_id == user_id:
+                grants.clear()
+            elif vehicle_id is not None:
+                grants.pop(vehicle_id, None)
+
     async def subscribe(self, ws: WebSocket, topic: str):
+        if ws in self.topic_subs.get(topic, ()):
+            return
         self.topic_subs[topic].add(ws)
         self.socket_topics[ws].add(topic)
         await self._ensure_channel_subscribed(topic)
 
     async def unsubscribe(self, ws: WebSocket, topic: str):
-        self.topic_subs[topic].discard(ws)
+        subscribers = self.topic_subs.get(topic)
+        if not subscribers or ws not in subscribers:
+            return
+        subscribers.discard(ws)
         self.socket_topics[ws].discard(topic)
-        if not self.topic_subs[topic]:
+        if not subscribers:
             self.topic_subs.pop(topic, None)
+        await self._release_channel(topic)
 
     async def publish_local(self, topic: str, message: Dict[str, Any]):
-        for ws in list(self.topic_subs.get(topic, set())):
-            try:
-                await ws.send_json(message)
-            except Exception:
-                await self.disconnect(ws)
+        subscribers = self.topic_subs.get(topic)
+        if not subscribers:
+            return
+
+        self._enqueue(subscribers, dumps(message), _conflation_key(message))
+
+    async def publish_raw(self, topic: str, text: str, key: Optional[str] = None):
+        """Forward an already-encoded JSON frame without decoding it."""
+        subscribers = self.topic_subs.get(topic)
+        if not subscribers:
+            return
+
+        self._enqueue(subscribers, text, key or _conflation_key_from_text(text))
+
+    def send(self, ws: WebSocket, message: Dict[str, Any]):
+        """
+        Queue a reply (ack, error) for one socket. Replies go through the
+        socket's writer like every other frame, so only one task ever writes.
+        """
+        sender = self.senders.get(ws)
+        if sender:
+            sender.enqueue(dumps(message))
+
+    def send_first(self, ws: WebSocket, text: str):
+        """Queue a frame ahead of any live updates already waiting for this socket."""
+        sender = self.senders.get(ws)
+        if sender:
+            sender.enqueue(text, front=True)
+
+    def _enqueue(self, subscribers: Set[WebSocket], text: str, key: Optional[str]):
+        for ws in subscribers:
+            sender = self.senders.get(ws)
+            if sender:
+                sender.enqueue(text, key)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "connections": len(self.active),
+            "topics": len(self.topic_subs),
+            "redis_channels": len(self._redis_channels),
+            "redis_subscribes": self.redis_subscribes,
+            "redis_unsubscribes": self.redis_unsubscribes,
+            "sockets": [
+                {
+                    "id": id(ws),
+                    "topics": len(self.socket_topics.get(ws, ())),
+                    **sender.stats(),
+                }
+                for ws, sender in self.senders.items()
+            ],
+        }
 
     async def _ensure_redis_listener(self):
         async with self._listener_lock:
@@ -73,50 +187,143 @@ class ConnectionManager:
     async def _ensure_channel_subscribed(self, topic: str):
         channel = topic_to_channel(topic)
         async with self._channels_lock:
+            self._channel_refs[channel] = self._channel_refs.get(channel, 0) + 1
+            pending = self._pending_releases.pop(channel, None)
+            if pending:
+                pending.cancel()
             if channel in self._redis_channels:
                 return
             self._redis_channels.add(channel)
+            self.redis_subscribes += 1
+            if self._pubsub is not None:
+                try:
+                    await self._pubsub.subscribe(channel)
+                except Exception:
+                    # The listener resubscribes every desired channel on reconnect.
+                    pass
 
-    async def _redis_listener_loop(self):
-        pubsub = redis_client.pubsub()
-        subscribed: Set[str] = set()
+    async def _release_channel(self, topic: str):
+        channel = topic_to_channel(topic)
+        async with self._channels_lock:
+            refs = self._channel_refs.get(channel, 0) - 1
+            if refs > 0:
+                self._channel_refs[channel] = refs
+                return
+            self._channel_refs.pop(channel, None)
+            if channel not in self._redis_channels:
+                return
+            if channel not in self._pending_releases:
+                self._pending_releases[channel] = asyncio.create_task(
+                    self._drop_channel_later(channel)
+                )
 
-        try:
-            while True:
+    async def _drop_channel_later(self, channel: str):
+        # Grace period so commuters flipping between routes don't churn SUBSCRIBE.
+        await asyncio.sleep(CHANNEL_RELEASE_GRACE_SECONDS)
+        async with self._channels_lock:
+            if self._pending_releases.get(channel) is not asyncio.current_task():
+                return
+            self._pending_releases.pop(channel, None)
+            if self._channel_refs.get(channel):
+                return
+            self._redis_channels.discard(channel)
+            self.redis_unsubscribes += 1
+            if self._pubsub is not None:
+                try:
+                    await self._pubsub.unsubscribe(channel)
+                except Exception:
+                    pass
+
+    async def _redis_listener_loop(self):
+        backoff = LISTENER_BACKOFF_MIN_SECONDS
+        while True:
+            pubsub = redis_client.pubsub(ignore_subscribe_messages=True)
+            try:
                 async with self._channels_lock:
-                    desired = set(self._redis_channels)
-
-                to_add = desired - subscribed
-                if to_add:
-                    await pubsub.subscribe(*to_add)
-                    subscribed |= to_add
-
-                if subscribed:
-                    msg = await pubsub.get_message(
-                        ignore_subscribe_messages=True, timeout=1.0
-                    )
-                    if msg and msg.get("type") == "message":
-                        ch = msg.get("channel")
-                        data = msg.get("data")
-                        if isinstance(ch, bytes):
-                            ch = ch.decode("utf-8")
-                        if isinstance(data, bytes):
-                            data = data.decode("utf-8")
-
-                        topic = channel_to_topic(ch)
-                        try:
-                            payload = json.loads(data)
-                        except Exception:
-                            continue
-
-                        await self.publish_local(topic, payload)
-
-                await asyncio.sleep(0)
-        finally:
+                    await pubsub.subscribe(*self._redis_channels)
+                    self._pubsub = pubsub
+                backoff = LISTENER_BACKOFF_MIN_SECONDS
+
+                async for msg in pubsub.listen():
+                    if msg.get("type") == "message":
+                        await self._handle_redis_message(msg)
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                await asyncio.sleep(backoff)
+                backoff = min(backoff * 2, LISTENER_BACKOFF_MAX_SECONDS)
+            finally:
+                self._pubsub = None
+                try:
+                    await pubsub.aclose()
+                except Exception:
+                    pass
+
+    async def _handle_redis_message(self, msg: Dict[str, Any]):
+        ch = msg.get("channel")
+        data = msg.get("data")
+        if isinstance(ch, bytes):
+            ch = ch.decode("utf-8")
+        if isinstance(data, bytes):
+            data = data.decode("utf-8")
+
+        if ch == GRANTS_INVALIDATE_CH:
             try:
-                await pubsub.close()
+                payload = orjson.loads(data)
             except Exception:
-                pass
+                return
+            self.invalidate_grants(
+                vehicle_id=payload.get("vehicle_id"),
+                user_id=payload.get("user_id"),
+            )
+            return
+
+        # Frames from our own encoder are recognised by their prefix; anything
+        # else is parsed once here rather than being forwarded unchecked.
+        key = _conflation_key_from_text(data)
+        if key is None and not _is_json_object(data):
+            return
+
+        topic = channel_to_topic(ch)
+        await self.publish_raw(topic, data, key)
+
+
+# Location and ETA events are encoded by orjson with "type" first and
+# "vehicle_id" first inside "data", so the conflation key can be read off
+# the prefix.
+_CONFLATED_PREFIX_RE = re.compile(
+    r'^\{"type":"(vehicle\.location\.update|route\.eta\.update)",'
+    r'"data":\{"vehicle_id":(\d+)'
+)
+_CONFLATION_PREFIXES = {
+    "vehicle.location.update": "vehicle",
+    "route.eta.update": "eta",
+}
+
+
+def _is_json_object(text: str) -> bool:
+    try:
+        return isinstance(orjson.loads(text), dict)
+    except orjson.JSONDecodeError:
+        return False
+
+
+def _conflation_key_from_text(text: str) -> Optional[str]:
+    match = _CONFLATED_PREFIX_RE.match(text)
+    if not match:
+        return None
+    return f"{_CONFLATION_PREFIXES[match.group(1)]}:{match.group(2)}"
+
+
+def _conflation_key(message: Dict[str, Any]) -> Optional[str]:
+    prefix = _CONFLATION_PREFIXES.get(message.get("type"))
+    if prefix is None:
+        return None
+    data = message.get("data") or {}
+    vehicle_id = data.get("vehicle_id")
+    if vehicle_id is None:
+        return None
+    return f"{prefix}:{vehicle_id}"
 
 
 manager = ConnectionManager()
@@ -0,0 +1,118 @@
+# volta_api/ws/outbound.py
+from __future__ import annotations
+
+import asyncio
+from collections import deque
+from typing import Any, Awaitable, Callable, Deque, Dict, Optional
+
+from fastapi import WebSocket
+
+
+class SocketSender:
+    """
+    Bounded outbound queue for one socket, drained by its own writer task.
+
+    Frames carrying a conflation key (e.g. one vehicle's location) replace
+    any frame with the same key that is still waiting, so a slow consumer
+    only ever receives the freshest position. When the queue is full the
+    oldest frame is dropped instead of blocking the publisher.
+    """
+
+    def __init__(
+        self,
+        ws: WebSocket,
+        *,
+        max_queue: int,
+        on_error: Callable[[WebSocket], Awaitable[None]],
+    ):
+        self.ws = ws
+        self.max_queue = max_queue
+        self._on_error = on_error
+        self._queue: Deque[tuple[Optional[str], Optional[str]]] = deque()
+        self._pending: Dict[str, str] = {}
+        self._wakeup = asyncio.Event()
+        self._idle = asyncio.Event()
+        self._idle.set()
+        self._task: Optional[asyncio.Task] = None
+
+        self.sent = 0
+        self.dropped = 0
+        self.conflated = 0
+        self.max_depth = 0
+
+    @property
+    def depth(self) -> int:
+        return len(self._queue)
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._writer_loop())
+
+    def close(self):
+        task, self._task = self._task, None
+        if task and task is not asyncio.current_task():
+            task.cancel()
+        self._queue.clear()
+        self._pending.clear()
+        self._idle.set()
+
+    def enqueue(self, text: str, key: Optional[str] = None, *, front: bool = False):
+        if key is not None and key in self._pending:
+            self._pending[key] = text
+            self.conflated += 1
+            return
+
+        if len(self._queue) >= self.max_queue:
+            old_key, _ = self._queue.popleft()
+            if old_key is not None:
+                self._pending.pop(old_key, None)
+            self.dropped += 1
+
+        if front:
+            self._queue.appendleft((None, text))
+        elif key is not None:
+            self._pending[key] = text
+            self._queue.append((key, None))
+        else:
+            self._queue.append((None, text))
+
+        self.max_depth = max(self.max_depth, len(self._queue))
+        self._idle.clear()
+        self._wakeup.set()
+
+    async def drain(self, timeout: float):
+        """Wait until every queued frame has been written, at most timeout."""
+        try:
+            await asyncio.wait_for(self._idle.wait(), timeout)
+        except asyncio.TimeoutError:
+            pass
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "queue_depth": self.depth,
+            "max_depth": self.max_depth,
+            "sent": self.sent,
+            "dropped": self.dropped,
+            "conflated": self.conflated,
+        }
+
+    async def _writer_loop(self):
+        while True:
+            if not self._queue:
+                self._idle.set()
+                self._wakeup.clear()
+                await self._wakeup.wait()
+                continue
+
+            key, text = self._queue.popleft()
+            if key is not None:
+                text = self._pending.pop(key, None)
+                if text is None:
+                    continue
+
+            try:
+                await self.ws.send_text(text)
+            except Exception:
+                await self._on_error(self.ws)
+                return
+            self.sent += 1
@@ -1,7 +1,17 @@
 # volta_api/ws/protocol.py
 from __future__ import annotations
 
-from typing import Any, Dict, Optional
+import math
+import time
+from typing import Any, Dict, List, Optional
+
+import orjson
+
+from .constants import GEO_MAX_LAT
+
+
+def dumps(message: Dict[str, Any]) -> str:
+    return orjson.dumps(message).decode("utf-8")
 
 
 def ok(
@@ -24,3 +34,60 @@ def err(
     if extra:
         data.update(extra)
     return ok("error", request_id, data)
+
+
+def route_snapshot(route_id: int, updates: List[str]) -> str:
+    """Wrap already-encoded vehicle.location.update frames without decoding them."""
+    return '{"type":"route.snapshot","data":{"route_id":%d,"updates":[%s]}}' % (
+        route_id,
+        ",".join(updates),
+    )
+
+
+def _optional_number(fix: Dict[str, Any], name: str) -> Optional[float]:
+    value = fix.get(name)
+    if value is None:
+        return None
+    number = float(value)
+    if not math.isfinite(number):
+        raise ValueError(f"{name} must be a finite number")
+    return number
+
+
+def location_event(
+    vehicle_id: int,
+    plate_number: Optional[str],
+    route_id: Optional[int],
+    fix: Dict[str, Any],
+    received_at: Optional[str] = None,
+) -> Dict[str, Any]:
+    """
+    Build the vehicle.location.update event for one fix sent by a device.
+    Raises ValueError for positions Redis GEO cannot index, so callers can
+    reject the fix before anything is written.
+    """
+    lat = float(fix["lat"])
+    lng = float(fix["lng"])
+    if not (math.isfinite(lat) and math.isfinite(lng)):
+        raise ValueError("lat and lng must be finite numbers")
+    if not (-GEO_MAX_LAT <= lat <= GEO_MAX_LAT and -180 <= lng <= 180):
+        raise ValueError(f"lat must be within ±{GEO_MAX_LAT} and lng within ±180")
+    heading = _optional_number(fix, "heading")
+    speed_mps = _optional_number(fix, "speed_mps")
+    accuracy_m = _optional_number(fix, "accuracy_m")
+    return {
+        "type": "vehicle.location.update",
+        "data": {
+            "vehicle_id": vehicle_id,
+            "plate_number": plate_number,
+            "route_id": route_id,
+            "lat": lat,
+            "lng": lng,
+            "heading": heading,
+            "speed_mps": speed_mps,
+            "accuracy_m": accuracy_m,
+            "recorded_at": fix.get("recorded_at"),
+            "received_at": received_at
+            or time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+        },
+    }
@@ -0,0 +1,108 @@
+# volta_api/ws/sink.py
+from __future__ import annotations
+
+import math
+import time
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional
+
+from volta_api.vehicles.service import insert_vehicle_locations
+
+from .constants import (
+    LOCATION_DEAD_LETTER_KEY,
+    LOCATION_SINK_BATCH,
+    LOCATION_SINK_BLOCK_MS,
+    LOCATION_SINK_GROUP,
+)
+from .history import parse_timestamp
+from .streams import StreamConsumer, location_streams
+
+
+# Timestamps outside this window are treated as missing rather than stored.
+_MIN_TIMESTAMP = 946684800  # 2000-01-01
+_MAX_CLOCK_SKEW_SECONDS = 60 * 60 * 24
+# Anything outside these bounds is device garbage (and would overflow FLOAT).
+_MAX_HEADING = 360.0
+_MAX_SPEED_MPS = 200.0
+_MAX_ACCURACY_M = 100_000.0
+
+
+def _as_datetime(value: Any) -> Optional[datetime]:
+    ts = parse_timestamp(value)
+    if ts is None or not _MIN_TIMESTAMP <= ts <= time.time() + _MAX_CLOCK_SKEW_SECONDS:
+        return None
+    return datetime.fromtimestamp(ts, tz=timezone.utc).replace(tzinfo=None)
+
+
+def _as_float(value: Any, limit: float) -> Optional[float]:
+    try:
+        number = float(value) if value is not None else None
+    except (TypeError, ValueError):
+        return None
+    if number is None or not math.isfinite(number) or not 0 <= number <= limit:
+        return None
+    return number
+
+
+def _coordinate(value: Any, limit: float) -> Optional[float]:
+    try:
+        number = float(value)
+    except (TypeError, ValueError):
+        return None
+    if not math.isfinite(number) or abs(number) > limit:
+        return None
+    return number
+
+
+def location_row(data: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """
+    Map vehicle.location.update data onto a vehicle_locations row, or None
+    when the position itself is unusable. Out-of-range optional fields are
+    stored as NULL so one bad device value cannot fail a whole batch.
+    """
+    lat = _coordinate(data.get("lat"), 90)
+    lng = _coordinate(data.get("lng"), 180)
+    if lat is None or lng is None:
+        return None
+    return {
+        "vehicle_id": data["vehicle_id"],
+        "route_id": data.get("route_id"),
+        "lat": lat,
+        "lng": lng,
+        "heading": _as_float(data.get("heading"), _MAX_HEADING),
+        "speed_mps": _as_float(data.get("speed_mps"), _MAX_SPEED_MPS),
+        "accuracy_m": _as_float(data.get("accuracy_m"), _MAX_ACCURACY_M),
+        "recorded_at": _as_datetime(data.get("recorded_at")),
+        "received_at": _as_datetime(data.get("received_at"))
+        or datetime.utcnow().replace(microsecond=0),
+    }
+
+
+async def persist_locations(events: List[Dict[str, Any]]):
+    rows = [
+        row
+        for event in events
+        if event.get("type") == "vehicle.location.update"
+        and (row := location_row(event["data"])) is not None
+    ]
+    if rows:
+        await insert_vehicle_locations(rows)
+
+
+# Fixes are persisted from the streams rather than through an in-process
+# BatchWriter: rows buffered in a worker are lost when it dies, entries in a
+# consumer group are not. BatchWriter is left to best-effort writes (dwells).
+#
+# Persistence is the only consumer group on the location streams. Analytics
+# (ETA learning, stop detection) stays inline on the ingesting worker: it
+# needs every fix of a vehicle in order and publishes live results, which a
+# separately scaled group reading four shards could not guarantee. Another
+# group can be added later with its own StreamConsumer on location_streams().
+location_sink = StreamConsumer(
+    LOCATION_SINK_GROUP,
+    persist_locations,
+    streams=location_streams(),
+    batch=LOCATION_SINK_BATCH,
+    block_ms=LOCATION_SINK_BLOCK_MS,
+    dead_letter=LOCATION_DEAD_LETTER_KEY,
+)
@@ -1,18 +1,39 @@
 # volta_api/ws/store.py
 from __future__ import annotations
 
-import json
-from typing import Any, Dict, Optional
+import time
+from typing import Any, Dict, List, Optional
 
-from volta_api.core.redis import redis_client
+import orjson
+
+from volta_api.core.redis import redis_bytes_client, redis_client
 from .constants import (
+    GRANTS_INVALIDATE_CH,
     HISTORY_KEY,
     HISTORY_MAX,
     HISTORY_TTL_SECONDS,
     LATEST_KEY,
+    LIVE_GEO_KEY,
+    LIVE_POSITION_PRUNE_SECONDS,
+    LIVE_SEEN_KEY,
+    LOCATION_STREAM_MAXLEN,
+    NEARBY_SCAN_MAX,
+    ETA_MAX_AGE_SECONDS,
+    ROUTE_ETAS_KEY,
+    ROUTE_INDEX_LOCK_KEY,
+    ROUTE_INDEX_LOCK_SECONDS,
+    ROUTE_INDEX_READY_KEY,
+    ROUTE_INDEX_TTL_SECONDS,
+    ROUTE_UPDATES_CH,
+    ROUTE_VEHICLES_KEY,
     SHARING_KEY,
     SHARING_TTL_SECONDS,
+    SNAPSHOT_MAX_AGE_SECONDS,
+    UPDATES_CH,
+    VEHICLE_ROUTES_KEY,
 )
+from .history import decode_fixes, encode_fix, parse_timestamp
+from .streams import location_stream_for
 
 
 async def get_latest(vehicle_id: int | str) -> Optional[Dict[str, Any]]:
@@ -23,21 +44,253 @@ async def get_latest(vehicle_id: int | str) -> Optional[Dict[str, Any]]:
     if isinstance(raw, bytes):
         raw = raw.decode("utf-8")
     try:
-        return json.loads(raw)
+        return orjson.loads(raw)
     except Exception:
         return None
 
 
-async def save_latest_and_history(vehicle_id: int | str, event_msg: Dict[str, Any]):
+async def get_latest_raw_many(
+    vehicle_ids: List[int], max_age: float = SNAPSHOT_MAX_AGE_SECONDS
+) -> List[str]:
+    """
+    Fetch the encoded latest events for many vehicles in one round trip.
+    latest keys never expire, so vehicles whose last fix (per the seen
+    ZSET) is older than max_age are left out.
+    """
+    if not vehicle_ids:
+        return []
+    keys = [LATEST_KEY.format(vehicle_id=vehicle_id) for vehicle_id in vehicle_ids]
+    async with redis_client.pipeline(transaction=False) as pipe:
+        pipe.zmscore(LIVE_SEEN_KEY, vehicle_ids)
+        pipe.mget(keys)
+        seen, values = await pipe.execute()
+    cutoff = time.time() - max_age
+    return [
+        value.decode("utf-8") if isinstance(value, bytes) else value
+        for value, last_seen in zip(values, seen)
+        if value and last_seen is not None and last_seen >= cutoff
+    ]
+
+
+def _fix_time(data: Dict[str, Any]) -> Optional[int]:
+    return parse_timestamp(data.get("recorded_at")) or parse_timestamp(
+        data.get("received_at")
+    )
+
+
+async def is_newer_than_latest(vehicle_id: int | str, event: Dict[str, Any]) -> bool:
+    """
+    Whether a fix is at least as recent as the stored live position. Fixes
+    without a usable timestamp count as newer.
+    """
+    latest = await get_latest(vehicle_id)
+    if latest is None:
+        return True
+    fix_ts = _fix_time(event["data"])
+    latest_ts = _fix_time(latest.get("data") or {})
+    return fix_ts is None or latest_ts is None or fix_ts >= latest_ts
+
+
+async def store_and_publish_location(
+    vehicle_id: int | str,
+    route_id: Optional[int | str],
+    event_msg: Dict[str, Any],
+):
+    """
+    Persist a location event and fan it out in a single round trip:
+    latest + history (trimmed, expiring), live GEO position, an XADD to the
+    location stream, vehicle/route PUBLISH and a sharing TTL refresh are
+    queued on one non-transactional pipeline.
+    """
+    await store_and_publish_locations(vehicle_id, route_id, [event_msg])
+
+
+async def store_and_publish_locations(
+    vehicle_id: int | str,
+    route_id: Optional[int | str],
+    events: List[Dict[str, Any]],
+    *,
+    live: bool = True,
+):
+    """
+    Like store_and_publish_location for a run of fixes ordered oldest first.
+    Every fix goes to history and the location stream; with live set the
+    last one also becomes the latest/live position and is published. A
+    backlog older than the live position is stored with live=False so it
+    does not move the vehicle back on the map.
+    """
+    if not events:
+        return
+
+    latest_key = LATEST_KEY.format(vehicle_id=vehicle_id)
+    history_key = HISTORY_KEY.format(vehicle_id=vehicle_id)
+    sharing_key = SHARING_KEY.format(vehicle_id=vehicle_id)
+    stream = location_stream_for(vehicle_id)
+
+    encoded = [orjson.dumps(event) for event in events]
+    data = events[-1]["data"]
+    raw = encoded[-1]
+    try:
+        records = [encode_fix(event["data"]) for event in events]
+    except ValueError:
+        # Route id beyond the packed record's range: keep the live position,
+        # stream entries and fan-out, only the short history is skipped.
+        records = []
+
+    async with redis_client.pipeline(transaction=False) as pipe:
+        if live:
+            pipe.set(latest_key, raw)
+        if records:
+            pipe.rpush(history_key, *records)
+            pipe.ltrim(history_key, -HISTORY_MAX, -1)
+            pipe.expire(history_key, HISTORY_TTL_SECONDS)
+        if live:
+            pipe.geoadd(LIVE_GEO_KEY, (data["lng"], data["lat"], vehicle_id))
+            pipe.zadd(LIVE_SEEN_KEY, {vehicle_id: time.time()})
+        for entry in encoded:
+            pipe.xadd(
+                stream,
+                {"event": entry},
+                maxlen=LOCATION_STREAM_MAXLEN,
+                approximate=True,
+            )
+        if live:
+            pipe.publish(UPDATES_CH.format(vehicle_id=vehicle_id), raw)
+            if route_id is not None:
+                pipe.publish(ROUTE_UPDATES_CH.format(route_id=route_id), raw)
+        pipe.expire(sharing_key, SHARING_TTL_SECONDS)
+        await pipe.execute()
+
+
+async def get_history(
+    vehicle_id: int, start: int = 0, end: int = -1
+) -> List[Dict[str, Any]]:
+    """Decode history entries [start, end] (LRANGE semantics) into location events."""
     latest_key = LATEST_KEY.format(vehicle_id=vehicle_id)
     history_key = HISTORY_KEY.format(vehicle_id=vehicle_id)
 
-    raw = json.dumps(event_msg)
+    async with redis_bytes_client.pipeline(transaction=False) as pipe:
+        pipe.get(latest_key)
+        pipe.lrange(history_key, start, end)
+        latest_raw, records = await pipe.execute()
+
+    plate_number = None
+    if latest_raw:
+        try:
+            plate_number = orjson.loads(latest_raw)["data"].get("plate_number")
+        except Exception:
+            pass
+    return decode_fixes(records, vehicle_id, plate_number)
+
+
+async def find_nearby_vehicles(
+    lat: float,
+    lng: float,
+    radius_m: float,
+    *,
+    offset: int,
+    limit: int,
+    max_age_seconds: float,
+) -> tuple[List[Dict[str, Any]], int]:
+    """
+    Vehicles within radius_m of a point, nearest first, whose last fix is
+    newer than max_age_seconds. Returns (page of latest payloads, total).
+    """
+    hits = await redis_client.geosearch(
+        LIVE_GEO_KEY,
+        longitude=lng,
+        latitude=lat,
+        radius=radius_m,
+        unit="m",
+        sort="ASC",
+        count=NEARBY_SCAN_MAX,
+        withdist=True,
+    )
+    if not hits:
+        return [], 0
+
+    seen = await redis_client.zmscore(LIVE_SEEN_KEY, [member for member, _ in hits])
+    now = time.time()
+    cutoff = now - max_age_seconds
+    prune_before = now - LIVE_POSITION_PRUNE_SECONDS
+
+    fresh: List[tuple[int, float]] = []
+    expired: List[str] = []
+    for (member, dist), last_seen in zip(hits, seen):
+        if last_seen is None or last_seen < prune_before:
+            expired.append(member)
+        elif last_seen >= cutoff:
+            fresh.append((int(member), float(dist)))
+
+    if expired:
+        async with redis_client.pipeline(transaction=False) as pipe:
+            pipe.zrem(LIVE_GEO_KEY, *expired)
+            pipe.zrem(LIVE_SEEN_KEY, *expired)
+            await pipe.execute()
+
+    page = fresh[offset : offset + limit]
+    if not page:
+        return [], len(fresh)
+
+    raws = await redis_client.mget(
+        [LATEST_KEY.format(vehicle_id=vehicle_id) for vehicle_id, _ in page]
+    )
+    items: List[Dict[str, Any]] = []
+    for (vehicle_id, dist), raw in zip(page, raws):
+        if not raw:
+            continue
+        try:
+            data = orjson.loads(raw).get("data") or {}
+        except Exception:
+            continue
+        items.append({**data, "vehicle_id": vehicle_id, "distance_m": round(dist, 1)})
+    return items, len(fresh)
+
+
+async def publish_route_event(route_id: int | str, event_msg: Dict[str, Any]):
+    await redis_client.publish(
+        ROUTE_UPDATES_CH.format(route_id=route_id), orjson.dumps(event_msg)
+    )
 
-    await redis_client.set(latest_key, raw)
-    await redis_client.rpush(history_key, raw)
-    await redis_client.ltrim(history_key, -HISTORY_MAX, -1)
-    await redis_client.expire(history_key, HISTORY_TTL_SECONDS)
+
+async def save_vehicle_etas(
+    route_id: int | str, vehicle_id: int | str, event_msg: Dict[str, Any]
+):
+    """Mirror one vehicle's route.eta.update into the route hash and publish it."""
+    key = ROUTE_ETAS_KEY.format(route_id=route_id)
+    raw = orjson.dumps(event_msg)
+    async with redis_client.pipeline(transaction=False) as pipe:
+        pipe.hset(key, vehicle_id, raw)
+        pipe.expire(key, ETA_MAX_AGE_SECONDS)
+        pipe.publish(ROUTE_UPDATES_CH.format(route_id=route_id), raw)
+        await pipe.execute()
+
+
+async def clear_vehicle_etas(route_id: int | str, vehicle_id: int | str):
+    await redis_client.hdel(ROUTE_ETAS_KEY.format(route_id=route_id), vehicle_id)
+
+
+async def get_route_etas(route_id: int | str) -> List[Dict[str, Any]]:
+    """Current route.eta.update data per vehicle; stale rows are removed."""
+    key = ROUTE_ETAS_KEY.format(route_id=route_id)
+    rows = await redis_client.hgetall(key)
+    cutoff = time.time() - ETA_MAX_AGE_SECONDS
+
+    fresh = []
+    stale = []
+    for vehicle_id, raw in rows.items():
+        try:
+            data = orjson.loads(raw)["data"]
+        except Exception:
+            stale.append(vehicle_id)
+            continue
+        if data.get("updated_at", 0) < cutoff:
+            stale.append(vehicle_id)
+        else:
+            fresh.append(data)
+    if stale:
+        await redis_client.hdel(key, *stale)
+    return fresh
 
 
 async def set_sharing(vehicle_id: int | str, enabled: bool):
@@ -48,11 +301,103 @@ async def set_sharing(vehicle_id: int | str, enabled: bool):
     await redis_client.set(key, "1", ex=SHARING_TTL_SECONDS)
 
 
-async def refresh_sharing(vehicle_id: int | str):
-    key = SHARING_KEY.format(vehicle_id=vehicle_id)
-    await redis_client.expire(key, SHARING_TTL_SECONDS)
-
-
 async def is_sharing_active(vehicle_id: int | str) -> bool:
     key = SHARING_KEY.format(vehicle_id=vehicle_id)
     return bool(await redis_client.exists(key))
+
+
+async def publish_grant_invalidation(
+    *, vehicle_id: int | str | None = None, user_id: str | None = None
+):
+    """Tell every worker to drop cached publish grants for a vehicle or user."""
+    payload: Dict[str, Any] = {}
+    if vehicle_id is not None:
+        payload["vehicle_id"] = int(vehicle_id)
+    if user_id is not None:
+        payload["user_id"] = user_id
+    if not payload:
+        return
+    await redis_client.publish(GRANTS_INVALIDATE_CH, orjson.dumps(payload))
+
+
+# ===== Route membership index =====
+
+
+async def index_vehicle_route(
+    vehicle_id: int,
+    old_route_id: Optional[int],
+    new_route_id: Optional[int],
+):
+    """Move a vehicle between route:{id}:vehicles sets and the reverse hash."""
+    async with redis_client.pipeline(transaction=True) as pipe:
+        if old_route_id is not None and old_route_id != new_route_id:
+            pipe.srem(ROUTE_VEHICLES_KEY.format(route_id=old_route_id), vehicle_id)
+        if new_route_id is None:
+            pipe.hdel(VEHICLE_ROUTES_KEY, vehicle_id)
+        else:
+            pipe.sadd(ROUTE_VEHICLES_KEY.format(route_id=new_route_id), vehicle_id)
+            pipe.hset(VEHICLE_ROUTES_KEY, vehicle_id, new_route_id)
+        await pipe.execute()
+
+
+async def unindex_route(route_id: int) -> List[int]:
+    """Drop a route's vehicle set and reverse entries; returns the vehicle ids."""
+    vehicle_ids = await get_route_vehicle_ids(route_id)
+    async with redis_client.pipeline(transaction=True) as pipe:
+        if vehicle_ids:
+            pipe.hdel(VEHICLE_ROUTES_KEY, *vehicle_ids)
+        pipe.delete(ROUTE_VEHICLES_KEY.format(route_id=route_id))
+        await pipe.execute()
+    return vehicle_ids
+
+
+async def get_route_vehicle_ids(route_id: int) -> List[int]:
+    members = await redis_client.smembers(ROUTE_VEHICLES_KEY.format(route_id=route_id))
+    return [int(member) for member in members]
+
+
+async def get_publish_state(vehicle_id: int) -> tuple[bool, Optional[int]]:
+    """(sharing active, route id) for a vehicle in one round trip."""
+    async with redis_client.pipeline(transaction=False) as pipe:
+        pipe.exists(SHARING_KEY.format(vehicle_id=vehicle_id))
+        pipe.hget(VEHICLE_ROUTES_KEY, vehicle_id)
+        sharing, route_id = await pipe.execute()
+    return bool(sharing), int(route_id) if route_id is not None else None
+
+
+async def is_route_index_ready() -> bool:
+    return bool(await redis_client.exists(ROUTE_INDEX_READY_KEY))
+
+
+async def claim_route_index_rebuild() -> bool:
+    """Take the rebuild lock; only one worker rebuilds at a time."""
+    return bool(
+        await redis_client.set(
+            ROUTE_INDEX_LOCK_KEY, "1", nx=True, ex=ROUTE_INDEX_LOCK_SECONDS
+        )
+    )
+
+
+async def load_route_index(pairs: List[tuple[int, int]]):
+    """
+    Rebuild the whole route membership index from (vehicle_id, route_id)
+    pairs. The ready marker expires so the index is rebuilt from MySQL
+    periodically, which also repairs it after a Redis flush or a missed
+    update.
+    """
+    stale = [
+        key
+        async for key in redis_client.scan_iter(
+            match=ROUTE_VEHICLES_KEY.format(route_id="*")
+        )
+    ]
+    async with redis_client.pipeline(transaction=True) as pipe:
+        if stale:
+            pipe.delete(*stale)
+        pipe.delete(VEHICLE_ROUTES_KEY)
+        for vehicle_id, route_id in pairs:
+            pipe.sadd(ROUTE_VEHICLES_KEY.format(route_id=route_id), vehicle_id)
+            pipe.hset(VEHICLE_ROUTES_KEY, vehicle_id, route_id)
+        pipe.set(ROUTE_INDEX_READY_KEY, "1", ex=ROUTE_INDEX_TTL_SECONDS)
+        pipe.delete(ROUTE_INDEX_LOCK_KEY)
+        await pipe.execute()
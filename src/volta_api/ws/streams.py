@@ -0,0 +1,288 @@
+# volta_api/ws/streams.py
+from __future__ import annotations
+
+import asyncio
+import os
+import socket
+import time
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+import orjson
+from redis.exceptions import ResponseError
+from volta_api.core.redis import redis_client
+
+from .constants import (
+    LOCATION_STREAM_KEY,
+    LOCATION_STREAM_SHARDS,
+    STREAM_CLAIM_IDLE_MS,
+    STREAM_DEAD_LETTER_MAXLEN,
+    STREAM_MAX_DELIVERIES,
+)
+
+
+OUTAGE_DELIVERY_FACTOR = 3
+
+
+def location_stream_for(vehicle_id: int | str) -> str:
+    return LOCATION_STREAM_KEY.format(shard=int(vehicle_id) % LOCATION_STREAM_SHARDS)
+
+
+def location_streams() -> List[str]:
+    return [LOCATION_STREAM_KEY.format(shard=i) for i in range(LOCATION_STREAM_SHARDS)]
+
+
+def default_consumer_name() -> str:
+    return f"{socket.gethostname()}-{os.getpid()}"
+
+
+class StreamConsumer:
+    """
+    Consumer-group reader over one or more streams with at-least-once delivery.
+
+    Entries are acknowledged only after the handler returns. On failure they
+    stay pending and are replayed; entries left pending by a dead consumer
+    are taken over with XAUTOCLAIM once idle for claim_idle_ms.
+
+    When a batch fails, its entries are retried one at a time so a single
+    bad entry cannot hold up the others. An entry that keeps failing is
+    copied to the dead_letter stream and acknowledged once it has been
+    delivered max_deliveries times. When every entry of a batch fails it
+    looks more like an outage (e.g. MySQL down) than bad data, so those
+    entries get OUTAGE_DELIVERY_FACTOR times as many attempts first.
+    """
+
+    def __init__(
+        self,
+        group: str,
+        handler: Callable[[List[Dict[str, Any]]], Awaitable[Any]],
+        *,
+        streams: List[str],
+        batch: int,
+        block_ms: int,
+        consumer: Optional[str] = None,
+        claim_idle_ms: int = STREAM_CLAIM_IDLE_MS,
+        dead_letter: Optional[str] = None,
+        max_deliveries: int = STREAM_MAX_DELIVERIES,
+        max_backoff: float = 30.0,
+    ):
+        self.group = group
+        self.handler = handler
+        self.streams = streams
+        self.batch = batch
+        self.block_ms = block_ms
+        self.consumer = consumer or default_consumer_name()
+        self.claim_idle_ms = claim_idle_ms
+        self.dead_letter = dead_letter
+        self.max_deliveries = max_deliveries
+        self.max_backoff = max_backoff
+
+        self._task: Optional[asyncio.Task] = None
+        self._replay_pending = True
+        self._last_claim = 0.0
+
+        self.processed = 0
+        self.claimed = 0
+        self.failures = 0
+        self.dead_lettered = 0
+
+    def start(self):
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        task, self._task = self._task, None
+        if task:
+            task.cancel()
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+
+    async def stats(self) -> Dict[str, Any]:
+        lag: Dict[str, Any] = {}
+        for stream in self.streams:
+            try:
+                groups = await redis_client.xinfo_groups(stream)
+            except ResponseError:
+                continue
+            for info in groups:
+                if info.get("name") == self.group:
+                    lag[stream] = {
+                        "pending": info.get("pending"),
+                        "lag": info.get("lag"),
+                    }
+        return {
+            "group": self.group,
+            "consumer": self.consumer,
+            "processed": self.processed,
+            "claimed": self.claimed,
+            "failures": self.failures,
+            "dead_lettered": self.dead_lettered,
+            "streams": lag,
+        }
+
+    async def _ensure_groups(self):
+        for stream in self.streams:
+            try:
+                await redis_client.xgroup_create(
+                    stream, self.group, id="0", mkstream=True
+                )
+            except ResponseError as exc:
+                if "BUSYGROUP" not in str(exc):
+                    raise
+
+    async def _run(self):
+        backoff = 0.5
+        while True:
+            try:
+                await self._ensure_groups()
+                while True:
+                    await self._maybe_claim()
+                    await self._read_once()
+                    backoff = 0.5
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                self.failures += 1
+                self._replay_pending = True
+                await asyncio.sleep(backoff)
+                backoff = min(backoff * 2, self.max_backoff)
+
+    async def _read_once(self):
+        start_id = "0" if self._replay_pending else ">"
+        response = await redis_client.xreadgroup(
+            self.group,
+            self.consumer,
+            {stream: start_id for stream in self.streams},
+            count=self.batch,
+            block=None if self._replay_pending else self.block_ms,
+        )
+        entries = [
+            (stream, entry_id, fields)
+            for stream, messages in response or []
+            for entry_id, fields in messages
+        ]
+        if self._replay_pending and not entries:
+            self._replay_pending = False
+            return
+        await self._handle(entries)
+
+    async def _maybe_claim(self):
+        now = time.monotonic()
+        if now - self._last_claim < self.claim_idle_ms / 1000:
+            return
+        self._last_claim = now
+        for stream in self.streams:
+            _, messages, *_ = await redis_client.xautoclaim(
+                stream,
+                self.group,
+                self.consumer,
+                min_idle_time=self.claim_idle_ms,
+                count=self.batch,
+            )
+            if messages:
+                self.claimed += len(messages)
+                # Claimed entries now belong to this consumer's pending list.
+                self._replay_pending = True
+
+    async def _handle(self, entries: List[tuple[str, str, Dict[str, str]]]):
+        if not entries:
+            return
+
+        parsed = []
+        for stream, entry_id, fields in entries:
+            # Pending entries already trimmed by MAXLEN come back without fields.
+            event = None
+            if fields:
+                try:
+                    event = orjson.loads(fields["event"])
+                except Exception:
+                    pass
+            parsed.append((stream, entry_id, event))
+
+        events = [event for _, _, event in parsed if event is not None]
+        try:
+            if events:
+                await self.handler(events)
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            await self._handle_one_by_one(parsed)
+            return
+        await self._ack([(stream, entry_id) for stream, entry_id, _ in parsed])
+
+    async def _handle_one_by_one(self, parsed: List[tuple[str, str, Any]]):
+        done: List[tuple[str, str]] = []
+        failed: List[tuple[str, str, Any]] = []
+        for stream, entry_id, event in parsed:
+            if event is None:
+                done.append((stream, entry_id))
+                continue
+            try:
+                await self.handler([event])
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                failed.append((stream, entry_id, event))
+            else:
+                done.append((stream, entry_id))
+        await self._ack(done)
+
+        if not failed:
+            return
+        if self.dead_letter:
+            limit = self.max_deliveries
+            if not done and len(failed) > 1:
+                limit *= OUTAGE_DELIVERY_FACTOR
+            failed = await self._dead_letter_exhausted(failed, limit)
+        if failed:
+            # Back off in _run, then replay what is still pending.
+            raise RuntimeError(f"{len(failed)} stream entries failed")
+
+    async def _dead_letter_exhausted(
+        self, failed: List[tuple[str, str, Any]], limit: int
+    ) -> List[tuple[str, str, Any]]:
+        """Move entries delivered at least limit times aside; return the rest."""
+        remaining = []
+        exhausted = []
+        for stream, entry_id, event in failed:
+            pending = await redis_client.xpending_range(
+                stream, self.group, min=entry_id, max=entry_id, count=1
+            )
+            deliveries = pending[0]["times_delivered"] if pending else 0
+            if deliveries >= limit:
+                exhausted.append((stream, entry_id, event))
+            else:
+                remaining.append((stream, entry_id, event))
+
+        if exhausted:
+            async with redis_client.pipeline(transaction=False) as pipe:
+                for stream, entry_id, event in exhausted:
+                    pipe.xadd(
+                        self.dead_letter,
+                        {
+                            "stream": stream,
+                            "id": entry_id,
+                            "group": self.group,
+                            "event": orjson.dumps(event),
+                        },
+                        maxlen=STREAM_DEAD_LETTER_MAXLEN,
+                        approximate=True,
+                    )
+                    pipe.xack(stream, self.group, entry_id)
+                await pipe.execute()
+            self.dead_lettered += len(exhausted)
+            self.processed += len(exhausted)
+        return remaining
+
+    async def _ack(self, entries: List[tuple[str, str]]):
+        if not entries:
+            return
+        by_stream: Dict[str, List[str]] = {}
+        for stream, entry_id in entries:
+            by_stream.setdefault(stream, []).append(entry_id)
+        async with redis_client.pipeline(transaction=False) as pipe:
+            for stream, ids in by_stream.items():
+                pipe.xack(stream, self.group, *ids)
+            await pipe.execute()
+        self.processed += len(entries)
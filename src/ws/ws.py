@@ -1,30 +1,73 @@
 # volta_api/vehicles/ws.py
 from __future__ import annotations
 
-import json
 import time
-from typing import Any, Dict
 
-from fastapi import APIRouter, WebSocket, WebSocketDisconnect
-from volta_api.core.redis import redis_client
-
-from volta_api.ws.auth import can_publish, verify_token
-from volta_api.ws.constants import SUPPORTED_TYPES
+import orjson
+from fastapi import APIRouter, Depends, WebSocket, WebSocketDisconnect
+
+from volta_api.auth.dependencies import get_current_admin_user
+from volta_api.auth.events import auth_events
+from volta_api.auth.revocation import revocation_store
+from volta_api.core.api_response import ApiResponse, success_response
+from volta_api.core.password_hasher import password_hasher
+from volta_api.core.security import access_token_cache
+from volta_api.ws.auth import authorize_publish, forget_grant, verify_token
+from volta_api.ws.constants import (
+    LOCATION_BATCH_MAX,
+    NEARBY_MAX_AGE_SECONDS,
+    NEARBY_MAX_RADIUS_M,
+    SUPPORTED_TYPES,
+)
+from volta_api.ws.governor import ACCEPTED, ingest_governor
+from volta_api.ws.ingest import publish_fix, publish_fixes
 from volta_api.ws.manager import manager
-from volta_api.ws.protocol import err, ok
+from volta_api.ws.history import parse_timestamp
+from volta_api.ws.protocol import dumps, err, location_event, ok, route_snapshot
+from volta_api.ws.sink import location_sink
 from volta_api.ws.store import (
-    is_sharing_active,
-    refresh_sharing,
-    save_latest_and_history,
+    find_nearby_vehicles,
+    get_latest_raw_many,
+    get_publish_state,
+    get_route_vehicle_ids,
+    is_newer_than_latest,
     set_sharing,
 )
 from volta_api.ws.topics import topic_for_route
-from volta_api.vehicles.service import get_vehicle_by_id
+from volta_api.routes.eta import eta_engine
+from volta_api.routes.stops import stop_detector
 from volta_api.routes.service import get_route_by_id
+from volta_api.users.cache import user_cache
+from volta_api.vehicles.route_index import route_index_keeper
 
 router = APIRouter(prefix="/volta/ws", tags=["vehicles"])
 
 
+@router.get(
+    "/stats",
+    response_model=ApiResponse,
+    response_model_exclude_none=True,
+    dependencies=[Depends(get_current_admin_user)],
+)
+async def ws_stats():
+    """Per-worker connection and outbound queue metrics (admin only)."""
+    return success_response(
+        data={
+            **manager.stats(),
+            "ingest": ingest_governor.stats(),
+            "eta": eta_engine.stats(),
+            "stops": stop_detector.stats(),
+            "password_hasher": password_hasher.stats(),
+            "token_cache": access_token_cache.stats(),
+            "revocations": revocation_store.stats(),
+            "auth_events": auth_events.stats(),
+            "route_index": route_index_keeper.stats(),
+            "user_cache": user_cache.stats(),
+            "location_sink": await location_sink.stats(),
+        }
+    )
+
+
 @router.websocket("")
 async def vehicle_ws(ws: WebSocket):
     """
@@ -32,7 +75,9 @@ async def vehicle_ws(ws: WebSocket):
     - client authenticates (auth)
     - commuters subscribe to routes (route.subscribe)
     - drivers/devices broadcast location (vehicle.location.broadcast)
-    - server broadcasts updates to subscribers (vehicle.location.update)
+    - devices flush buffered fixes after reconnecting (vehicle.location.batch)
+    - server broadcasts updates to subscribers (vehicle.location.update,
+      route.eta.update, vehicle.stop.arrived, vehicle.stop.departed)
     """
     await manager.connect(ws)
 
@@ -40,16 +85,20 @@ async def vehicle_ws(ws: WebSocket):
         while True:
             try:
                 raw = await ws.receive_text()
+            except (WebSocketDisconnect, RuntimeError):
+                raise  # Closed by the peer or by the writer after a failed send
             except Exception:
-                await ws.send_json(
+                manager.send(
+                    ws,
                     err("BAD_REQUEST", "Unable to read message text", None)
                 )
                 continue
 
             try:
-                msg = json.loads(raw)
-            except json.JSONDecodeError as exc:
-                await ws.send_json(
+                msg = orjson.loads(raw)
+            except orjson.JSONDecodeError as exc:
+                manager.send(
+                    ws,
                     err(
                         "BAD_REQUEST",
                         "Invalid JSON format",
@@ -60,7 +109,8 @@ async def vehicle_ws(ws: WebSocket):
                 continue
 
             if not isinstance(msg, dict):
-                await ws.send_json(
+                manager.send(
+                    ws,
                     err("BAD_REQUEST", "Message must be a JSON object", None)
                 )
                 continue
@@ -74,11 +124,12 @@ async def vehicle_ws(ws: WebSocket):
                 token = payload.get("token")
                 ctx = await verify_token(token)
                 if not ctx:
-                    await ws.send_json(err("UNAUTHORIZED", "Invalid token", request_id))
-                    await ws.close(code=1008)
+                    manager.send(ws, err("UNAUTHORIZED", "Invalid token", request_id))
+                    await manager.close(ws, 1008)
                     return
                 await manager.set_auth(ws, ctx)
-                await ws.send_json(
+                manager.send(
+                    ws,
                     ok(
                         "auth.ok",
                         request_id,
@@ -89,7 +140,7 @@ async def vehicle_ws(ws: WebSocket):
 
             # ---- PING ----
             if msg_type == "ping":
-                await ws.send_json(ok("pong", request_id, {"ts": int(time.time())}))
+                manager.send(ws, ok("pong", request_id, {"ts": int(time.time())}))
                 continue
 
             # ---- SUBSCRIBE ROUTE ----
@@ -97,7 +148,8 @@ async def vehicle_ws(ws: WebSocket):
                 route_id = payload.get("route_id")
 
                 if route_id is None:
-                    await ws.send_json(
+                    manager.send(
+                        ws,
                         err("BAD_REQUEST", "route_id is required", request_id)
                     )
                     continue
@@ -105,20 +157,29 @@ async def vehicle_ws(ws: WebSocket):
                 try:
                     route_id = int(route_id)
                 except (TypeError, ValueError):
-                    await ws.send_json(
+                    manager.send(
+                        ws,
                         err("BAD_REQUEST", "route_id must be an integer", request_id)
                     )
                     continue
 
                 route = await get_route_by_id(route_id)
                 if not route:
-                    await ws.send_json(err("NOT_FOUND", "Route not found", request_id))
+                    manager.send(ws, err("NOT_FOUND", "Route not found", request_id))
                     continue
 
                 topic = topic_for_route(route_id)
                 await manager.subscribe(ws, topic)
-                await ws.send_json(
-                    ok("route.subscribe.ok", request_id, {"route_id": route_id})
+                # Read latest positions only after subscribing so that any live
+                # update queued meanwhile is at least as new as the snapshot.
+                vehicle_ids = await get_route_vehicle_ids(route_id)
+                updates = await get_latest_raw_many(vehicle_ids)
+                # Both go ahead of live updates queued since subscribing:
+                # the ack first, then the snapshot.
+                manager.send_first(ws, route_snapshot(route_id, updates))
+                manager.send_first(
+                    ws,
+                    dumps(ok("route.subscribe.ok", request_id, {"route_id": route_id})),
                 )
                 continue
 
@@ -127,7 +188,8 @@ async def vehicle_ws(ws: WebSocket):
                 route_id = payload.get("route_id")
 
                 if route_id is None:
-                    await ws.send_json(
+                    manager.send(
+                        ws,
                         err("BAD_REQUEST", "route_id is required", request_id)
                     )
                     continue
@@ -135,23 +197,93 @@ async def vehicle_ws(ws: WebSocket):
                 try:
                     route_id = int(route_id)
                 except (TypeError, ValueError):
-                    await ws.send_json(
+                    manager.send(
+                        ws,
                         err("BAD_REQUEST", "route_id must be an integer", request_id)
                     )
                     continue
 
                 topic = topic_for_route(route_id)
                 await manager.unsubscribe(ws, topic)
-                await ws.send_json(
+                manager.send(
+                    ws,
                     ok("route.unsubscribe.ok", request_id, {"route_id": route_id})
                 )
                 continue
 
+            # ---- NEARBY VEHICLES ----
+            if msg_type == "vehicle.nearby":
+                try:
+                    lat = float(payload["lat"])
+                    lng = float(payload["lng"])
+                    radius_m = float(payload.get("radius_m", 1000))
+                    page = int(payload.get("page", 1))
+                    page_size = int(payload.get("page_size", 20))
+                    max_age_s = int(payload.get("max_age_s", NEARBY_MAX_AGE_SECONDS))
+                except (KeyError, TypeError, ValueError):
+                    manager.send(
+                        ws,
+                        err(
+                            "BAD_REQUEST",
+                            "lat and lng are required numbers",
+                            request_id,
+                            extra={
+                                "expected": {
+                                    "lat": "number",
+                                    "lng": "number",
+                                    "radius_m": "number",
+                                    "page": "integer",
+                                    "page_size": "integer",
+                                    "max_age_s": "integer",
+                                }
+                            },
+                        ),
+                    )
+                    continue
+
+                if (
+                    not -90 <= lat <= 90
+                    or not -180 <= lng <= 180
+                    or not 0 < radius_m <= NEARBY_MAX_RADIUS_M
+                    or page < 1
+                    or not 1 <= page_size <= 100
+                    or max_age_s < 1
+                ):
+                    manager.send(
+                        ws,
+                        err("BAD_REQUEST", "Nearby query out of range", request_id),
+                    )
+                    continue
+
+                vehicles, total = await find_nearby_vehicles(
+                    lat,
+                    lng,
+                    radius_m,
+                    offset=(page - 1) * page_size,
+                    limit=page_size,
+                    max_age_seconds=max_age_s,
+                )
+                manager.send(
+                    ws,
+                    ok(
+                        "vehicle.nearby.ok",
+                        request_id,
+                        {
+                            "vehicles": vehicles,
+                            "total": total,
+                            "page": page,
+                            "page_size": page_size,
+                        },
+                    ),
+                )
+                continue
+
             # ---- SHARE LOCATION ----
             if msg_type == "vehicle.location.share":
                 ctx = manager.get_auth(ws)
                 if not ctx:
-                    await ws.send_json(
+                    manager.send(
+                        ws,
                         err(
                             "UNAUTHORIZED",
                             "Authenticate first with type=auth",
@@ -164,7 +296,8 @@ async def vehicle_ws(ws: WebSocket):
                 enabled = payload.get("enabled", True)
 
                 if vehicle_id is None:
-                    await ws.send_json(
+                    manager.send(
+                        ws,
                         err("BAD_REQUEST", "vehicle_id is required", request_id)
                     )
                     continue
@@ -172,13 +305,16 @@ async def vehicle_ws(ws: WebSocket):
                 try:
                     vehicle_id = int(vehicle_id)
                 except (TypeError, ValueError):
-                    await ws.send_json(
+                    manager.send(
+                        ws,
                         err("BAD_REQUEST", "vehicle_id must be an integer", request_id)
                     )
                     continue
 
-                if not await can_publish(ctx, vehicle_id):
-                    await ws.send_json(
+                _, error_code = await authorize_publish(ctx, vehicle_id)
+                if error_code == "FORBIDDEN":
+                    manager.send(
+                        ws,
                         err(
                             "FORBIDDEN",
                             "Not allowed to share for this vehicle",
@@ -186,9 +322,18 @@ async def vehicle_ws(ws: WebSocket):
                         )
                     )
                     continue
+                if error_code == "NOT_FOUND":
+                    manager.send(
+                        ws,
+                        err("NOT_FOUND", "Vehicle not found", request_id)
+                    )
+                    continue
 
                 await set_sharing(vehicle_id, bool(enabled))
-                await ws.send_json(
+                if not enabled:
+                    forget_grant(ctx, vehicle_id)
+                manager.send(
+                    ws,
                     ok(
                         "vehicle.location.share.ok",
                         request_id,
@@ -201,7 +346,8 @@ async def vehicle_ws(ws: WebSocket):
             if msg_type == "vehicle.location.broadcast":
                 ctx = manager.get_auth(ws)
                 if not ctx:
-                    await ws.send_json(
+                    manager.send(
+                        ws,
                         err(
                             "UNAUTHORIZED",
                             "Authenticate first with type=auth",
@@ -215,7 +361,8 @@ async def vehicle_ws(ws: WebSocket):
                 lng = payload.get("lng")
 
                 if vehicle_id is None or lat is None or lng is None:
-                    await ws.send_json(
+                    manager.send(
+                        ws,
                         err(
                             "BAD_REQUEST",
                             "vehicle_id, lat, lng are required",
@@ -234,13 +381,16 @@ async def vehicle_ws(ws: WebSocket):
                 try:
                     vehicle_id = int(vehicle_id)
                 except (TypeError, ValueError):
-                    await ws.send_json(
+                    manager.send(
+                        ws,
                         err("BAD_REQUEST", "vehicle_id must be an integer", request_id)
                     )
                     continue
 
-                if not await is_sharing_active(vehicle_id):
-                    await ws.send_json(
+                sharing, route_id = await get_publish_state(vehicle_id)
+                if not sharing:
+                    manager.send(
+                        ws,
                         err(
                             "SHARING_NOT_ACTIVE",
                             "Start sharing before broadcasting location",
@@ -249,8 +399,10 @@ async def vehicle_ws(ws: WebSocket):
                     )
                     continue
 
-                if not await can_publish(ctx, vehicle_id):
-                    await ws.send_json(
+                grant, error_code = await authorize_publish(ctx, vehicle_id)
+                if error_code == "FORBIDDEN":
+                    manager.send(
+                        ws,
                         err(
                             "FORBIDDEN",
                             "Not allowed to broadcast for this vehicle",
@@ -258,46 +410,181 @@ async def vehicle_ws(ws: WebSocket):
                         )
                     )
                     continue
+                if error_code == "NOT_FOUND":
+                    manager.send(
+                        ws,
+                        err("NOT_FOUND", "Vehicle not found", request_id)
+                    )
+                    continue
+
+                try:
+                    event = location_event(
+                        vehicle_id, grant.plate_number, route_id, payload
+                    )
+                except (TypeError, ValueError) as exc:
+                    manager.send(ws, err("BAD_REQUEST", str(exc), request_id))
+                    continue
+                decision = ingest_governor.offer(vehicle_id, route_id, event)
+                if decision == ACCEPTED:
+                    await publish_fix(vehicle_id, route_id, event)
+
+                manager.send(
+                    ws,
+                    ok(
+                        "vehicle.location.ack",
+                        request_id,
+                        {"status": "ok" if decision == ACCEPTED else decision},
+                    )
+                )
+                continue
+
+            # ---- BATCH LOCATION ----
+            if msg_type == "vehicle.location.batch":
+                ctx = manager.get_auth(ws)
+                if not ctx:
+                    manager.send(
+                        ws,
+                        err(
+                            "UNAUTHORIZED",
+                            "Authenticate first with type=auth",
+                            request_id,
+                        )
+                    )
+                    continue
+
+                vehicle_id = payload.get("vehicle_id")
+                fixes = payload.get("fixes")
+
+                if (
+                    vehicle_id is None
+                    or not isinstance(fixes, list)
+                    or not fixes
+                ):
+                    manager.send(
+                        ws,
+                        err(
+                            "BAD_REQUEST",
+                            "vehicle_id and a non-empty fixes array are required",
+                            request_id,
+                            extra={
+                                "expected": {
+                                    "vehicle_id": "integer",
+                                    "fixes": "[{lat, lng, recorded_at, ...}]",
+                                }
+                            },
+                        )
+                    )
+                    continue
+
+                if len(fixes) > LOCATION_BATCH_MAX:
+                    manager.send(
+                        ws,
+                        err(
+                            "BAD_REQUEST",
+                            f"At most {LOCATION_BATCH_MAX} fixes per batch",
+                            request_id,
+                        )
+                    )
+                    continue
+
+                try:
+                    vehicle_id = int(vehicle_id)
+                except (TypeError, ValueError):
+                    manager.send(
+                        ws,
+                        err("BAD_REQUEST", "vehicle_id must be an integer", request_id)
+                    )
+                    continue
 
-                vehicle = await get_vehicle_by_id(vehicle_id)
-                if not vehicle:
-                    await ws.send_json(
+                sharing, route_id = await get_publish_state(vehicle_id)
+                if not sharing:
+                    manager.send(
+                        ws,
+                        err(
+                            "SHARING_NOT_ACTIVE",
+                            "Start sharing before broadcasting location",
+                            request_id,
+                        )
+                    )
+                    continue
+
+                grant, error_code = await authorize_publish(ctx, vehicle_id)
+                if error_code == "FORBIDDEN":
+                    manager.send(
+                        ws,
+                        err(
+                            "FORBIDDEN",
+                            "Not allowed to broadcast for this vehicle",
+                            request_id,
+                        )
+                    )
+                    continue
+                if error_code == "NOT_FOUND":
+                    manager.send(
+                        ws,
                         err("NOT_FOUND", "Vehicle not found", request_id)
                     )
                     continue
 
-                event: Dict[str, Any] = {
-                    "type": "vehicle.location.update",
-                    "data": {
-                        "vehicle_id": vehicle_id,
-                        "plate_number": vehicle.plate_number,
-                        "route_id": vehicle.route_id,
-                        "lat": float(lat),
-                        "lng": float(lng),
-                        "heading": payload.get("heading"),
-                        "speed_mps": payload.get("speed_mps"),
-                        "accuracy_m": payload.get("accuracy_m"),
-                        "recorded_at": payload.get("recorded_at"),
-                        "received_at": time.strftime(
-                            "%Y-%m-%dT%H:%M:%SZ", time.gmtime()
-                        ),
-                    },
-                }
-
-                await save_latest_and_history(vehicle_id, event)
-                channel = f"vehicle:{vehicle_id}:updates"
-                await redis_client.publish(channel, json.dumps(event))
-                if vehicle.route_id is not None:
-                    route_channel = f"route:{vehicle.route_id}:updates"
-                    await redis_client.publish(route_channel, json.dumps(event))
-                await refresh_sharing(vehicle_id)
-
-                await ws.send_json(
-                    ok("vehicle.location.ack", request_id, {"status": "ok"})
+                received_at = time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime())
+                accepted = []
+                rejected = []
+                for index, fix in enumerate(fixes):
+                    try:
+                        event = location_event(
+                            vehicle_id,
+                            grant.plate_number,
+                            route_id,
+                            fix,
+                            received_at,
+                        )
+                    except (KeyError, TypeError, ValueError):
+                        rejected.append(index)
+                        continue
+                    accepted.append(
+                        (parse_timestamp(event["data"]["recorded_at"]) or 0, index, event)
+                    )
+
+                if not accepted:
+                    manager.send(
+                        ws,
+                        err(
+                            "BAD_REQUEST",
+                            "No valid fixes in batch",
+                            request_id,
+                            extra={"rejected": rejected},
+                        )
+                    )
+                    continue
+
+                # Devices may flush their buffer out of order; history wants
+                # oldest first and the newest fix becomes the live position.
+                accepted.sort(key=lambda item: (item[0], item[1]))
+                events = [event for _, _, event in accepted]
+                # Clients usually resume live broadcasts before flushing their
+                # offline buffer; an older backlog must not become the position.
+                live = await is_newer_than_latest(vehicle_id, events[-1])
+                if live:
+                    ingest_governor.note_published(vehicle_id, events[-1])
+                await publish_fixes(vehicle_id, route_id, events, live=live)
+
+                manager.send(
+                    ws,
+                    ok(
+                        "vehicle.location.batch.ack",
+                        request_id,
+                        {
+                            "status": "ok",
+                            "accepted": len(events),
+                            "rejected": rejected,
+                            "live": live,
+                        },
+                    )
                 )
                 continue
 
-            await ws.send_json(
+            manager.send(
+                ws,
                 err(
                     "UNKNOWN_TYPE",
                     f"Unknown type: {msg_type}",
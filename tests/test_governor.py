@@ -0,0 +1,101 @@
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+from volta_api.ws import governor as governor_module
+from volta_api.ws.governor import ACCEPTED, CONFLATED, DROPPED, IngestGovernor
+
+MIN_INTERVAL = 0.05
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def monotonic(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(
+        governor_module, "time", SimpleNamespace(monotonic=clock.monotonic)
+    )
+    return clock
+
+
+@pytest.fixture
+def published():
+    return []
+
+
+@pytest.fixture
+def governor(clock, published):
+    async def publish(vehicle_id, route_id, event):
+        published.append((vehicle_id, route_id, event))
+
+    return IngestGovernor(
+        publish, min_interval=MIN_INTERVAL, min_distance_m=20, max_silence=30
+    )
+
+
+def _fix(lat, lng=39.28):
+    return {"type": "vehicle.location.update", "data": {"lat": lat, "lng": lng}}
+
+
+def test_first_fix_is_accepted(governor):
+    assert governor.offer(1, 3, _fix(-6.8)) == ACCEPTED
+
+
+def test_fix_that_barely_moved_is_dropped(governor, clock):
+    governor.offer(1, 3, _fix(-6.8))
+    clock.now += 5
+
+    assert governor.offer(1, 3, _fix(-6.80001)) == DROPPED
+    assert governor.dropped == 1
+
+
+def test_parked_vehicle_is_let_through_after_max_silence(governor, clock):
+    governor.offer(1, 3, _fix(-6.8))
+    clock.now += 30
+
+    assert governor.offer(1, 3, _fix(-6.80001)) == ACCEPTED
+
+
+def test_moving_fix_after_the_interval_is_accepted(governor, clock):
+    governor.offer(1, 3, _fix(-6.8))
+    clock.now += 1
+
+    assert governor.offer(1, 3, _fix(-6.801)) == ACCEPTED
+
+
+@pytest.mark.anyio
+async def test_fixes_inside_the_interval_are_conflated_to_the_newest(
+    governor, published
+):
+    governor.offer(1, 3, _fix(-6.8))
+
+    assert governor.offer(1, 3, _fix(-6.801)) == CONFLATED
+    assert governor.offer(1, 3, _fix(-6.802)) == CONFLATED
+    assert published == []
+
+    await asyncio.sleep(MIN_INTERVAL * 3)
+
+    assert published == [(1, 3, _fix(-6.802))]
+    assert governor.superseded == 1
+    assert governor.flushed == 1
+
+
+@pytest.mark.anyio
+async def test_accepted_fix_cancels_the_pending_flush(governor, clock, published):
+    governor.offer(1, 3, _fix(-6.8))
+    governor.offer(1, 3, _fix(-6.801))
+    clock.now += 1
+
+    assert governor.offer(1, 3, _fix(-6.802)) == ACCEPTED
+    await asyncio.sleep(MIN_INTERVAL * 3)
+
+    assert published == []
+    assert governor.superseded == 1
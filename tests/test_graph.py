@@ -0,0 +1,137 @@
+import heapq
+import json
+import math
+import random
+
+import pytest
+
+from volta_api.core.geo import haversine_m
+from volta_api.nodes import graph as graph_module
+from volta_api.nodes.graph import CSRGraph, load_graph
+
+
+def _dijkstra(adjacency, source, target):
+    best = {source: 0.0}
+    heap = [(0.0, source)]
+    while heap:
+        cost, node = heapq.heappop(heap)
+        if node == target:
+            return cost
+        if cost > best[node]:
+            continue
+        for neighbor, weight in adjacency.get(node, {}).items():
+            candidate = cost + weight
+            if candidate < best.get(neighbor, math.inf):
+                best[neighbor] = candidate
+                heapq.heappush(heap, (candidate, neighbor))
+    return None
+
+
+def _grid(size=6, seed=7):
+    """A road-like grid with great-circle weights rounded like the data files."""
+    rng = random.Random(seed)
+    coordinates = {
+        f"N{r}-{c}": (
+            -6.8 + r * 0.002 + rng.uniform(-3e-4, 3e-4),
+            39.2 + c * 0.002 + rng.uniform(-3e-4, 3e-4),
+        )
+        for r in range(size)
+        for c in range(size)
+    }
+    adjacency = {code: {} for code in coordinates}
+    for r in range(size):
+        for c in range(size):
+            for dr, dc in ((0, 1), (1, 0), (0, -1), (-1, 0)):
+                nr, nc = r + dr, c + dc
+                if not (0 <= nr < size and 0 <= nc < size) or rng.random() < 0.2:
+                    continue
+                a, b = f"N{r}-{c}", f"N{nr}-{nc}"
+                adjacency[a][b] = round(
+                    haversine_m(*coordinates[a], *coordinates[b]), 1
+                )
+    return adjacency, coordinates
+
+
+def test_shortest_path_on_a_small_graph():
+    adjacency = {"A": {"B": 1, "C": 5}, "B": {"C": 1}, "C": {"D": 1}}
+    graph = CSRGraph(adjacency, {})
+
+    result = graph.shortest_path("A", "D")
+
+    assert result.codes == ("A", "B", "C", "D")
+    assert result.distance_m == 3
+    assert graph.node_count == 4
+    assert graph.edge_count == 4
+
+
+def test_unreachable_target_returns_none():
+    graph = CSRGraph({"A": {"B": 1}, "C": {"A": 1}}, {})
+
+    assert graph.shortest_path("A", "C") is None
+
+
+def test_unknown_node_raises_key_error():
+    graph = CSRGraph({"A": {"B": 1}}, {})
+
+    with pytest.raises(KeyError):
+        graph.shortest_path("A", "Z")
+
+
+@pytest.mark.parametrize("drop_coordinates", [False, True])
+def test_a_star_matches_dijkstra(drop_coordinates):
+    adjacency, coordinates = _grid()
+    if drop_coordinates:
+        # Some nodes have no coordinates; their estimate falls back to zero.
+        coordinates = {
+            code: position
+            for i, (code, position) in enumerate(sorted(coordinates.items()))
+            if i % 3
+        }
+    graph = CSRGraph(adjacency, coordinates)
+
+    for source in adjacency:
+        for target in adjacency:
+            expected = _dijkstra(adjacency, source, target)
+            result = graph.shortest_path(source, target)
+            if expected is None:
+                assert result is None
+                continue
+            assert result.distance_m == pytest.approx(expected, abs=0.01)
+            assert result.codes[0] == source and result.codes[-1] == target
+            walked = sum(
+                adjacency[a][b] for a, b in zip(result.codes, result.codes[1:])
+            )
+            assert walked == pytest.approx(expected, abs=0.01)
+
+
+def test_heuristic_expands_fewer_nodes_than_dijkstra():
+    adjacency, coordinates = _grid(size=10)
+    informed = CSRGraph(adjacency, coordinates)
+    blind = CSRGraph(adjacency, {})
+
+    source, target = "N0-0", "N9-9"
+    with_heuristic = informed.shortest_path(source, target)
+    without = blind.shortest_path(source, target)
+
+    assert with_heuristic.distance_m == without.distance_m
+    assert with_heuristic.expanded < without.expanded
+
+
+def test_load_graph_reads_adjacency_and_nodes(tmp_path, monkeypatch):
+    (tmp_path / "graph.json").write_text(json.dumps({"A": {"B": 10.5}}))
+    (tmp_path / "nodes.csv").write_text(
+        "code,lat,lng\nA,-6.8,39.2\nB,-6.8001,39.2\nC,bad,39.2\n"
+    )
+
+    graph = load_graph(tmp_path)
+
+    assert graph.codes == ["A", "B"]
+    assert graph.has_coordinates(graph.index["A"])
+    assert graph.shortest_path("A", "B").distance_m == 10.5
+
+    monkeypatch.setattr(graph_module, "_graph", None)
+    graph_module.init_graph(tmp_path)
+    graph_module.cached_shortest_path("A", "B")
+    graph_module.cached_shortest_path("A", "B")
+    assert graph_module.path_cache_stats()["hits"] == 1
+    graph_module.cached_shortest_path.cache_clear()
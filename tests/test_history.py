@@ -0,0 +1,68 @@
+import orjson
+import pytest
+
+from volta_api.ws.history import RECORD, decode_fix, decode_fixes, encode_fix
+
+
+def _data(**overrides):
+    data = {
+        "vehicle_id": 7,
+        "plate_number": "T-123-ABC",
+        "route_id": 3,
+        "lat": -6.8123456,
+        "lng": 39.2812345,
+        "heading": 90.5,
+        "speed_mps": 8.25,
+        "accuracy_m": 4.5,
+        "recorded_at": "2026-01-01T06:00:00Z",
+        "received_at": "2026-01-01T06:00:02Z",
+    }
+    data.update(overrides)
+    return data
+
+
+def test_round_trip():
+    record = encode_fix(_data())
+
+    assert len(record) == RECORD.size
+    assert decode_fix(record, 7, "T-123-ABC") == {
+        "type": "vehicle.location.update",
+        "data": _data(),
+    }
+
+
+def test_missing_fields_decode_as_none():
+    data = _data(
+        route_id=None, heading=None, speed_mps=None, accuracy_m=None, recorded_at=None
+    )
+
+    assert decode_fix(encode_fix(data), 7, "T-123-ABC")["data"] == data
+
+
+def test_heading_wraps_and_large_values_clamp():
+    data = decode_fix(encode_fix(_data(heading=-90, speed_mps=1e6)), 7, None)["data"]
+
+    assert data["heading"] == 270
+    assert data["speed_mps"] == 655.34
+
+
+@pytest.mark.parametrize("route_id", [-1, 2**32])
+def test_route_id_outside_uint32_is_rejected(route_id):
+    with pytest.raises(ValueError, match="route_id"):
+        encode_fix(_data(route_id=route_id))
+
+
+def test_largest_route_id_round_trips():
+    record = encode_fix(_data(route_id=2**32 - 1))
+
+    assert decode_fix(record, 7, None)["data"]["route_id"] == 2**32 - 1
+
+
+def test_legacy_json_entries_still_decode():
+    event = {"type": "vehicle.location.update", "data": _data()}
+    records = [orjson.dumps(event), encode_fix(_data(route_id=4))]
+
+    decoded = decode_fixes(records, 7, "T-123-ABC")
+
+    assert decoded[0] == event
+    assert decoded[1]["data"]["route_id"] == 4
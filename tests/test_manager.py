@@ -0,0 +1,117 @@
+import asyncio
+
+import pytest
+
+from volta_api.ws.manager import ConnectionManager
+
+
+class FakeSocket:
+    def __init__(self):
+        self.sent = []
+        self.closed = None
+        self.fail = False
+
+    async def accept(self):
+        pass
+
+    async def send_text(self, text: str):
+        if self.fail:
+            raise ConnectionError("gone")
+        self.sent.append(text)
+
+    async def close(self, code: int = 1000):
+        self.closed = code
+
+
+@pytest.fixture
+async def manager(redis):
+    manager = ConnectionManager()
+    # Start the listener up front and let it subscribe, so tests don't race it.
+    await manager._ensure_redis_listener()
+    while manager._pubsub is None:
+        await asyncio.sleep(0)
+    yield manager
+    for ws in list(manager.active):
+        await manager.disconnect(ws)
+    tasks = [manager._listener_task, *manager._pending_releases.values()]
+    for task in tasks:
+        task.cancel()
+    await asyncio.gather(*tasks, return_exceptions=True)
+
+
+@pytest.mark.anyio
+async def test_replies_go_through_the_socket_writer(manager):
+    ws = FakeSocket()
+    await manager.connect(ws)
+    manager.send(ws, {"type": "pong"})
+    await manager.senders[ws].drain(1)
+
+    assert ws.sent == ['{"type":"pong"}']
+
+
+@pytest.mark.anyio
+async def test_failed_send_closes_socket_and_drops_its_state(manager):
+    ws = FakeSocket()
+    await manager.connect(ws)
+    await manager.set_auth(ws, object())
+    await manager.subscribe(ws, "route:1")
+
+    ws.fail = True
+    manager.send(ws, {"type": "pong"})
+    await asyncio.sleep(0.01)
+
+    assert ws.closed == 1011
+    assert ws not in manager.active
+    assert manager.get_auth(ws) is None
+    assert "route:1" not in manager.topic_subs
+
+
+@pytest.fixture
+def short_grace(monkeypatch):
+    monkeypatch.setattr("volta_api.ws.manager.CHANNEL_RELEASE_GRACE_SECONDS", 0.01)
+
+
+@pytest.mark.anyio
+async def test_channel_is_shared_by_subscribers(manager):
+    first, second = FakeSocket(), FakeSocket()
+    await manager.connect(first)
+    await manager.connect(second)
+    await manager.subscribe(first, "route:1")
+    await manager.subscribe(second, "route:1")
+
+    assert manager._channel_refs["route:1:updates"] == 2
+    assert manager.redis_subscribes == 1
+
+    await manager.unsubscribe(first, "route:1")
+
+    assert manager._channel_refs["route:1:updates"] == 1
+    assert "route:1:updates" not in manager._pending_releases
+
+
+@pytest.mark.anyio
+async def test_last_release_drops_channel_after_grace(manager, short_grace):
+    ws = FakeSocket()
+    await manager.connect(ws)
+    await manager.subscribe(ws, "route:1")
+    await manager.disconnect(ws)
+
+    assert "route:1:updates" in manager._redis_channels
+    await manager._pending_releases["route:1:updates"]
+
+    assert "route:1:updates" not in manager._redis_channels
+    assert manager.redis_unsubscribes == 1
+
+
+@pytest.mark.anyio
+async def test_resubscribe_within_grace_keeps_channel(manager, short_grace):
+    ws = FakeSocket()
+    await manager.connect(ws)
+    await manager.subscribe(ws, "route:1")
+    await manager.unsubscribe(ws, "route:1")
+    await manager.subscribe(ws, "route:1")
+    await asyncio.sleep(0.05)
+
+    assert "route:1:updates" in manager._redis_channels
+    assert manager._channel_refs["route:1:updates"] == 1
+    assert manager.redis_subscribes == 1
+    assert manager.redis_unsubscribes == 0
@@ -0,0 +1,90 @@
+import asyncio
+
+import pytest
+
+from volta_api.ws.outbound import SocketSender
+
+
+class FakeSocket:
+    def __init__(self, fail: bool = False):
+        self.fail = fail
+        self.sent = []
+
+    async def send_text(self, text: str):
+        if self.fail:
+            raise ConnectionError("gone")
+        self.sent.append(text)
+
+
+async def _no_error(ws):
+    raise AssertionError("send should not fail")
+
+
+def _sender(ws, max_queue=4, on_error=_no_error):
+    return SocketSender(ws, max_queue=max_queue, on_error=on_error)
+
+
+async def _drained(sender):
+    await sender.drain(1)
+
+
+@pytest.mark.anyio
+async def test_conflation_keeps_only_newest_frame_per_key():
+    ws = FakeSocket()
+    sender = _sender(ws)
+    sender.enqueue("v1-a", "vehicle:1")
+    sender.enqueue("v2-a", "vehicle:2")
+    sender.enqueue("v1-b", "vehicle:1")
+    sender.start()
+    await _drained(sender)
+
+    # The newer frame takes the older one's place in the queue.
+    assert ws.sent == ["v1-b", "v2-a"]
+    assert sender.conflated == 1
+    sender.close()
+
+
+@pytest.mark.anyio
+async def test_full_queue_drops_oldest_frame():
+    ws = FakeSocket()
+    sender = _sender(ws, max_queue=2)
+    for text in ("a", "b", "c"):
+        sender.enqueue(text)
+    sender.start()
+    await _drained(sender)
+
+    assert ws.sent == ["b", "c"]
+    assert sender.dropped == 1
+    sender.close()
+
+
+@pytest.mark.anyio
+async def test_send_first_jumps_the_queue():
+    ws = FakeSocket()
+    sender = _sender(ws)
+    sender.enqueue("live", "vehicle:1")
+    sender.enqueue("snapshot", front=True)
+    sender.start()
+    await _drained(sender)
+
+    assert ws.sent == ["snapshot", "live"]
+    sender.close()
+
+
+@pytest.mark.anyio
+async def test_failed_send_reports_once_and_stops_writer():
+    ws = FakeSocket(fail=True)
+    errors = []
+
+    async def on_error(socket):
+        errors.append(socket)
+
+    sender = _sender(ws, on_error=on_error)
+    sender.enqueue("a")
+    sender.enqueue("b")
+    sender.start()
+    await asyncio.sleep(0.01)
+
+    assert errors == [ws]
+    assert sender.sent == 0
+    sender.close()
@@ -0,0 +1,80 @@
+import base64
+
+import pytest
+from fastapi import HTTPException
+
+from volta_api.core.pagination import (
+    approximate_count,
+    decode_cursor,
+    encode_cursor,
+    keyset_page,
+)
+
+
+def _raw_cursor(payload: bytes) -> str:
+    return base64.urlsafe_b64encode(payload).rstrip(b"=").decode("ascii")
+
+
+@pytest.mark.parametrize("last_id", [0, 1, 42, 2**40])
+def test_cursor_round_trip(last_id):
+    cursor = encode_cursor(last_id)
+
+    assert "=" not in cursor
+    assert decode_cursor(cursor) == last_id
+
+
+def test_empty_cursor_starts_from_the_beginning():
+    assert decode_cursor("") == 0
+
+
+@pytest.mark.parametrize(
+    "cursor",
+    [
+        "not a cursor",
+        _raw_cursor(b"[]"),
+        _raw_cursor(b'{"page": 2}'),
+        _raw_cursor(b'{"id": "7"}'),
+        _raw_cursor(b'{"id": -1}'),
+        _raw_cursor(b'{"id": 1.5}'),
+        _raw_cursor(b'{"id": true}'),
+    ],
+)
+def test_invalid_cursor_is_a_400(cursor):
+    with pytest.raises(HTTPException) as exc:
+        decode_cursor(cursor)
+
+    assert exc.value.status_code == 400
+
+
+def test_keyset_page_with_more_rows():
+    rows = [{"id": i} for i in (3, 5, 8)]
+
+    items, meta = keyset_page(rows, 2, total=10)
+
+    assert items == rows[:2]
+    assert meta.has_more is True
+    assert decode_cursor(meta.next_cursor) == 5
+    assert meta.total == 10
+    assert meta.total_is_approximate is True
+
+
+def test_keyset_page_last_page():
+    items, meta = keyset_page([{"id": 3}], 2)
+
+    assert items == [{"id": 3}]
+    assert meta.has_more is False
+    assert meta.next_cursor is None
+    assert meta.total_is_approximate is None
+
+
+@pytest.mark.anyio
+async def test_approximate_count_is_cached_per_key():
+    calls = []
+
+    async def count():
+        calls.append(1)
+        return len(calls)
+
+    assert await approximate_count(("test", 1), count) == 1
+    assert await approximate_count(("test", 1), count) == 1
+    assert await approximate_count(("test", 2), count) == 2
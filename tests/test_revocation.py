@@ -0,0 +1,136 @@
+from types import SimpleNamespace
+
+import orjson
+import pytest
+
+from volta_api.auth import revocation as revocation_module
+from volta_api.auth.events import AuthEvents
+from volta_api.auth.revocation import (
+    REVOKED_TOKEN_KEY,
+    TOKEN_REVOKED_EVENT,
+    RevocationStore,
+)
+from volta_api.core import security
+from volta_api.core.security import (
+    access_token_cache,
+    create_access_token,
+    token_hash,
+    verify_access_token,
+)
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1_800_000_000.0
+
+    def time(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(revocation_module, "time", SimpleNamespace(time=clock.time))
+    return clock
+
+
+@pytest.fixture
+def store(monkeypatch):
+    store = RevocationStore()
+    monkeypatch.setattr(security, "revocation_store", store)
+    return store
+
+
+def test_revocation_lasts_until_the_token_expires(store, clock):
+    store._add("a", clock.now + 60)
+    store._add("b", clock.now + 120)
+
+    assert store.is_revoked("a")
+    clock.now += 60
+    assert not store.is_revoked("a")
+    assert store.is_revoked("b")
+    assert store.stats()["heap"] == 1
+
+
+def test_already_expired_tokens_are_ignored(store, clock):
+    store._add("a", clock.now - 1)
+
+    assert not store.is_revoked("a")
+    assert store.stats()["heap"] == 0
+
+
+def test_later_expiry_wins_over_stale_heap_entry(store, clock):
+    store._add("a", clock.now + 60)
+    store._add("a", clock.now + 120)
+    clock.now += 90
+
+    assert store.is_revoked("a")
+    assert store.expired == 0
+
+
+def test_announced_revocations_are_applied(store, clock):
+    events = AuthEvents()
+    events.on(TOKEN_REVOKED_EVENT, store._on_revoked)
+
+    events._dispatch(
+        orjson.dumps(
+            {"type": TOKEN_REVOKED_EVENT, "token_hash": "a", "exp": clock.now + 60}
+        )
+    )
+
+    assert store.is_revoked("a")
+    assert events.received == 1
+
+
+@pytest.mark.anyio
+async def test_revoke_writes_redis_key_and_announces(
+    store, clock, redis, monkeypatch
+):
+    inserted = []
+
+    async def insert_revoked_token(token_hash, expires_at):
+        inserted.append(token_hash)
+
+    monkeypatch.setattr(
+        revocation_module, "insert_revoked_token", insert_revoked_token
+    )
+    pubsub = redis.pubsub(ignore_subscribe_messages=True)
+    await pubsub.subscribe("auth:events")
+
+    await store.revoke("a", clock.now + 60)
+
+    key = REVOKED_TOKEN_KEY.format(token_hash="a")
+    assert store.is_revoked("a")
+    assert inserted == ["a"]
+    assert await redis.get(key) == str(int(clock.now + 60))
+    assert 0 < await redis.ttl(key) <= 61
+    # The first read may only consume the subscribe confirmation.
+    for _ in range(3):
+        message = await pubsub.get_message(timeout=1)
+        if message is not None:
+            break
+    assert orjson.loads(message["data"])["token_hash"] == "a"
+    await pubsub.aclose()
+
+
+@pytest.mark.anyio
+async def test_resync_reloads_keys_from_redis(store, clock, redis):
+    await redis.set(REVOKED_TOKEN_KEY.format(token_hash="a"), int(clock.now + 60))
+    await redis.set(REVOKED_TOKEN_KEY.format(token_hash="b"), int(clock.now + 60))
+
+    await store.resync()
+
+    assert store.is_revoked("a")
+    assert store.is_revoked("b")
+    assert store.resyncs == 1
+
+
+def test_revoked_token_is_rejected_even_when_cached(store):
+    access_token_cache.clear()
+    token = create_access_token("user-1")
+    assert verify_access_token(token) == "user-1"
+
+    store._add(token_hash(token), security.time.time() + 60)
+
+    assert verify_access_token(token) is None
+    assert access_token_cache.get(token_hash(token)) is None
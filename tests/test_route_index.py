@@ -0,0 +1,63 @@
+import pytest
+
+from volta_api.ws.store import (
+    claim_route_index_rebuild,
+    get_publish_state,
+    get_route_vehicle_ids,
+    index_vehicle_route,
+    is_route_index_ready,
+    load_route_index,
+    set_sharing,
+    unindex_route,
+)
+
+
+@pytest.mark.anyio
+async def test_moving_a_vehicle_updates_both_directions(redis):
+    await index_vehicle_route(7, None, 1)
+    await index_vehicle_route(7, 1, 2)
+
+    assert await get_route_vehicle_ids(1) == []
+    assert await get_route_vehicle_ids(2) == [7]
+    assert await get_publish_state(7) == (False, 2)
+
+    await index_vehicle_route(7, 2, None)
+
+    assert await get_route_vehicle_ids(2) == []
+    assert await get_publish_state(7) == (False, None)
+
+
+@pytest.mark.anyio
+async def test_publish_state_reports_sharing(redis):
+    await index_vehicle_route(7, None, 1)
+    await set_sharing(7, True)
+
+    assert await get_publish_state(7) == (True, 1)
+
+
+@pytest.mark.anyio
+async def test_unindex_route_clears_reverse_entries(redis):
+    await index_vehicle_route(7, None, 1)
+    await index_vehicle_route(8, None, 1)
+    await index_vehicle_route(9, None, 2)
+
+    assert sorted(await unindex_route(1)) == [7, 8]
+    assert await get_publish_state(7) == (False, None)
+    assert await get_publish_state(9) == (False, 2)
+
+
+@pytest.mark.anyio
+async def test_rebuild_replaces_the_index_and_releases_the_lock(redis):
+    await index_vehicle_route(7, None, 1)
+
+    assert await claim_route_index_rebuild()
+    assert not await claim_route_index_rebuild()
+
+    await load_route_index([(8, 2), (9, 2)])
+
+    assert await is_route_index_ready()
+    assert await get_route_vehicle_ids(1) == []
+    assert sorted(await get_route_vehicle_ids(2)) == [8, 9]
+    assert await get_publish_state(7) == (False, None)
+    assert await get_publish_state(8) == (False, 2)
+    assert await claim_route_index_rebuild()
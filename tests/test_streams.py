@@ -0,0 +1,106 @@
+import orjson
+import pytest
+
+from volta_api.ws.streams import StreamConsumer
+
+STREAM = "test:stream"
+DEAD_LETTER = "test:stream:dead"
+
+
+async def _consumer(handler, **kwargs):
+    consumer = StreamConsumer(
+        "test-group",
+        handler,
+        streams=[STREAM],
+        batch=10,
+        block_ms=10,
+        consumer="test-consumer",
+        dead_letter=DEAD_LETTER,
+        **kwargs,
+    )
+    await consumer._ensure_groups()
+    # Nothing is pending yet; this flips the consumer over to new entries.
+    await consumer._read_once()
+    return consumer
+
+
+async def _add(redis, *events):
+    for event in events:
+        await redis.xadd(STREAM, {"event": orjson.dumps(event)})
+
+
+async def _pending(redis):
+    return (await redis.xpending(STREAM, "test-group"))["pending"]
+
+
+@pytest.mark.anyio
+async def test_batch_is_handled_and_acked(redis):
+    handled = []
+
+    async def handler(events):
+        handled.extend(events)
+
+    consumer = await _consumer(handler)
+    await _add(redis, {"n": 1}, {"n": 2})
+    await consumer._read_once()
+
+    assert handled == [{"n": 1}, {"n": 2}]
+    assert consumer.processed == 2
+    assert await _pending(redis) == 0
+
+
+@pytest.mark.anyio
+async def test_failed_batch_retries_entries_one_by_one(redis):
+    handled = []
+
+    async def handler(events):
+        if any(event.get("bad") for event in events):
+            raise ValueError("bad event")
+        handled.extend(events)
+
+    consumer = await _consumer(handler)
+    await _add(redis, {"n": 1}, {"n": 2, "bad": True}, {"n": 3})
+
+    with pytest.raises(RuntimeError):
+        await consumer._read_once()
+
+    assert handled == [{"n": 1}, {"n": 3}]
+    assert await _pending(redis) == 1
+
+
+@pytest.mark.anyio
+async def test_entry_is_dead_lettered_after_max_deliveries(redis):
+    async def handler(events):
+        raise ValueError("always fails")
+
+    consumer = await _consumer(handler, max_deliveries=2)
+    await _add(redis, {"n": 1})
+
+    with pytest.raises(RuntimeError):
+        await consumer._read_once()
+    assert await redis.xlen(DEAD_LETTER) == 0
+
+    # What _run does after backing off: replay the pending entries.
+    consumer._replay_pending = True
+    await consumer._read_once()
+
+    [(_, fields)] = await redis.xrange(DEAD_LETTER)
+    assert orjson.loads(fields["event"]) == {"n": 1}
+    assert fields["group"] == "test-group"
+    assert consumer.dead_lettered == 1
+    assert await _pending(redis) == 0
+
+
+@pytest.mark.anyio
+async def test_unparseable_entry_is_acked_without_calling_handler(redis):
+    handled = []
+
+    async def handler(events):
+        handled.extend(events)
+
+    consumer = await _consumer(handler)
+    await redis.xadd(STREAM, {"event": "not json"})
+    await consumer._read_once()
+
+    assert handled == []
+    assert await _pending(redis) == 0
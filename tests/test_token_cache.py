@@ -0,0 +1,72 @@
+import time
+
+from volta_api.core.security import (
+    TokenClaimsCache,
+    access_token_cache,
+    create_access_token,
+    create_refresh_token,
+    token_hash,
+    verify_access_token,
+)
+
+
+def _claims(sub="user-1", ttl=60.0):
+    return {"sub": sub, "type": "access", "exp": time.time() + ttl}
+
+
+def test_hit_until_the_token_expires():
+    cache = TokenClaimsCache(8)
+    claims = _claims()
+    cache.put("a", claims)
+
+    assert cache.get("a") is claims
+
+    cache.put("b", _claims(ttl=-1))
+    assert cache.get("b") is None
+    assert cache.stats()["size"] == 1
+    assert (cache.hits, cache.misses) == (1, 1)
+
+
+def test_least_recently_used_entry_is_evicted():
+    cache = TokenClaimsCache(2)
+    cache.put("a", _claims("a"))
+    cache.put("b", _claims("b"))
+    cache.get("a")
+    cache.put("c", _claims("c"))
+
+    assert cache.get("b") is None
+    assert cache.get("a")["sub"] == "a"
+    assert cache.get("c")["sub"] == "c"
+    assert cache.evictions == 1
+
+
+def test_claims_without_exp_are_not_cached():
+    cache = TokenClaimsCache(2)
+    cache.put("a", {"sub": "a"})
+
+    assert cache.get("a") is None
+
+
+def test_discard_removes_the_entry():
+    cache = TokenClaimsCache(2)
+    cache.put("a", _claims())
+    cache.discard("a")
+
+    assert cache.get("a") is None
+
+
+def test_verify_access_token_caches_by_digest():
+    access_token_cache.clear()
+    token = create_access_token("user-1")
+
+    assert verify_access_token(token) == "user-1"
+    assert access_token_cache.get(token_hash(token))["sub"] == "user-1"
+    assert verify_access_token(token) == "user-1"
+
+
+def test_verify_access_token_rejects_other_token_types():
+    access_token_cache.clear()
+    token = create_refresh_token("user-1")
+
+    assert verify_access_token(token) is None
+    assert access_token_cache.get(token_hash(token)) is None